@@ -0,0 +1,41 @@
+"""add conversation summary and message token estimates
+
+Revision ID: 3b8d2f6a9c41
+Revises: 7c3e9a1f4b2d
+Create Date: 2026-10-18 14:36:05.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d2f6a9c41'
+down_revision: Union[str, Sequence[str], None] = '7c3e9a1f4b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('summary_through_message_id', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_estimate', sa.Integer(), nullable=True))
+
+    # Backfill with the same ~4 characters per token estimate used for new messages
+    op.execute("UPDATE messages SET token_estimate = (LENGTH(content) + 3) / 4")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_column('token_estimate')
+
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.drop_column('summary_through_message_id')
+        batch_op.drop_column('summary')
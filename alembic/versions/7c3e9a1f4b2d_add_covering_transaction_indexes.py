@@ -0,0 +1,59 @@
+"""add covering transaction indexes
+
+Revision ID: 7c3e9a1f4b2d
+Revises: be19883ddaab
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a1f4b2d'
+down_revision: Union[str, Sequence[str], None] = 'be19883ddaab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        # Analytics, dashboard and top-expense queries: user + account + type + date range,
+        # with category_id and amount trailing so grouped sums are answered from the index
+        batch_op.create_index(
+            'ix_transaction_user_account_type_date',
+            ['user_id', 'account_id', 'type', 'date', 'category_id', 'amount'],
+            unique=False
+        )
+        # Budget spending: user + category + type + month range. Supersedes (user_id, category_id)
+        batch_op.create_index(
+            'ix_transaction_user_category_type_date',
+            ['user_id', 'category_id', 'type', 'date', 'amount'],
+            unique=False
+        )
+        batch_op.drop_index('ix_transaction_user_category')
+        # Account balance aggregate and Account.transactions relationship loads
+        batch_op.create_index(
+            'ix_transaction_account_type',
+            ['account_id', 'type', 'amount'],
+            unique=False
+        )
+
+    with op.batch_alter_table('transaction_tags', schema=None) as batch_op:
+        # The primary key only serves transaction -> tags lookups
+        batch_op.create_index('ix_transaction_tags_tag_id', ['tag_id', 'transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('transaction_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_tags_tag_id')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_account_type')
+        batch_op.create_index('ix_transaction_user_category', ['user_id', 'category_id'], unique=False)
+        batch_op.drop_index('ix_transaction_user_category_type_date')
+        batch_op.drop_index('ix_transaction_user_account_type_date')
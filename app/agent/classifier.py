@@ -0,0 +1,331 @@
+"""Per-user category and tag classifier trained on the user's own transactions
+
+Multinomial naive Bayes over description unigrams and bigrams. A model is trained
+from the database the first time a user needs it and then kept current from
+session commits (new, edited and deleted transactions), so predictions reflect
+every write without retraining.
+"""
+
+import logging
+import math
+import re
+import threading
+import weakref
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.cache import TTLCache
+from app.config import settings
+from app.crud.transaction_crud import TransactionCrud
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+# Laplace smoothing for feature likelihoods
+_ALPHA = 1.0
+
+
+def description_features(description: Optional[str]) -> list[str]:
+    """Lowercased word unigrams and bigrams of a description"""
+    words = _TOKEN_RE.findall((description or "").lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class _LabelCounts:
+    """Document and feature counts for one label (a category, or the presence of a tag)"""
+
+    __slots__ = ("documents", "features", "total")
+
+    def __init__(self):
+        self.documents = 0
+        self.features: Counter = Counter()
+        self.total = 0
+
+    def add(self, features: list[str], sign: int) -> None:
+        self.documents += sign
+        for feature in features:
+            self.features[feature] += sign
+            if self.features[feature] <= 0:
+                del self.features[feature]
+        self.total += sign * len(features)
+
+
+class CategoryClassifier:
+    """Naive Bayes model of one user's categorized transactions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._categories: dict[int, _LabelCounts] = defaultdict(_LabelCounts)
+        self._tags: dict[int, _LabelCounts] = defaultdict(_LabelCounts)
+        self._all = _LabelCounts()
+        self._vocabulary: Counter = Counter()
+        # What each transaction contributed, so edits and deletes can be undone exactly
+        self._learned: dict[int, tuple[list[str], int, tuple[int, ...]]] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self._learned)
+
+    def learn(
+        self,
+        transaction_id: int,
+        description: Optional[str],
+        category_id: Optional[int],
+        tag_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Add or replace one transaction's contribution.
+
+        Args:
+            transaction_id: Transaction ID
+            description: Transaction description
+            category_id: Category ID (uncategorized transactions are only forgotten)
+            tag_ids: Tag IDs, or None to keep the tags learned earlier for this transaction
+        """
+        with self._lock:
+            previous = self._forget(transaction_id)
+            if tag_ids is None:
+                tag_ids = previous[2] if previous else ()
+            features = description_features(description)
+            if category_id is None or not features:
+                return
+
+            tags = tuple(sorted(set(tag_ids)))
+            self._categories[category_id].add(features, 1)
+            for tag_id in tags:
+                self._tags[tag_id].add(features, 1)
+            self._all.add(features, 1)
+            self._vocabulary.update(set(features))
+            self._learned[transaction_id] = (features, category_id, tags)
+
+    def forget(self, transaction_id: int) -> None:
+        """Remove a deleted transaction's contribution"""
+        with self._lock:
+            self._forget(transaction_id)
+
+    def _forget(self, transaction_id: int) -> Optional[tuple[list[str], int, tuple[int, ...]]]:
+        learned = self._learned.pop(transaction_id, None)
+        if learned is None:
+            return None
+        features, category_id, tags = learned
+        self._categories[category_id].add(features, -1)
+        if self._categories[category_id].documents <= 0:
+            del self._categories[category_id]
+        for tag_id in tags:
+            self._tags[tag_id].add(features, -1)
+            if self._tags[tag_id].documents <= 0:
+                del self._tags[tag_id]
+        self._all.add(features, -1)
+        for feature in set(features):
+            self._vocabulary[feature] -= 1
+            if self._vocabulary[feature] <= 0:
+                del self._vocabulary[feature]
+        return learned
+
+    @staticmethod
+    def _log_likelihood(feature_counts: list[int], total: int, vocabulary_size: int) -> float:
+        denominator = total + _ALPHA * vocabulary_size
+        return sum(math.log((count + _ALPHA) / denominator) for count in feature_counts)
+
+    def predict_categories(
+        self,
+        description: str,
+        allowed_ids: Optional[set[int]] = None,
+        limit: int = 3,
+    ) -> list[tuple[int, float]]:
+        """
+        Most likely categories for a description.
+
+        Args:
+            description: Transaction description (or any short text)
+            allowed_ids: Only consider these category IDs (e.g. the user's current categories)
+            limit: Maximum number of categories to return
+
+        Returns:
+            (category_id, probability) pairs, most likely first; empty when no feature has been seen before
+        """
+        with self._lock:
+            features = [f for f in description_features(description) if f in self._vocabulary]
+            if not features:
+                return []
+            vocabulary_size = len(self._vocabulary)
+            documents = self._all.documents
+            scores = {
+                category_id: math.log(counts.documents / documents)
+                + self._log_likelihood([counts.features[f] for f in features], counts.total, vocabulary_size)
+                for category_id, counts in self._categories.items()
+                if allowed_ids is None or category_id in allowed_ids
+            }
+        if not scores:
+            return []
+
+        top = max(scores.values())
+        weights = {category_id: math.exp(score - top) for category_id, score in scores.items()}
+        total = sum(weights.values())
+        ranked = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(category_id, weight / total) for category_id, weight in ranked]
+
+    def predict_category(
+        self,
+        description: str,
+        allowed_ids: Optional[set[int]] = None,
+    ) -> tuple[Optional[int], float]:
+        """Most likely category and its probability, or (None, 0.0) when the description is unfamiliar"""
+        ranked = self.predict_categories(description, allowed_ids, limit=1)
+        return ranked[0] if ranked else (None, 0.0)
+
+    def predict_tags(self, description: str, allowed_ids: Optional[set[int]] = None) -> list[int]:
+        """Tags more likely present than absent for a description (each tag needs a few examples)"""
+        with self._lock:
+            features = [f for f in description_features(description) if f in self._vocabulary]
+            if not features:
+                return []
+            vocabulary_size = len(self._vocabulary)
+            documents = self._all.documents
+            predicted = []
+            for tag_id, counts in self._tags.items():
+                if counts.documents < settings.CLASSIFIER_MIN_TAG_EXAMPLES:
+                    continue
+                if allowed_ids is not None and tag_id not in allowed_ids:
+                    continue
+                # One-vs-rest: transactions with the tag against all the others
+                documents_without = documents - counts.documents
+                if documents_without <= 0:
+                    predicted.append(tag_id)
+                    continue
+                with_tag = [counts.features[f] for f in features]
+                without_tag = [self._all.features[f] - count for f, count in zip(features, with_tag)]
+                log_odds = (
+                    math.log(counts.documents / documents_without)
+                    + self._log_likelihood(with_tag, counts.total, vocabulary_size)
+                    - self._log_likelihood(without_tag, self._all.total - counts.total, vocabulary_size)
+                )
+                if log_odds > 0:
+                    predicted.append(tag_id)
+        return sorted(predicted)
+
+
+# Trained models by user ID; an evicted model is retrained from the database on next use
+_classifiers = TTLCache(
+    max_size=settings.CLASSIFIER_CACHE_SIZE,
+    ttl_seconds=settings.CLASSIFIER_TTL_SECONDS,
+)
+# One training lock per user, so users train in parallel and a user's model is trained once;
+# a lock is dropped as soon as no thread holds a reference to it
+_training_locks: "weakref.WeakValueDictionary[int, threading.Lock]" = weakref.WeakValueDictionary()
+_training_locks_guard = threading.Lock()
+# Writes committed while a user's model is being trained, replayed onto it before it is published
+_pending_changes: dict[int, list[tuple[int, Optional[str], Optional[int], Optional[list[int]]]]] = {}
+_pending_changes_lock = threading.Lock()
+
+
+def _training_lock(user_id: int) -> threading.Lock:
+    with _training_locks_guard:
+        lock = _training_locks.get(user_id)
+        if lock is None:
+            lock = threading.Lock()
+            _training_locks[user_id] = lock
+        return lock
+
+
+def get_classifier(db: Session, user_id: int) -> CategoryClassifier:
+    """
+    The user's classifier, trained from their newest transactions on first use.
+
+    Training runs synchronous queries, so async callers should call this from a worker thread.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        The user's trained classifier
+    """
+    classifier = _classifiers.get(user_id)
+    if classifier is not None:
+        return classifier
+
+    with _training_lock(user_id):
+        classifier = _classifiers.get(user_id)
+        if classifier is not None:
+            return classifier
+        classifier = CategoryClassifier()
+        with _pending_changes_lock:
+            _pending_changes[user_id] = []
+        try:
+            for transaction in TransactionCrud.get_training_rows(db, user_id, settings.CLASSIFIER_MAX_TRAINING_ROWS):
+                classifier.learn(
+                    transaction.id,
+                    transaction.description,
+                    transaction.category_id,
+                    [tag.id for tag in transaction.tags],
+                )
+        except Exception:
+            with _pending_changes_lock:
+                _pending_changes.pop(user_id, None)
+            raise
+
+        # The training rows may predate writes committed meanwhile; replaying them is idempotent
+        with _pending_changes_lock:
+            for change in _pending_changes.pop(user_id):
+                _apply_change(classifier, *change)
+            _classifiers.set(user_id, classifier)
+        logger.info(f"Trained category classifier for user {user_id} on {classifier.size} transactions")
+        return classifier
+
+
+def _collect_transaction_changes(session: Session, flush_context) -> None:
+    changes = session.info.setdefault("classifier_changes", {})
+    for obj in session.new | session.dirty:
+        if getattr(obj, "__tablename__", None) != "transactions" or obj.id is None:
+            continue
+        # Only read the tags if they are already loaded; None keeps the tags learned before
+        loaded_tags = inspect(obj).attrs.tags.loaded_value
+        tag_ids = None if loaded_tags is NO_VALUE else [tag.id for tag in loaded_tags]
+        changes[obj.id] = (obj.user_id, obj.description, obj.category_id, tag_ids)
+    for obj in session.deleted:
+        if getattr(obj, "__tablename__", None) == "transactions":
+            changes[obj.id] = (obj.user_id, None, None, ())
+
+
+def _apply_change(
+    classifier: CategoryClassifier,
+    transaction_id: int,
+    description: Optional[str],
+    category_id: Optional[int],
+    tag_ids: Optional[list[int]],
+) -> None:
+    if category_id is None:
+        classifier.forget(transaction_id)
+    else:
+        classifier.learn(transaction_id, description, category_id, tag_ids)
+
+
+def _apply_transaction_changes(session: Session) -> None:
+    for transaction_id, (user_id, description, category_id, tag_ids) in session.info.pop("classifier_changes", {}).items():
+        with _pending_changes_lock:
+            classifier = _classifiers.get(user_id)
+            if classifier is None:
+                # A model in training gets the change after its rows; other users pick it up when trained
+                if user_id in _pending_changes:
+                    _pending_changes[user_id].append((transaction_id, description, category_id, tag_ids))
+                continue
+        _apply_change(classifier, transaction_id, description, category_id, tag_ids)
+
+
+def _discard_transaction_changes(session: Session) -> None:
+    session.info.pop("classifier_changes", None)
+
+
+def register_classifier_listeners(session_factory: sessionmaker) -> None:
+    """Keep loaded classifiers current with every committed transaction write (safe to call more than once)"""
+    if event.contains(session_factory, "after_flush", _collect_transaction_changes):
+        return
+    event.listen(session_factory, "after_flush", _collect_transaction_changes)
+    event.listen(session_factory, "after_commit", _apply_transaction_changes)
+    event.listen(session_factory, "after_rollback", _discard_transaction_changes)
@@ -0,0 +1,364 @@
+"""Rule-based transaction parser tried before the LLM agent
+
+Handles the common short inputs ("coffee 5", "lunch 18 plus 8 for parking",
+"groceries 42.50 yesterday") without a model call. Categories are resolved
+from the user's own categorized history and category names; anything the
+rules are not confident about is left to the agent.
+"""
+
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.agent.classifier import CategoryClassifier, get_classifier
+from app.cache import TTLCache
+from app.config import settings
+from app.crud.transaction_crud import TransactionCrud
+from app.database.data_version import get_data_version
+
+# Amount with an optional currency symbol or code on either side, e.g. "$5", "42.50", "5 eur", "1,200"
+_AMOUNT_RE = re.compile(
+    r"(?<![\w.])(?P<pre>[$€£]|usd|eur|gbp|chf|rsd)?\s?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?)"
+    r"\s?(?P<post>[$€£]|usd|eur|gbp|chf|rsd|dollars?|euros?|bucks)?(?![\w.])"
+)
+
+# Separators between transactions in one input
+_SEGMENT_SPLIT_RE = re.compile(r"\s*(?:,(?!\d)|[;+\n&]|\band\b|\bplus\b|\balso\b|\bthen\b)\s*")
+
+_RELATIVE_DAYS = {
+    "today": 0,
+    "this morning": 0,
+    "this afternoon": 0,
+    "this evening": 0,
+    "tonight": 0,
+    "yesterday": 1,
+    "last night": 1,
+    "day before yesterday": 2,
+}
+_DAYS_AGO_RE = re.compile(r"\b(\d{1,2}) days? ago\b")
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_WEEKDAY_RE = re.compile(r"\b(?:on |last )?(" + "|".join(_WEEKDAYS) + r")\b")
+_DATE_PHRASE_RE = re.compile(
+    r"\b(?:" + "|".join(sorted((re.escape(p) for p in _RELATIVE_DAYS), key=len, reverse=True)) + r")\b"
+)
+
+_MONTHS = [
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+]
+_NUMBER_WORDS = [
+    "a", "an", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "couple of", "a couple of", "few", "a few", "several",
+]
+
+# Inputs the rules do not attempt: future dates, dates other than the recent days above,
+# conversions, splits, recurring or percentage amounts
+_UNSUPPORTED_RE = re.compile(
+    r"\b(?:tomorrow|next|convert|converted|split|each|per|every|weekly|monthly|daily|"
+    r"owe|owes|lent|borrowed|refund(?:ed)?|in (?:usd|eur|gbp|chf|rsd))\b|%|\bto (?:usd|eur|gbp|chf|rsd)\b"
+    r"|\b(?:last|this|past) (?:week|weekend|month|year)\b"
+    r"|\b(?:weeks?|months?|years?) ago\b"
+    r"|\b(?:" + "|".join(_NUMBER_WORDS) + r") days? ago\b"
+    r"|\b(?:" + "|".join(_MONTHS) + r")\b"
+)
+
+# Date words still in a segment once the supported phrases are stripped: a date the rules did not read
+_UNREAD_DATE_RE = re.compile(r"\b(?:ago|last|week|weeks|weekend|fortnight|month|months|year|years)\b")
+
+# Currency an amount's symbol or word stands for ("bucks" names no particular currency)
+_CURRENCY_CODES = {
+    "$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "gbp": "GBP",
+    "chf": "CHF",
+    "rsd": "RSD",
+}
+
+_INCOME_RE = re.compile(r"\b(?:got paid|salary|paycheck|income|received|earned|bonus|wage|wages)\b")
+
+# Verbs and fillers stripped from descriptions
+_FILLER_WORDS = {
+    "i", "a", "an", "the", "for", "on", "at", "in", "of", "my", "some", "spent", "spend", "paid", "pay",
+    "bought", "buy", "got", "was", "were", "it", "add", "added", "cost", "costs", "today", "yesterday",
+    "this", "morning", "afternoon", "evening", "tonight", "last", "night", "day", "before", "ago",
+    "days", "from", "with",
+}
+
+_WORD_RE = re.compile(r"[a-zà-ž][a-zà-ž'\-]*")
+
+_category_hints_cache = TTLCache(
+    max_size=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.USER_CONTEXT_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class CategoryHints:
+    """Category lookups learned from a user's categorized transactions"""
+    by_description: Dict[str, int] = field(default_factory=dict)
+    by_word: Dict[str, int] = field(default_factory=dict)
+    # The user's live naive Bayes model, consulted when the lookups above miss
+    classifier: Optional[CategoryClassifier] = None
+
+
+@dataclass
+class FastParseResult:
+    """Transactions found by the rules and how much to trust them"""
+    transactions: List[Dict[str, Any]]
+    confidence: float
+
+
+class FastParserStats:
+    """Counts of inputs answered by the rules versus handed to the agent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            self.attempts += 1
+            if hit:
+                self.hits += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "fallbacks": self.attempts - self.hits,
+                "hit_rate": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.attempts = 0
+            self.hits = 0
+
+
+fast_parser_stats = FastParserStats()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text) if word not in _FILLER_WORDS]
+
+
+def build_category_hints(history: List[tuple]) -> CategoryHints:
+    """
+    Learn description and keyword lookups from (description, category_id, type) rows.
+    A word only becomes a hint when it is seen at least twice and nearly always in the same category.
+    """
+    descriptions: Dict[str, Counter] = defaultdict(Counter)
+    words: Dict[str, Counter] = defaultdict(Counter)
+    for description, category_id, _ in history:
+        words_in_description = _words(_normalize(description))
+        if not words_in_description:
+            continue
+        descriptions[" ".join(words_in_description)][category_id] += 1
+        for word in set(words_in_description):
+            words[word][category_id] += 1
+
+    hints = CategoryHints()
+    for description, counts in descriptions.items():
+        hints.by_description[description] = counts.most_common(1)[0][0]
+    for word, counts in words.items():
+        category_id, count = counts.most_common(1)[0]
+        total = sum(counts.values())
+        if count >= 2 and count / total >= 0.8:
+            hints.by_word[word] = category_id
+    return hints
+
+
+def load_category_hints(db: Session, user_id: int) -> CategoryHints:
+    """Category hints for a user, cached per data version so new transactions are learned on the next input"""
+    cache_key = (user_id, get_data_version(user_id))
+    hints = _category_hints_cache.get(cache_key)
+    if hints is None:
+        hints = build_category_hints(TransactionCrud.get_category_history(db, user_id))
+        hints.classifier = get_classifier(db, user_id)
+        _category_hints_cache.set(cache_key, hints)
+    return hints
+
+
+def _parse_amount(match: re.Match) -> Optional[float]:
+    number = match.group("number")
+    if re.fullmatch(r"\d+,\d{1,2}", number):
+        number = number.replace(",", ".")  # Decimal comma, e.g. "4,50"
+    else:
+        number = number.replace(",", "")
+    amount = float(number)
+    return amount if amount > 0 else None
+
+
+def _strip_dates(text: str) -> str:
+    for pattern in (_DATE_PHRASE_RE, _DAYS_AGO_RE, _WEEKDAY_RE):
+        text = pattern.sub(" ", text)
+    return text
+
+
+def _currency_code(match: re.Match) -> Optional[str]:
+    """Currency named next to an amount, or None when there is none"""
+    symbol = match.group("pre") or match.group("post")
+    return _CURRENCY_CODES.get(symbol) if symbol else None
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") and len(word) > 3 else word
+
+
+def _resolve_date(text: str, today: date) -> Optional[date]:
+    """Date implied by the relative phrases in the text (today when there are none, None when they conflict)"""
+    found = set()
+    for phrase in _DATE_PHRASE_RE.findall(text):
+        found.add(today - timedelta(days=_RELATIVE_DAYS[phrase]))
+    for days in _DAYS_AGO_RE.findall(text):
+        found.add(today - timedelta(days=int(days)))
+    for weekday in _WEEKDAY_RE.findall(text):
+        # Most recent past occurrence; a weekday equal to today means a week ago
+        days_back = (today.weekday() - _WEEKDAYS.index(weekday)) % 7 or 7
+        found.add(today - timedelta(days=days_back))
+    if len(found) > 1:
+        return None
+    return found.pop() if found else today
+
+
+def _resolve_category(
+    description: str,
+    hints: CategoryHints,
+    category_names: Dict[str, int],
+) -> tuple[Optional[int], float]:
+    """Category ID for a description and the confidence of the match"""
+    if description in hints.by_description:
+        return hints.by_description[description], 1.0
+
+    # Category named in the description, e.g. "groceries at lidl" -> Groceries
+    padded = f" {' '.join(_singular(word) for word in description.split())} "
+    named = {
+        category_id for name, category_id in category_names.items()
+        if f" {' '.join(_singular(word) for word in name.split())} " in padded
+    }
+    if len(named) == 1:
+        return named.pop(), 0.9
+
+    hinted = {hints.by_word[word] for word in description.split() if word in hints.by_word}
+    if len(hinted) == 1:
+        return hinted.pop(), 0.8
+
+    if hints.classifier is not None:
+        category_id, probability = hints.classifier.predict_category(description, set(category_names.values()))
+        if probability >= settings.CLASSIFIER_MIN_PROBABILITY:
+            return category_id, probability
+    return None, 0.0
+
+
+def fast_parse(
+    text: str,
+    user_categories: List[Dict[str, Any]],
+    user_tags: List[Dict[str, Any]],
+    hints: CategoryHints,
+    today: Optional[date] = None,
+    currency: Optional[str] = None,
+) -> Optional[FastParseResult]:
+    """
+    Parse short transaction inputs with rules.
+
+    Args:
+        text: Natural language input from user
+        user_categories: List of user's categories
+        user_tags: List of user's tags
+        hints: Category hints learned from the user's history
+        today: Reference date for relative dates (defaults to today)
+        currency: Account currency code; amounts named in another currency are left to the agent
+
+    Returns:
+        FastParseResult, or None when the input is outside what the rules handle
+    """
+    today = today or date.today()
+    normalized = _normalize(text)
+    if not normalized or len(normalized) > settings.FAST_PARSER_MAX_INPUT_LENGTH or _UNSUPPORTED_RE.search(normalized):
+        return None
+
+    transaction_date = _resolve_date(normalized, today)
+    if transaction_date is None:
+        return None
+
+    category_names = {_normalize(cat["name"]): cat["id"] for cat in user_categories}
+    tag_names = {_normalize(tag["name"]): tag["id"] for tag in user_tags}
+    tag_ids = set(tag_names.values())
+
+    transactions = []
+    confidence = 1.0
+    for segment in _SEGMENT_SPLIT_RE.split(normalized):
+        if not segment:
+            continue
+        transaction_type = "income" if _INCOME_RE.search(segment) else "expense"
+        segment = _strip_dates(segment)
+        amounts = list(_AMOUNT_RE.finditer(segment))
+        if len(amounts) != 1:
+            # "and" inside a description, or two amounts in one segment: leave it to the agent
+            return None
+        amount = _parse_amount(amounts[0])
+        if amount is None:
+            return None
+        amount_currency = _currency_code(amounts[0])
+        if amount_currency is not None and amount_currency != (currency or "").upper():
+            return None
+
+        remainder = segment[:amounts[0].start()] + " " + segment[amounts[0].end():]
+        if _UNREAD_DATE_RE.search(remainder):
+            return None
+        description = " ".join(_words(remainder))
+        if not description:
+            return None
+
+        category_id, category_confidence = _resolve_category(description, hints, category_names)
+        if category_id is None:
+            return None
+        confidence = min(confidence, category_confidence)
+
+        tags = {tag_names[word] for word in description.split() if word in tag_names}
+        if hints.classifier is not None:
+            tags.update(hints.classifier.predict_tags(description, tag_ids))
+
+        transactions.append({
+            "amount": amount,
+            "description": description,
+            "category_id": category_id,
+            "type": transaction_type,
+            "date": transaction_date.isoformat(),
+            "tags": sorted(tags),
+        })
+
+    if not transactions:
+        return None
+    return FastParseResult(transactions=transactions, confidence=confidence)
+
+
+def try_fast_parse(
+    text: str,
+    user_categories: List[Dict[str, Any]],
+    user_tags: List[Dict[str, Any]],
+    hints: Optional[CategoryHints],
+    currency: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Transactions from the rules when they are confident enough, otherwise None so the caller runs the agent.
+    Records the outcome in the hit rate.
+    """
+    if hints is None or not settings.FAST_PARSER_ENABLED:
+        return None
+    result = fast_parse(text, user_categories, user_tags, hints, currency=currency)
+    hit = result is not None and result.confidence >= settings.FAST_PARSER_MIN_CONFIDENCE
+    fast_parser_stats.record(hit)
+    return result.transactions if hit else None
@@ -1,5 +1,5 @@
 from typing import Literal
-from langchain_anthropic import ChatAnthropic
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
@@ -8,7 +8,11 @@ from app.agent.tools import (
     create_transaction_preview,
     convert_currency,
 )
-from app.config import settings
+from app.llm.prompt_cache import cacheable_tools
+from app.llm.models import create_chat_model
+from app.llm.policy import invoke_llm
+from app.llm.scheduler import Priority
+from app.llm.usage import llm_usage
 
 
 # Define the tools
@@ -22,19 +26,21 @@ def create_agent_graph():
     """Create and compile the LangGraph agent"""
 
     # Initialize LLM with tools
-    llm = ChatAnthropic(
+    llm = create_chat_model(
+        "agent",
         model="claude-haiku-4-5-20251001",
         temperature=0,
         max_tokens=4096,  # Increased from default 1024 to handle many transactions
-        api_key=settings.ANTHROPIC_API_KEY
     )
-    llm_with_tools = llm.bind_tools(tools)
+    # Tool definitions are the first cached prefix of every request
+    llm_with_tools = llm.bind_tools(cacheable_tools(tools))
 
     # Define the agent node
-    def agent_node(state: AgentState):
+    async def agent_node(state: AgentState, config: RunnableConfig):
         """Agent reasoning node - decides which tools to call"""
         messages = state["messages"]
-        response = llm_with_tools.invoke(messages)
+        response = await invoke_llm(llm_with_tools, messages, state["user_id"], Priority.INTERACTIVE, config)
+        llm_usage.record("agent", response)
         return {"messages": [response]}
 
     # Define conditional edge logic
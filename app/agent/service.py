@@ -1,13 +1,25 @@
 from datetime import date
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, Optional
 import logging
 import time
 
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.fast_parser import CategoryHints, try_fast_parse
 from app.agent.graph import agent_graph
 from app.agent.state import AgentState
+from app.database.data_version import get_data_version
+from app.llm.encoding import encode_id_map
+from app.llm.prompt_cache import build_system_message
+from app.llm.scheduler import LLM_QUEUED_EVENT
+from app.llm.shortlist import Shortlist, shortlist_note, shortlist_taxonomy
 
 logger = logging.getLogger(__name__)
 
+# Tag on every event of a transaction agent run nested inside another graph (e.g. the assistant),
+# so the outer stream can tell the inner agent's events from its own
+NESTED_AGENT_TAG = "transaction_agent"
+
 
 class ExecutionTracker:
     """Tracks tool execution timing and call stack"""
@@ -38,9 +50,6 @@ class ExecutionTracker:
 
 SYSTEM_PROMPT = """You are a transaction parsing assistant. Your task: identify ALL transactions in the user's input and create previews for them simultaneously.
 
-Available categories: {categories}
-Available tags: {tags}
-
 CRITICAL: Parse the entire input carefully, identify EVERY transaction (even if multiple transactions appear in one sentence), then call create_transaction_preview for ALL of them in a SINGLE response. The tools execute in parallel.
 
 Example workflow:
@@ -62,11 +71,11 @@ For each transaction:
 - category_id: match from available categories
 - transaction_type: "expense" or "income" (default: "expense")
 - tag_ids: list of IDs from available tags (empty list if none match)
-- transaction_date: YYYY-MM-DD format (default: {today})
+- transaction_date: YYYY-MM-DD format (default: today's date)
 
 Date handling:
-- Past: "yesterday" = {today} minus 1 day, "last week" = {today} minus 7 days, etc. - CREATE these transactions with the calculated past date
-- Present: "today", "this morning" = {today} - CREATE these transactions
+- Past: "yesterday" = today minus 1 day, "last week" = today minus 7 days, etc. - CREATE these transactions with the calculated past date
+- Present: "today", "this morning" = today - CREATE these transactions
 - Future: "tomorrow", "next week", etc. - SKIP these, do NOT create future transactions
 
 IMPORTANT: Include ALL past and present transactions, even if mentioned at the end of the input.
@@ -77,12 +86,79 @@ DO NOT call tools one by one. Analyze the full input, then make ALL tool calls a
 """
 
 
-def parse_transactions(
+USER_CONTEXT_PROMPT = """Available categories (id=name{category_note}): {categories}
+Available tags (id=name{tag_note}): {tags}
+"""
+
+
+# Categories the classifier ranks below this probability are not suggested to the agent
+LIKELY_CATEGORY_MIN_PROBABILITY = 0.1
+
+
+def likely_categories(
+    text: str,
+    user_categories: List[Dict[str, Any]],
+    category_hints: Optional[CategoryHints],
+) -> List[Dict[str, Any]]:
+    """Up to three of the user's categories their classifier ranks highest for the input text"""
+    if category_hints is None or category_hints.classifier is None:
+        return []
+    by_id = {cat["id"]: cat for cat in user_categories}
+    ranked = category_hints.classifier.predict_categories(text, set(by_id), limit=3)
+    return [by_id[category_id] for category_id, probability in ranked if probability >= LIKELY_CATEGORY_MIN_PROBABILITY]
+
+
+def build_agent_system_message(
+    user_categories: List[Dict[str, Any]],
+    user_tags: List[Dict[str, Any]],
+    text: Optional[str] = None,
+    user_id: Optional[int] = None,
+    category_hints: Optional[CategoryHints] = None,
+) -> Dict[str, Any]:
+    """
+    Build the system message with the instructions and the user's categories and tags
+    as cached blocks, followed by today's date which changes daily and the categories
+    the user's classifier suggests for this input.
+
+    Given the input text and user ID, large taxonomies are cut down to the categories and
+    tags relevant to the input; those lists vary per input and so are not cached.
+    """
+    suggested_categories = likely_categories(text, user_categories, category_hints) if text else []
+    categories = Shortlist(items=user_categories, total=len(user_categories))
+    tags = Shortlist(items=user_tags, total=len(user_tags))
+    if text and user_id is not None:
+        data_version = get_data_version(user_id)
+        categories = shortlist_taxonomy(
+            user_categories,
+            text,
+            cache_key=(user_id, data_version, "categories"),
+            always=[cat["id"] for cat in suggested_categories],
+        )
+        tags = shortlist_taxonomy(user_tags, text, cache_key=(user_id, data_version, "tags"), keep_all_without_match=False)
+
+    user_context = USER_CONTEXT_PROMPT.format(
+        categories=encode_id_map(categories.items),
+        tags=encode_id_map(tags.items),
+        category_note=shortlist_note(categories),
+        tag_note=shortlist_note(tags),
+    )
+    volatile = f"Today's date: {date.today().isoformat()}"
+    if suggested_categories:
+        volatile += f"\nLikely categories for this input, from the user's history (id=name): {encode_id_map(suggested_categories)}"
+
+    if categories.truncated or tags.truncated:
+        return build_system_message([SYSTEM_PROMPT], volatile=user_context + volatile)
+    return build_system_message([SYSTEM_PROMPT, user_context], volatile=volatile)
+
+
+async def parse_transactions(
     text: str,
     account_id: int,
     user_id: int,
     user_categories: List[Dict[str, Any]],
     user_tags: List[Dict[str, Any]],
+    category_hints: Optional[CategoryHints] = None,
+    account_currency: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Parse natural language text into transaction previews using the agent.
@@ -93,22 +169,21 @@ def parse_transactions(
         user_id: Current user ID
         user_categories: List of user's categories
         user_tags: List of user's tags
+        category_hints: User's category history; enables the rule-based fast path
+        account_currency: Currency of the account; the fast path leaves other currencies to the agent
 
     Returns:
         List of transaction dictionaries
     """
+    transactions = try_fast_parse(text, user_categories, user_tags, category_hints, account_currency)
+    if transactions is not None:
+        logger.info(f"Fast path parsed {len(transactions)} transaction(s)")
+        return transactions
 
     # Build initial state
     initial_state: AgentState = {
         "messages": [
-            {
-                "role": "system",
-                "content": SYSTEM_PROMPT.format(
-                    categories=user_categories,
-                    tags=user_tags,
-                    today=date.today().isoformat(),
-                )
-            },
+            build_agent_system_message(user_categories, user_tags, text, user_id, category_hints),
             {
                 "role": "user",
                 "content": text
@@ -122,7 +197,7 @@ def parse_transactions(
     }
 
     # Run the agent
-    final_state = agent_graph.invoke(initial_state)
+    final_state = await agent_graph.ainvoke(initial_state)
 
     # Extract transaction previews from tool calls
     transactions = []
@@ -151,6 +226,9 @@ async def parse_transactions_stream(
     user_id: int,
     user_categories: List[Dict[str, Any]],
     user_tags: List[Dict[str, Any]],
+    config: Optional[RunnableConfig] = None,
+    category_hints: Optional[CategoryHints] = None,
+    account_currency: Optional[str] = None,
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Stream transaction previews as tools execute in parallel.
@@ -162,24 +240,35 @@ async def parse_transactions_stream(
         user_id: Current user ID
         user_categories: List of user's categories
         user_tags: List of user's tags
+        config: Optional run config (e.g. tags when nested inside the assistant)
+        category_hints: User's category history; enables the rule-based fast path
+        account_currency: Currency of the account; the fast path leaves other currencies to the agent
 
     Yields:
         Event dictionaries with different types:
         - {"type": "planning", "count": N} - when agent plans N tool calls
         - {"type": "transaction_start", "description": "...", "amount": X} - when tool starts
         - {"type": "transaction", "data": {...}} - when tool completes
+        - {"type": "queued", "position": N} - while waiting for an LLM slot
     """
+    transactions = try_fast_parse(text, user_categories, user_tags, category_hints, account_currency)
+    if transactions is not None:
+        # Same event sequence as the agent, without the model round trip
+        logger.info(f"Fast path parsed {len(transactions)} transaction(s)")
+        yield {"type": "planning", "count": len(transactions)}
+        for transaction in transactions:
+            yield {
+                "type": "transaction_start",
+                "description": transaction["description"],
+                "amount": transaction["amount"]
+            }
+            yield {"type": "transaction", "data": transaction}
+        return
+
     # Build initial state
     initial_state: AgentState = {
         "messages": [
-            {
-                "role": "system",
-                "content": SYSTEM_PROMPT.format(
-                    categories=user_categories,
-                    tags=user_tags,
-                    today=date.today().isoformat(),
-                )
-            },
+            build_agent_system_message(user_categories, user_tags, text, user_id, category_hints),
             {
                 "role": "user",
                 "content": text
@@ -196,9 +285,12 @@ async def parse_transactions_stream(
     tracker = ExecutionTracker()
 
     # Stream events from the graph
-    async for event in agent_graph.astream_events(initial_state, version="v2"):
+    async for event in agent_graph.astream_events(initial_state, config=config, version="v2"):
         event_type = event["event"]
 
+        if event_type == "on_custom_event" and event.get("name") == LLM_QUEUED_EVENT:
+            yield {"type": "queued", "position": event["data"]["position"]}
+
         # Log agent reasoning when LLM completes
         if event_type == "on_chat_model_end":
             output = event.get("data", {}).get("output", {})
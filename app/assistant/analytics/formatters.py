@@ -3,6 +3,8 @@
 from typing import Any
 from datetime import datetime
 
+from app.llm.encoding import encode_table
+
 
 def format_spending_by_category(results: list) -> dict[str, Any]:
     """Format spending by category results"""
@@ -10,6 +12,7 @@ def format_spending_by_category(results: list) -> dict[str, Any]:
         return {
             "summary": "No transactions found for the specified period.",
             "data": [],
+            "table": "",
             "total": 0
         }
 
@@ -34,9 +37,15 @@ def format_spending_by_category(results: list) -> dict[str, Any]:
         top_category = data[0]
         summary += f"Highest spending: {top_category['category_name']} (${top_category['amount']:.2f}, {top_category['percentage']:.1f}%)"
 
+    table = encode_table(
+        ["category", "amount", "pct", "count"],
+        ([item["category_name"], item["amount"], round(item["percentage"], 1), item["transaction_count"]] for item in data)
+    )
+
     return {
         "summary": summary,
         "data": data,
+        "table": table,
         "total": total,
         "category_count": len(data)
     }
@@ -48,6 +57,7 @@ def format_spending_over_time(results: list, group_by: str = 'day') -> dict[str,
         return {
             "summary": "No transaction data found for the specified period.",
             "data": [],
+            "table": "",
             "total_income": 0,
             "total_expense": 0
         }
@@ -77,9 +87,15 @@ def format_spending_over_time(results: list, group_by: str = 'day') -> dict[str,
 
     summary = f"Period analysis ({group_by}): Total income ${total_income:.2f}, Total expense ${total_expense:.2f}, Net ${total_income - total_expense:.2f}"
 
+    table = encode_table(
+        ["period", "income", "expense", "net"],
+        ([item["period"], item["income"], item["expense"], item["net"]] for item in data)
+    )
+
     return {
         "summary": summary,
         "data": data,
+        "table": table,
         "total_income": total_income,
         "total_expense": total_expense,
         "net": total_income - total_expense,
@@ -94,6 +110,7 @@ def format_budget_utilization(results: list) -> dict[str, Any]:
         return {
             "summary": "No budgets found.",
             "data": [],
+            "table": "",
             "total_budgeted": 0,
             "total_spent": 0
         }
@@ -112,9 +129,25 @@ def format_budget_utilization(results: list) -> dict[str, Any]:
     if near_limit:
         summary += f"{len(near_limit)} category(ies) near limit. "
 
+    table = encode_table(
+        ["category", "spent", "budget", "pct", "remaining", "status"],
+        (
+            [
+                item["category_name"],
+                item["spent_amount"],
+                item["budget_amount"],
+                round(item["utilization_percent"], 1),
+                item["remaining"],
+                "over" if item["utilization_percent"] > 100 else "near" if item["utilization_percent"] >= 80 else "ok",
+            ]
+            for item in data
+        )
+    )
+
     return {
         "summary": summary,
         "data": data,
+        "table": table,
         "total_budgeted": total_budgeted,
         "total_spent": total_spent,
         "over_budget_count": len(over_budget),
@@ -127,7 +160,8 @@ def format_top_expenses(results: list) -> dict[str, Any]:
     if not results:
         return {
             "summary": "No expenses found for the specified period.",
-            "data": []
+            "data": [],
+            "table": ""
         }
 
     data = []
@@ -147,9 +181,15 @@ def format_top_expenses(results: list) -> dict[str, Any]:
     if data:
         summary += f"Highest: {data[0]['description']} (${data[0]['amount']:.2f} on {data[0]['date']})"
 
+    table = encode_table(
+        ["date", "amount", "category", "description"],
+        ([item["date"], item["amount"], item["category"], item["description"]] for item in data)
+    )
+
     return {
         "summary": summary,
         "data": data,
+        "table": table,
         "total": total
     }
 
@@ -190,6 +230,7 @@ def format_spending_by_tag(results: list) -> dict[str, Any]:
         return {
             "summary": "No tagged transactions found for the specified period.",
             "data": [],
+            "table": "",
             "total": 0
         }
 
@@ -214,9 +255,15 @@ def format_spending_by_tag(results: list) -> dict[str, Any]:
         top_tag = data[0]
         summary += f"Most used tag: {top_tag['tag_name']} (${top_tag['amount']:.2f}, {top_tag['transaction_count']} transactions)"
 
+    table = encode_table(
+        ["tag", "amount", "pct", "count"],
+        ([item["tag_name"], item["amount"], round(item["percentage"], 1), item["transaction_count"]] for item in data)
+    )
+
     return {
         "summary": summary,
         "data": data,
+        "table": table,
         "total": total,
         "tag_count": len(data)
     }
@@ -5,6 +5,7 @@ from sqlalchemy import func, extract, and_, or_
 from datetime import datetime, timedelta, date
 from typing import Optional, Union
 
+from app.dates import month_date_range
 from app.database.models.transaction import Transaction
 from app.database.models.category import Category
 from app.database.models.budget import Budget
@@ -179,6 +180,7 @@ def budget_utilization_query(
     )
 
     budgets = budgets_query.all()
+    month_start, month_end = month_date_range(month, year)
 
     results = []
     for budget in budgets:
@@ -190,8 +192,8 @@ def budget_utilization_query(
                 Transaction.user_id == user_id,
                 Transaction.category_id == budget.category_id,
                 Transaction.type == TransactionType.EXPENSE,
-                extract('month', Transaction.date) == month,
-                extract('year', Transaction.date) == year
+                Transaction.date >= month_start,
+                Transaction.date < month_end
             )
         )
 
@@ -1,58 +1,48 @@
 """LangGraph workflow for the financial assistant"""
 
 from typing import Literal
-from langchain_anthropic import ChatAnthropic
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
-from sqlalchemy.orm import Session
 
 from app.assistant.state import AssistantState
-from app.assistant.tools.analytics import create_analytics_tools
-from app.assistant.tools.categories import create_category_tools
-from app.assistant.tools.tags import create_tag_tools
-from app.assistant.tools.budgets import create_budget_tools
-from app.assistant.tools.transactions import create_transaction_tools
-from app.assistant.tools.advice import create_advice_tools
-from app.config import settings
+from app.assistant.tools import assistant_tools
+from app.llm.prompt_cache import cacheable_tools
+from app.llm.models import create_chat_model
+from app.llm.policy import invoke_llm
+from app.llm.scheduler import Priority
+from app.llm.usage import llm_usage
 
 
-def create_assistant_graph(db: Session, user_id: int, account_id: int, user_context: dict = None):
+def create_assistant_graph():
     """
     Create and compile the financial assistant graph.
 
-    Args:
-        db: Database session for tool access
-        user_id: Current user ID
-        account_id: Current account ID
+    The graph and the tool schemas bound to the model are request-independent;
+    per-request db session, user and account reach the tools through the config
+    passed to invoke/astream_events (see app.assistant.tools.context).
 
     Returns:
         Compiled LangGraph workflow
     """
-
-    # Collect all tools
-    tools = []
-    tools.extend(create_analytics_tools(db, user_id, account_id))
-    tools.extend(create_category_tools(db, user_id))
-    tools.extend(create_tag_tools(db, user_id))
-    tools.extend(create_budget_tools(db, user_id))
-    tools.extend(create_transaction_tools(db, user_id, account_id))
-    if user_context:
-        tools.extend(create_advice_tools(db, user_id, user_context))
+    tools = assistant_tools
 
     # Initialize LLM with tools
-    llm = ChatAnthropic(
+    llm = create_chat_model(
+        "assistant",
         model="claude-sonnet-4-5-20250929",  # Using Sonnet 4.5 for better reasoning
         temperature=0,
         max_tokens=4096,
-        api_key=settings.ANTHROPIC_API_KEY
     )
-    llm_with_tools = llm.bind_tools(tools)
+    # Tool definitions are the first cached prefix of every request
+    llm_with_tools = llm.bind_tools(cacheable_tools(tools))
 
     # Define the agent node
-    def agent_node(state: AssistantState):
+    async def agent_node(state: AssistantState, config: RunnableConfig):
         """Agent reasoning node - decides which tools to call or responds"""
         messages = state["messages"]
-        response = llm_with_tools.invoke(messages)
+        response = await invoke_llm(llm_with_tools, messages, state["user_id"], Priority.INTERACTIVE, config)
+        llm_usage.record("assistant", response)
         return {"messages": [response]}
 
     # Define conditional edge logic
@@ -91,3 +81,7 @@ def create_assistant_graph(db: Session, user_id: int, account_id: int, user_cont
 
     # Compile the graph
     return workflow.compile()
+
+
+# Compiled once at import and shared by every chat turn
+assistant_graph = create_assistant_graph()
@@ -0,0 +1,243 @@
+"""Token-budgeted conversation history with rolling summaries of older turns
+
+Assistant answers are stored with the read-only tool calls behind them
+(Message.tool_calls_summary). While the user's data and the date are
+unchanged, those calls and results are replayed as tool messages in front of
+the answer, so a follow-up can build on them instead of calling the tools again.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.conversation_crud import ConversationCrud, MessageCrud
+from app.database.data_version import get_data_stamp
+from app.database.database import SessionLocal
+from app.database.models.conversation import Conversation
+from app.llm.tokens import estimate_tokens
+from app.llm.models import create_chat_model
+from app.llm.policy import invoke_llm
+from app.llm.scheduler import Priority
+from app.llm.usage import llm_usage
+
+logger = logging.getLogger(__name__)
+
+# Per-message cap on the text fed to the summarizer
+MAX_SUMMARY_INPUT_CHARS = 2000
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and their personal finance assistant.
+
+Existing summary:
+{summary}
+
+New messages to fold into the summary:
+{messages}
+
+Write the updated summary in at most 150 words. Keep facts that later questions may depend on: amounts, dates, categories, budgets, decisions and transactions created. Return ONLY the summary."""
+
+# Conversations with a summary refresh in flight, and the tasks themselves (kept referenced until done)
+_refreshing: set[int] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class HistoryWindow:
+    """History to send with the next request"""
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    summary: Optional[str] = None
+    # Set when unsummarized messages fell out of the window; the summary should be extended through this ID
+    summarize_through: Optional[int] = None
+
+
+def encode_tool_calls(tool_calls: list[dict[str, Any]], data_stamp: str) -> Optional[str]:
+    """
+    Tool calls of an answer as a Message.tool_calls_summary value.
+
+    Args:
+        tool_calls: {"id", "name", "args", "output"} of each read-only call the answer used
+        data_stamp: The user's data stamp when the calls ran (see get_data_stamp)
+
+    Returns:
+        JSON of the calls whose output is short enough to keep, with the data stamp and
+        date they are valid for; None if there are none
+    """
+    kept = [call for call in tool_calls if len(call["output"]) <= settings.HISTORY_TOOL_RESULT_MAX_CHARS]
+    if not kept:
+        return None
+    return json.dumps({"data_stamp": data_stamp, "date": date.today().isoformat(), "calls": kept}, default=str)
+
+
+def _current_tool_calls(tool_calls_summary: str, data_stamp: str) -> list[dict[str, Any]]:
+    """Stored tool calls, or none if they were made against other data or on another day"""
+    try:
+        summary = json.loads(tool_calls_summary)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(summary, dict):
+        return []
+    if summary.get("data_stamp") != data_stamp or summary.get("date") != date.today().isoformat():
+        return []
+    return summary.get("calls") or []
+
+
+def _tool_messages(tool_calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """An assistant message making the calls, followed by one tool message per result"""
+    return [
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{"id": call["id"], "name": call["name"], "args": call["args"]} for call in tool_calls],
+        },
+        *(
+            {"role": "tool", "content": call["output"], "tool_call_id": call["id"], "name": call["name"]}
+            for call in tool_calls
+        ),
+    ]
+
+
+def load_conversation_history(
+    db: Session,
+    conversation_id: Optional[int],
+    user_id: int,
+    token_budget: int = settings.HISTORY_TOKEN_BUDGET
+) -> HistoryWindow:
+    """
+    Load the newest messages that fit in the token budget, plus the rolling summary of older ones.
+    Returns messages in LangChain format, excluding system prompts. Budget left over
+    after the messages goes to their still-current tool calls, newest first.
+
+    Args:
+        db: Database session
+        conversation_id: Conversation ID (None for new conversation)
+        user_id: User ID for security check
+        token_budget: Maximum estimated tokens of raw messages to include
+
+    Returns:
+        HistoryWindow with the messages, summary and whether the summary is behind
+    """
+    if not conversation_id:
+        return HistoryWindow()
+
+    # Verify conversation belongs to user
+    conversation = ConversationCrud.get_by_id(db, conversation_id, user_id)
+    if not conversation:
+        logger.warning(f"Conversation {conversation_id} not found or doesn't belong to user {user_id}")
+        return HistoryWindow()
+
+    candidates = MessageCrud.get_latest_after(
+        db,
+        conversation_id,
+        after_message_id=conversation.summary_through_message_id,
+        limit=settings.HISTORY_MAX_MESSAGES,
+    )
+
+    # Walk back from the newest message until the budget is spent
+    window = []
+    used_tokens = 0
+    for msg in candidates:
+        if msg.role == "system":  # Skip system prompts as they're regenerated
+            continue
+        tokens = msg.token_estimate if msg.token_estimate is not None else estimate_tokens(msg.content)
+        if used_tokens + tokens > token_budget:
+            break
+        used_tokens += tokens
+        window.append(msg)
+    window.reverse()
+
+    # The model expects the history to open with a user turn
+    while window and window[0].role != "user":
+        window.pop(0)
+
+    # Anything older than the window (or beyond the scanned rows) belongs in the summary
+    summarize_through = None
+    dropped_any = len(window) < len(candidates) or len(candidates) == settings.HISTORY_MAX_MESSAGES
+    if dropped_any and window:
+        summarize_through = window[0].id - 1
+    elif dropped_any:
+        summarize_through = candidates[0].id
+
+    # Tool calls only use what the messages left of the budget
+    tool_calls: dict[int, list[dict[str, Any]]] = {}
+    data_stamp = get_data_stamp(user_id)
+    for msg in reversed(window):
+        if msg.role != "assistant" or not msg.tool_calls_summary:
+            continue
+        tokens = estimate_tokens(msg.tool_calls_summary)
+        if used_tokens + tokens > token_budget:
+            continue
+        calls = _current_tool_calls(msg.tool_calls_summary, data_stamp)
+        if calls:
+            tool_calls[msg.id] = calls
+            used_tokens += tokens
+
+    history = []
+    for msg in window:
+        if msg.id in tool_calls:
+            history.extend(_tool_messages(tool_calls[msg.id]))
+        history.append({"role": msg.role, "content": msg.content})
+    logger.info(
+        f"Loaded {len(window)} messages and {sum(len(calls) for calls in tool_calls.values())} tool calls "
+        f"(~{used_tokens} tokens) from conversation {conversation_id}"
+        f"{' with summary' if conversation.summary else ''}"
+    )
+    return HistoryWindow(messages=history, summary=conversation.summary, summarize_through=summarize_through)
+
+
+async def refresh_summary(conversation_id: int, through_message_id: int) -> None:
+    """
+    Fold messages up to through_message_id into the conversation's rolling summary.
+    Runs outside the request with its own database session.
+    """
+    db = SessionLocal()
+    try:
+        conversation = db.get(Conversation, conversation_id)
+        if not conversation:
+            return
+        previous_through = conversation.summary_through_message_id
+        if previous_through is not None and previous_through >= through_message_id:
+            return
+
+        messages = MessageCrud.get_range(db, conversation_id, previous_through, through_message_id)
+        transcript = "\n".join(
+            f"{msg.role}: {msg.content[:MAX_SUMMARY_INPUT_CHARS]}"
+            for msg in messages
+            if msg.role != "system"
+        )
+        if not transcript:
+            ConversationCrud.update_summary(db, conversation_id, conversation.summary or "", through_message_id)
+            return
+
+        llm = create_chat_model(
+            "history_summary",
+            model=settings.HISTORY_SUMMARY_MODEL,
+            temperature=0,
+            max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+        )
+        prompt = SUMMARY_PROMPT.format(summary=conversation.summary or "(none yet)", messages=transcript)
+        response = await invoke_llm(llm, prompt, conversation.user_id, Priority.BACKGROUND)
+        llm_usage.record("history_summary", response)
+
+        summary = response.content.strip() if isinstance(response.content, str) else str(response.content)
+        ConversationCrud.update_summary(db, conversation_id, summary, through_message_id)
+        logger.info(f"Refreshed summary of conversation {conversation_id} through message {through_message_id}")
+    except Exception as e:
+        logger.error(f"Failed to refresh summary of conversation {conversation_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+        _refreshing.discard(conversation_id)
+
+
+def schedule_summary_refresh(conversation_id: int, through_message_id: int) -> None:
+    """Refresh the conversation summary in the background, at most one refresh per conversation at a time"""
+    if conversation_id in _refreshing:
+        return
+    _refreshing.add(conversation_id)
+    task = asyncio.create_task(refresh_summary(conversation_id, through_message_id))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
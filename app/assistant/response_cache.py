@@ -0,0 +1,66 @@
+"""Cache of complete assistant answers to repeated first-turn questions
+
+A question asked at the start of a conversation is answered from the user's
+data alone, so the same question, on the same day, against the same data
+version gets the same answer. The tool events and the final text are kept
+and replayed without any LLM call, and the answer is persisted with the same
+tool calls so follow-up questions see them. Answers that used a tool with side
+effects (e.g. create_transactions) are never cached.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional
+
+from app.cache import TTLCache
+from app.config import settings
+from app.database.data_version import get_data_version
+
+_WORD_RE = re.compile(r"[^\W_]+")
+# Greetings and politeness at the start of a question ("hey", "thanks, ...", "please");
+# every other word can change what is being asked, so it stays in the key
+_LEADING_POLITENESS_RE = re.compile(r"^(?:(?:hey|hi|hello|please|pls|thanks|thank you)(?: |$))+")
+
+
+@dataclass
+class CachedResponse:
+    """Replayable tool events and final answer of one assistant turn"""
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    answer: str = ""
+    tool_calls_summary: Optional[str] = None  # Stored with the replayed answer, see app.assistant.history
+
+
+_responses = TTLCache(
+    max_size=settings.RESPONSE_CACHE_SIZE,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+def normalize_question(message: str) -> str:
+    """Lowercase words without punctuation or a leading greeting, so trivially different phrasings share a key"""
+    return _LEADING_POLITENESS_RE.sub("", " ".join(_WORD_RE.findall(message.lower())))
+
+
+def response_cache_key(message: str, user_id: int, account_id: int) -> Optional[Hashable]:
+    """Cache key for a first-turn question, or None when caching is off or nothing is left after normalizing"""
+    question = normalize_question(message)
+    if not settings.RESPONSE_CACHE_ENABLED or not question:
+        return None
+    return (user_id, account_id, question, get_data_version(user_id), date.today())
+
+
+def get_cached_response(key: Hashable) -> Optional[CachedResponse]:
+    return _responses.get(key)
+
+
+def cache_response(key: Hashable, response: CachedResponse) -> None:
+    _responses.set(key, response)
+
+
+def response_cache_stats() -> dict[str, Any]:
+    return _responses.stats()
+
+
+def clear_response_cache() -> None:
+    _responses.clear()
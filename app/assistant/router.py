@@ -1,12 +1,11 @@
 """FastAPI router for the financial assistant"""
 
 import asyncio
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Header, Request, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import json
 import logging
-from typing import List
+from typing import AsyncIterator, List, Optional
 
 from app.auth.dependencies import get_current_active_user
 from app.database.database import get_db
@@ -18,7 +17,15 @@ from app.schemas.conversation import (
     ConversationList
 )
 from app.assistant.schemas.chat import ChatRequest, ChatResponse
-from app.assistant.service import chat, chat_stream
+from app.assistant.service import chat
+from app.assistant.sse import format_sse, until_disconnected
+from app.assistant.stream_replay import (
+    ResumeUnavailable,
+    format_event_id,
+    open_turn,
+    parse_event_id,
+    start_turn,
+)
 from app.crud.conversation_crud import ConversationCrud, MessageCrud
 
 logger = logging.getLogger(__name__)
@@ -37,7 +44,7 @@ async def assistant_chat(
     Non-streaming chat endpoint.
     Send a message and get a complete response.
     """
-    response_text = chat(
+    response_text = await chat(
         message=request.message,
         user_id=current_user.id,
         account_id=request.account_id,
@@ -50,99 +57,97 @@ async def assistant_chat(
     )
 
 
+def _follow_turn_response(
+    events: AsyncIterator[tuple[int, dict]],
+    turn_id: str,
+    http_request: Request,
+    user_id: int,
+) -> StreamingResponse:
+    """SSE response following a chat turn's events until it is done or the client disconnects"""
+
+    async def event_generator():
+        """Generate SSE events for the turn with client disconnection detection"""
+        try:
+            # Stops following on disconnect; the turn itself keeps running
+            async for event_id, event in until_disconnected(events, http_request):
+                yield format_sse(event, format_event_id(turn_id, event_id))
+        except ResumeUnavailable as e:
+            logger.warning(f"Cannot resume turn {turn_id}: {e}")
+            yield format_sse({
+                "type": "error",
+                "message": "The rest of this answer is no longer available. Reload the conversation to see it.",
+                "recoverable": False,
+            })
+        except asyncio.CancelledError:
+            # The turn keeps running; the client can resume it with Last-Event-ID
+            logger.info("Stream cancelled", extra={"user_id": user_id, "turn_id": turn_id})
+            raise
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        }
+    )
+
+
 @router.post("/chat-stream")
 async def assistant_chat_stream(
     chat_request: ChatRequest,
     http_request: Request,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Streaming chat endpoint using Server-Sent Events.
     Streams assistant responses, tool executions, and other events in real-time.
 
+    The turn runs to completion even if the connection drops; every event has an
+    SSE id ("<turn_id>:<n>") to resume from with GET /chat-stream/resume.
+
     Events:
     - thinking: Assistant is processing
     - tool_start: Tool execution started
     - tool_end: Tool execution completed
     - message_chunk: Streaming text from assistant
+    - title_updated: Generated title of a new conversation
     - done: Conversation complete
     - error: Error occurred
     """
+    turn = start_turn(
+        message=chat_request.message,
+        user_id=current_user.id,
+        account_id=chat_request.account_id,
+        conversation_id=chat_request.conversation_id,
+    )
+    return _follow_turn_response(turn.follow(), turn.turn_id, http_request, current_user.id)
 
-    async def event_generator():
-        """Generate SSE events for chat stream with client disconnection detection"""
-        stream_task = None
-        try:
-            # Create the chat stream generator
-            stream_gen = chat_stream(
-                message=chat_request.message,
-                user_id=current_user.id,
-                account_id=chat_request.account_id,
-                db=db,
-                conversation_id=chat_request.conversation_id
-            )
-
-            # Stream events while monitoring for client disconnection
-            async for event in stream_gen:
-                # Check if client is still connected
-                if await http_request.is_disconnected():
-                    logger.info(
-                        "Client disconnected, stopping stream",
-                        extra={
-                            "user_id": current_user.id,
-                            "account_id": chat_request.account_id
-                        }
-                    )
-                    # Close the stream generator
-                    await stream_gen.aclose()
-                    break
-
-                # Stream each event as SSE
-                event_data = json.dumps(event)
-                yield f"data: {event_data}\n\n"
-
-            # Send completion event (only if not disconnected)
-            if not await http_request.is_disconnected():
-                yield f"data: {json.dumps({'type': 'done', 'conversation_id': chat_request.conversation_id or 'default'})}\n\n"
-
-        except asyncio.CancelledError:
-            logger.info(
-                "Stream cancelled",
-                extra={
-                    "user_id": current_user.id,
-                    "account_id": chat_request.account_id
-                }
-            )
-            # Re-raise to ensure proper cleanup
-            raise
-        except Exception as e:
-            logger.error(
-                "Stream error in router",
-                extra={
-                    "user_id": current_user.id,
-                    "account_id": chat_request.account_id,
-                    "error": str(e)
-                },
-                exc_info=True
-            )
-            # Send error event
-            error_data = json.dumps({
-                "type": "error",
-                "message": "An error occurred while streaming the response.",
-                "recoverable": False
-            })
-            yield f"data: {error_data}\n\n"
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        }
-    )
+@router.get("/chat-stream/resume")
+async def resume_assistant_chat_stream(
+    http_request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Resume a chat stream after a dropped connection.
+    Replays the turn's events after the Last-Event-ID header, then follows it live.
+    """
+    parsed = parse_event_id(last_event_id)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail="Last-Event-ID header must be '<turn_id>:<n>'")
+    turn_id, after = parsed
+
+    try:
+        events = await open_turn(turn_id, current_user.id, after)
+    except ResumeUnavailable:
+        raise HTTPException(status_code=410, detail="Stream events are no longer available")
+    if events is None:
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
+
+    return _follow_turn_response(events, turn_id, http_request, current_user.id)
 
 
 # Conversation management endpoints
@@ -22,6 +22,7 @@ class ToolEndEvent(BaseModel):
     tool_name: str
     tool_output: Any
     success: bool
+    cached: bool = False  # Result served from the per-conversation tool memo
     error: Optional[str] = None
 
 
@@ -35,12 +36,44 @@ class ConfirmationNeededEvent(BaseModel):
     description: str
 
 
+class TransactionPlanningEvent(BaseModel):
+    """Nested transaction agent planned N transaction previews"""
+    type: Literal["planning"] = "planning"
+    count: int
+
+
+class TransactionStartEvent(BaseModel):
+    """Nested transaction agent started building one preview"""
+    type: Literal["transaction_start"] = "transaction_start"
+    description: str
+    amount: float
+
+
+class TransactionEvent(BaseModel):
+    """Nested transaction agent finished one preview"""
+    type: Literal["transaction"] = "transaction"
+    data: dict[str, Any]
+
+
+class QueuedEvent(BaseModel):
+    """Request is waiting for an LLM slot"""
+    type: Literal["queued"] = "queued"
+    position: int
+
+
 class ThinkingEvent(BaseModel):
     """Assistant is processing/thinking"""
     type: Literal["thinking"] = "thinking"
     message: Optional[str] = None
 
 
+class TitleUpdatedEvent(BaseModel):
+    """Generated conversation title replaced the initial heuristic title"""
+    type: Literal["title_updated"] = "title_updated"
+    conversation_id: int
+    title: str
+
+
 class DoneEvent(BaseModel):
     """Chat stream completed"""
     type: Literal["done"] = "done"
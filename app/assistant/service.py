@@ -7,19 +7,40 @@ from typing import AsyncGenerator, Dict, Any, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
-from app.assistant.graph import create_assistant_graph
+from app.assistant.graph import assistant_graph
+from app.assistant.history import encode_tool_calls, load_conversation_history, schedule_summary_refresh
 from app.assistant.state import AssistantState
 from app.assistant.schemas.chat import UserContext
-from app.assistant.title_generator import generate_conversation_title
+from app.assistant.title_generator import heuristic_title, start_title_generation
+from app.assistant.response_cache import CachedResponse, cache_response, get_cached_response, response_cache_key
+from app.assistant.tools import read_only_tool_names
+from app.assistant.tools.context import ToolContext, build_tool_config
+from app.assistant.tools.transactions import TRANSACTION_AGENT_EVENT
+from app.agent.service import NESTED_AGENT_TAG
 from app.crud.category_crud import CategoryCrud
 from app.crud.tag_crud import TagCrud
 from app.crud.budget_crud import BudgetCrud
 from app.crud.transaction_crud import TransactionCrud
 from app.crud.account_crud import AccountCrud
 from app.crud.conversation_crud import ConversationCrud, MessageCrud
+from app.cache import TTLCache
+from app.config import settings
+from app.database.data_version import get_data_stamp, get_data_version
+from app.logging_config import stream_event_logger, stream_traces
+from app.llm.encoding import encode_id_map, encode_table
+from app.llm.prompt_cache import build_system_message as build_cached_system_message, message_text
+from app.llm.policy import LLMDeadlineExceeded
+from app.llm.scheduler import LLM_QUEUED_EVENT, LLMQueueTimeout
+from app.llm.shortlist import Shortlist, shortlist_note, shortlist_taxonomy
 
 logger = logging.getLogger(__name__)
 
+# Categories, tags and budgets keyed by (user_id, data_version)
+_user_taxonomy_cache = TTLCache(
+    max_size=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.USER_CONTEXT_CACHE_TTL_SECONDS,
+)
+
 
 def serialize_tool_input(tool_input: Any) -> Any:
     """
@@ -80,13 +101,7 @@ def extract_content_from_chunk(chunk_or_output) -> str:
     return str(content)
 
 
-def get_system_prompt() -> str:
-    """
-    Generate system prompt with current date.
-    System prompt is NOT persisted as it contains dynamic data.
-    """
-    return f"""You are a helpful financial assistant. You help users understand their finances, track their expenses and create transactions.
-Current date is {datetime.now().strftime("%d-%m-%Y")}
+SYSTEM_PROMPT = """You are a helpful financial assistant. You help users understand their finances, track their expenses and create transactions.
 You have access to tools to:
 - Analyze spending patterns and trends
 - View budgets and budget utilization
@@ -100,55 +115,106 @@ When answering questions:
 3. Provide clear, actionable insights
 4. Format numbers as currency when appropriate
 5. Keep it short and concise.
+6. Tool results already in the conversation are current; build on them instead of calling the same tool again.
 Remember: Always use tools to get real data rather than making assumptions. If a user asks about their spending, use the analytics tools to get actual numbers.
 """
 
 
-def load_conversation_history(
-    db: Session,
-    conversation_id: Optional[int],
-    user_id: int,
-    limit: int = 10  # Last 10 messages = 5 exchanges
-) -> list:
+def format_user_taxonomy(
+    user_context: UserContext,
+    categories: Optional[Shortlist] = None,
+    tags: Optional[Shortlist] = None,
+) -> str:
     """
-    Load conversation history from database.
-    Returns messages in LangChain format, excluding system prompts.
-
-    Args:
-        db: Database session
-        conversation_id: Conversation ID (None for new conversation)
-        user_id: User ID for security check
-        limit: Maximum number of messages to load (default 10 = 5 exchanges)
+    Render the user's categories, tags and budgets compactly and in a stable order so the block stays cacheable.
+    Shortlists replace the full category and tag lists when given.
+    """
+    categories = categories or Shortlist(items=user_context.categories, total=len(user_context.categories))
+    tags = tags or Shortlist(items=user_context.tags, total=len(user_context.tags))
+    budgets = sorted(user_context.budgets, key=lambda b: b["id"])
+    return "\n".join([
+        f"User's categories (id=name{shortlist_note(categories, 'list_categories')}): {encode_id_map(categories.items)}",
+        f"User's tags (id=name{shortlist_note(tags, 'list_tags')}): {encode_id_map(tags.items)}",
+        "User's monthly budgets:",
+        encode_table(["category_id", "amount"], ([b["category_id"], b["amount"]] for b in budgets)) or "none",
+    ])
+
+
+def build_system_message(
+    user_context: UserContext,
+    history_summary: Optional[str] = None,
+    message: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Generate the system message. Instructions and the user's taxonomy are cached
+    prompt blocks; the current date and the summary of older turns follow them uncached.
+    System prompt is NOT persisted as it contains dynamic data.
 
-    Returns:
-        List of messages in LangChain format
+    Given the user's message and ID, large taxonomies are cut down to the categories and tags
+    relevant to the message (plus budgeted categories); that block then varies per message
+    and moves to the uncached part.
     """
-    if not conversation_id:
-        return []
+    categories = tags = None
+    if message and user_id is not None:
+        data_version = get_data_version(user_id)
+        categories = shortlist_taxonomy(
+            user_context.categories,
+            message,
+            cache_key=(user_id, data_version, "categories"),
+            always=[budget["category_id"] for budget in user_context.budgets],
+        )
+        tags = shortlist_taxonomy(
+            user_context.tags,
+            message,
+            cache_key=(user_id, data_version, "tags"),
+            keep_all_without_match=False,
+        )
+    taxonomy = format_user_taxonomy(user_context, categories, tags)
 
-    # Verify conversation belongs to user
-    conversation = ConversationCrud.get_by_id(db, conversation_id, user_id)
-    if not conversation:
-        logger.warning(f"Conversation {conversation_id} not found or doesn't belong to user {user_id}")
-        return []
+    volatile = f"Current date is {datetime.now().strftime('%d-%m-%Y')}"
+    if history_summary:
+        volatile += f"\n\nSummary of earlier messages in this conversation:\n{history_summary}"
 
-    # Load last N messages (excluding system prompts as they're regenerated)
-    messages = MessageCrud.get_conversation_messages(db, conversation_id, limit=limit)
+    if (categories and categories.truncated) or (tags and tags.truncated):
+        return build_cached_system_message([SYSTEM_PROMPT], volatile=f"{taxonomy}\n\n{volatile}")
+    return build_cached_system_message([SYSTEM_PROMPT, taxonomy], volatile=volatile)
 
-    # Convert to LangChain format
-    history = []
-    for msg in messages:
-        if msg.role != "system":  # Skip system prompts
-            history.append({
-                "role": msg.role,
-                "content": msg.content
-            })
 
-    logger.info(f"Loaded {len(history)} messages from conversation {conversation_id}")
-    return history
+def _load_user_taxonomy(db: Session, user_id: int) -> dict[str, list[dict[str, Any]]]:
+    """
+    Load the user's categories, tags and budgets.
+    Cached per user and data version, so any committed write to them is picked up on the next turn.
+    """
+    cache_key = (user_id, get_data_version(user_id))
+    taxonomy = _user_taxonomy_cache.get(cache_key)
+    if taxonomy is not None:
+        return taxonomy
+
+    categories = CategoryCrud.get_all_categories(db, user_id)
+    tags = TagCrud.get_all_tags(db, user_id)
+    budgets = BudgetCrud.get_all_budgets(db, user_id)
+
+    taxonomy = {
+        "categories": [
+            {"id": cat.id, "name": cat.name, "icon": cat.icon, "color": cat.color}
+            for cat in categories
+        ],
+        "tags": [{"id": tag.id, "name": tag.name, "color": tag.color} for tag in tags],
+        "budgets": [
+            {
+                "id": budget.id,
+                "category_id": budget.category_id,
+                "amount": float(budget.amount),
+                "notes": budget.notes,
+            }
+            for budget in budgets
+        ],
+    }
+    _user_taxonomy_cache.set(cache_key, taxonomy)
+    return taxonomy
 
 
-# partial user context tools for ai, instead of json use yaml/csv/plain text to save tokens while providing same data
 def load_user_context(db: Session, user_id: int, account_id: int) -> UserContext:
     """
     Load all user context needed for the assistant.
@@ -161,33 +227,11 @@ def load_user_context(db: Session, user_id: int, account_id: int) -> UserContext
     Returns:
         UserContext with categories, tags, budgets, etc.
     """
-    # Get categories
-    categories = CategoryCrud.get_all_categories(db, user_id)
-    categories_data = [
-        {"id": cat.id, "name": cat.name, "icon": cat.icon, "color": cat.color}
-        for cat in categories
-    ]
-
-    # Get tags
-    tags = TagCrud.get_all_tags(db, user_id)
-    tags_data = [{"id": tag.id, "name": tag.name, "color": tag.color} for tag in tags]
-
-    # Get budgets
-    budgets = BudgetCrud.get_all_budgets(db, user_id)
-    budgets_data = [
-        {
-            "id": budget.id,
-            "category_id": budget.category_id,
-            "amount": float(budget.amount),
-            "notes": budget.notes,
-        }
-        for budget in budgets
-    ]
+    taxonomy = _load_user_taxonomy(db, user_id)
 
-    # Get recent transactions (last 30 days)
-    transactions = TransactionCrud.get_all(db, user_id)
-    # Filter last 30 days
-    thirty_days_ago = datetime.now() - timedelta(days=30)
+    # Get recent transactions (50 most recent from the last 30 days)
+    thirty_days_ago = datetime.now().date() - timedelta(days=30)
+    transactions = TransactionCrud.get_recent(db, user_id, since=thirty_days_ago, limit=50)
     recent_transactions = [
         {
             "id": t.id,
@@ -198,22 +242,41 @@ def load_user_context(db: Session, user_id: int, account_id: int) -> UserContext
             "date": t.date.isoformat(),
         }
         for t in transactions
-        if t.date >= thirty_days_ago.date()
-    ][:50]  # Limit to 50 most recent
+    ]
 
     # Get account balance
     account = AccountCrud.get_by_id_and_user(db, account_id, user_id)
-    account_balance = float(account.current_balance) if account else 0.0
+    account_balance = AccountCrud.get_current_balance(db, account) if account else 0.0
 
     return UserContext(
-        categories=categories_data,
-        tags=tags_data,
-        budgets=budgets_data,
+        categories=taxonomy["categories"],
+        tags=taxonomy["tags"],
+        budgets=taxonomy["budgets"],
         recent_transactions=recent_transactions,
         account_balance=account_balance,
     )
 
 
+def _title_updated_event(title_task: asyncio.Task, conversation_id: int) -> Optional[Dict[str, Any]]:
+    """title_updated event for a finished title task, or None if it produced no title"""
+    if title_task.cancelled() or title_task.exception() is not None or not title_task.result():
+        return None
+    return {"type": "title_updated", "conversation_id": conversation_id, "title": title_task.result()}
+
+
+async def _final_title_event(title_task: Optional[asyncio.Task], conversation_id: int) -> Optional[Dict[str, Any]]:
+    """title_updated event at the end of the stream, waiting up to TITLE_WAIT_SECONDS for a title still being generated"""
+    if title_task is None:
+        return None
+    if not title_task.done():
+        # asyncio.wait leaves the task running on timeout; it still stores the title
+        await asyncio.wait({title_task}, timeout=settings.TITLE_WAIT_SECONDS)
+        if not title_task.done():
+            logger.info(f"Title of conversation {conversation_id} not ready when the stream ended")
+            return None
+    return _title_updated_event(title_task, conversation_id)
+
+
 async def chat_stream(
     message: str,
     user_id: int,
@@ -257,20 +320,22 @@ async def chat_stream(
     # Create or load conversation
     is_new_conversation = conversation_id is None
     if is_new_conversation:
-        conversation = ConversationCrud.create(db, user_id, title="New Conversation")
+        conversation = ConversationCrud.create(db, user_id, title=heuristic_title(message))
         conversation_id = conversation.id
         logger.info(f"Created new conversation {conversation_id}")
     else:
         conversation = ConversationCrud.get_by_id(db, conversation_id, user_id)
         if not conversation:
             # Conversation not found, create new one
-            conversation = ConversationCrud.create(db, user_id, title="New Conversation")
+            conversation = ConversationCrud.create(db, user_id, title=heuristic_title(message))
             conversation_id = conversation.id
             is_new_conversation = True
             logger.warning(f"Conversation not found, created new one: {conversation_id}")
 
-    # Load conversation history (last 10 messages = 5 exchanges)
-    conversation_history = load_conversation_history(db, conversation_id, user_id, limit=10)
+    # Load conversation history (newest messages within the token budget + summary of older ones)
+    history = load_conversation_history(db, conversation_id, user_id)
+    if history.summarize_through is not None:
+        schedule_summary_refresh(conversation_id, history.summarize_through)
 
     # Load user context
     user_context = load_user_context(db, user_id, account_id)
@@ -289,13 +354,22 @@ async def chat_stream(
     MessageCrud.create(db, conversation_id, "user", message)
     logger.info(f"Persisted user message to conversation {conversation_id}")
 
-    # Create the assistant graph
-    graph = create_assistant_graph(db, user_id, account_id, user_context.model_dump())
+    # New conversations start with a heuristic title; the LLM title is generated alongside
+    # the response and announced with a title_updated event, at the latest before the stream ends
+    title_task = start_title_generation(conversation_id, user_id, message) if is_new_conversation else None
+
+    # Request context for the shared, precompiled graph's tools
+    config = build_tool_config(ToolContext(
+        user_id=user_id,
+        account_id=account_id,
+        user_context=user_context.model_dump(),
+        conversation_id=conversation_id,
+    ))
 
     # Build initial state with conversation history
     messages = [
-        {"role": "system", "content": get_system_prompt()},
-        *conversation_history,  # Include conversation history
+        build_system_message(user_context, history.summary, message, user_id),
+        *history.messages,  # Include conversation history
         {"role": "user", "content": message},
     ]
 
@@ -307,60 +381,111 @@ async def chat_stream(
         "pending_confirmations": [],
     }
 
-    # Console log: Initial request to LLM
-    print("\n" + "=" * 80)
-    print("🚀 INITIAL REQUEST TO LLM")
-    print("=" * 80)
-    print(f"Messages being sent:")
-    for msg in initial_state["messages"]:
-        print(f"  Role: {msg['role']}")
-        print(
-            f"  Content: {msg['content'][:200]}..."
-            if len(msg["content"]) > 200
-            else f"  Content: {msg['content']}"
+    if stream_event_logger.isEnabledFor(logging.DEBUG):
+        stream_event_logger.debug(
+            "Initial request to LLM",
+            extra={
+                "event_type": "request",
+                "conversation_id": conversation_id,
+                "message_count": len(messages),
+                "prompt_chars": sum(len(message_text(msg)) for msg in messages),
+            },
         )
-        print()
-    print("=" * 80 + "\n")
+    stream_traces.record(user_id, conversation_id, {"event": "request", "messages": messages})
 
     # Yield thinking event
     yield {"type": "thinking"}
 
+    # A first-turn question already answered today against the same data is replayed without the LLM
+    cache_key = None
+    if not history.messages and not history.summary:
+        cache_key = response_cache_key(message, user_id, account_id)
+    cached_response = get_cached_response(cache_key) if cache_key is not None else None
+    if cached_response is not None:
+        logger.info(f"Answered from response cache in conversation {conversation_id}")
+        for event in cached_response.events:
+            yield event
+        yield {"type": "message_chunk", "content": cached_response.answer, "is_final": False}
+        yield {"type": "message_chunk", "content": "", "is_final": True}
+        MessageCrud.create(
+            db,
+            conversation_id,
+            "assistant",
+            cached_response.answer,
+            tool_calls_summary=cached_response.tool_calls_summary,
+        )
+        title_event = await _final_title_event(title_task, conversation_id)
+        if title_event:
+            yield title_event
+        yield {"type": "conversation_id", "conversation_id": conversation_id}
+        return
+
+    # Tool events of this turn, kept for the response cache while only read-only tools run
+    replay_events = [] if cache_key is not None else None
+
     # Buffer to accumulate assistant response for persistence
     assistant_response_buffer = []
 
+    # Read-only tool calls of this turn, persisted with the answer for follow-up questions;
+    # valid while the data stamp taken before they ran is current
+    data_stamp = get_data_stamp(user_id)
+    started_tool_calls: dict[str, dict[str, Any]] = {}
+    tool_calls: list[dict[str, Any]] = []
+
     graph_iterator = None
     try:
         # Stream events from the graph
-        graph_iterator = graph.astream_events(initial_state, version="v2")
+        graph_iterator = assistant_graph.astream_events(initial_state, config=config, version="v2")
 
         async for event in graph_iterator:
             event_type = event["event"]
 
-            # Console log: Raw event received
-            print(f"\n📥 EVENT RECEIVED: {event_type}")
-            print(f"   Raw event keys: {list(event.keys())}")
-            print(f"   Event data: {event.get('data', {})}")
-            print()
+            # The nested transaction agent's own model/tool events are internal to create_transactions;
+            # its progress reaches the client through the forwarded custom events below
+            if NESTED_AGENT_TAG in event.get("tags", ()):
+                continue
+
+            if title_task is not None and title_task.done():
+                title_event = _title_updated_event(title_task, conversation_id)
+                title_task = None
+                if title_event:
+                    yield title_event
+
+            # Full raw events only for users switched into trace mode
+            stream_traces.record(user_id, conversation_id, event)
+            if stream_event_logger.isEnabledFor(logging.DEBUG):
+                stream_event_logger.debug(
+                    "Stream event",
+                    extra={"event_type": event_type, "run_name": event.get("name"), "conversation_id": conversation_id},
+                )
+
+            # Progress of the nested transaction agent (planning, transaction_start, transaction)
+            if event_type == "on_custom_event":
+                if event.get("name") == TRANSACTION_AGENT_EVENT:
+                    replay_events = None
+                    yield event["data"]
+                # Waiting for an LLM slot
+                elif event.get("name") == LLM_QUEUED_EVENT:
+                    yield {"type": "queued", "position": event["data"]["position"]}
 
             # Tool execution started
-            if event_type == "on_tool_start":
+            elif event_type == "on_tool_start":
                 tool_name = event.get("name", "")
                 tool_input = event.get("data", {}).get("input", {})
 
-                # Console log: Tool call
-                print("\n" + "🔧 " * 40)
-                print(f"TOOL CALL STARTED: {tool_name}")
-                print(f"Tool input: {json.dumps(tool_input, indent=2, default=str)}")
-                print("🔧 " * 40 + "\n")
-
                 # Ensure tool_input is JSON serializable
                 serializable_input = serialize_tool_input(tool_input)
 
-                yield {
+                tool_start_event = {
                     "type": "tool_start",
                     "tool_name": tool_name,
                     "tool_input": serializable_input,
                 }
+                if replay_events is not None:
+                    replay_events = replay_events + [tool_start_event] if tool_name in read_only_tool_names else None
+                if tool_name in read_only_tool_names:
+                    started_tool_calls[event.get("run_id")] = {"name": tool_name, "args": serializable_input}
+                yield tool_start_event
 
                 logger.info(
                     "Tool execution started",
@@ -376,18 +501,16 @@ async def chat_stream(
                 tool_name = event.get("name", "")
                 output = event.get("data", {}).get("output", "")
 
+                # Memoized tools report cache hits in their artifact
+                artifact = getattr(output, "artifact", None)
+                cached = isinstance(artifact, dict) and artifact.get("cached", False)
+
                 # Convert output to string to ensure JSON serialization
                 if hasattr(output, "content"):
                     output_str = output.content
                 else:
                     output_str = str(output) if output else ""
 
-                # Console log: Tool response
-                print("\n" + "✅ " * 40)
-                print(f"TOOL CALL COMPLETED: {tool_name}")
-                print(f"Tool output (first 500 chars): {output_str[:500]}...")
-                print("✅ " * 40 + "\n")
-
                 # Check if this is a special event response (structured JSON with marker)
                 special_event_handled = False
                 try:
@@ -419,12 +542,20 @@ async def chat_stream(
                 except Exception as e:
                     logger.error(f"Error handling special event: {e}", exc_info=True)
 
-                yield {
+                tool_end_event = {
                     "type": "tool_end",
                     "tool_name": tool_name,
                     "tool_output": output_str,
                     "success": True,
+                    "cached": cached,
                 }
+                if replay_events is not None:
+                    replay_events.append({**tool_end_event, "cached": True})
+                started_tool_call = started_tool_calls.pop(event.get("run_id"), None)
+                tool_call_id = getattr(output, "tool_call_id", None)
+                if started_tool_call is not None and tool_call_id:
+                    tool_calls.append({"id": tool_call_id, **started_tool_call, "output": output_str})
+                yield tool_end_event
 
                 logger.info(
                     "Tool execution completed",
@@ -433,6 +564,7 @@ async def chat_stream(
                         "user_id": user_id,
                         "account_id": account_id,
                         "output_length": len(output_str),
+                        "cached": cached,
                         "special_event": special_event_handled,
                     },
                 )
@@ -440,20 +572,8 @@ async def chat_stream(
             # LLM chunk (streaming response)
             elif event_type == "on_chat_model_stream":
                 chunk = event.get("data", {}).get("chunk", {})
-
-                # Console log: Stream chunk details
-                print(f"💬 STREAM CHUNK:")
-                print(f"   Chunk type: {type(chunk)}")
-                print(
-                    f"   Chunk attributes: {dir(chunk) if hasattr(chunk, '__dir__') else 'N/A'}"
-                )
-                print(f"   Chunk content: {chunk}")
-
                 content_str = extract_content_from_chunk(chunk)
 
-                print(f"   Extracted content: {repr(content_str)}")
-                print()
-
                 # Only yield if there's actual content
                 if content_str:
                     # Buffer content for persistence
@@ -467,11 +587,6 @@ async def chat_stream(
 
             # LLM response complete
             elif event_type == "on_chat_model_end":
-                # Console log: LLM response finished
-                print("\n" + "🏁 " * 40)
-                print("LLM RESPONSE COMPLETED")
-                print("🏁 " * 40 + "\n")
-
                 # Send final marker to signal completion
                 # Don't send content here as it was already streamed via on_chat_model_stream
                 yield {"type": "message_chunk", "content": "", "is_final": True}
@@ -479,17 +594,25 @@ async def chat_stream(
         # Persist assistant response to database
         if assistant_response_buffer:
             full_response = "".join(assistant_response_buffer)
-            MessageCrud.create(db, conversation_id, "assistant", full_response)
+            tool_calls_summary = encode_tool_calls(tool_calls, data_stamp)
+            MessageCrud.create(
+                db,
+                conversation_id,
+                "assistant",
+                full_response,
+                tool_calls_summary=tool_calls_summary,
+            )
             logger.info(f"Persisted assistant response to conversation {conversation_id}")
+            if replay_events is not None:
+                cache_response(
+                    cache_key,
+                    CachedResponse(events=replay_events, answer=full_response, tool_calls_summary=tool_calls_summary),
+                )
 
-        # Generate and update conversation title if this is a new conversation
-        if is_new_conversation:
-            try:
-                title = generate_conversation_title(message)
-                ConversationCrud.update_title(db, conversation_id, user_id, title)
-                logger.info(f"Generated title for conversation {conversation_id}: {title}")
-            except Exception as e:
-                logger.error(f"Failed to generate title: {e}", exc_info=True)
+        # A title not announced during the stream is waited for briefly so the sidebar can show it
+        title_event = await _final_title_event(title_task, conversation_id)
+        if title_event:
+            yield title_event
 
         # Yield conversation_id for frontend to track
         yield {"type": "conversation_id", "conversation_id": conversation_id}
@@ -514,7 +637,11 @@ async def chat_stream(
         )
         # Provide user-friendly error messages
         error_message = "An error occurred while processing your request."
-        if "rate" in str(e).lower() or "quota" in str(e).lower():
+        if isinstance(e, LLMQueueTimeout):
+            error_message = "The assistant is very busy right now. Please try again in a moment."
+        elif isinstance(e, LLMDeadlineExceeded):
+            error_message = "The assistant took too long to respond. Please try again."
+        elif "rate" in str(e).lower() or "quota" in str(e).lower():
             error_message = "Service temporarily unavailable due to rate limits. Please try again in a moment."
         elif "timeout" in str(e).lower():
             error_message = "Request timed out. Please try again."
@@ -546,7 +673,7 @@ async def chat_stream(
         )
 
 
-def chat(message: str, user_id: int, account_id: int, db: Session) -> str:
+async def chat(message: str, user_id: int, account_id: int, db: Session) -> str:
     """
     Non-streaming chat (for testing or simple use cases).
 
@@ -562,13 +689,16 @@ def chat(message: str, user_id: int, account_id: int, db: Session) -> str:
     # Load user context
     user_context = load_user_context(db, user_id, account_id)
 
-    # Create the assistant graph
-    graph = create_assistant_graph(db, user_id, account_id, user_context.model_dump())
+    config = build_tool_config(ToolContext(
+        user_id=user_id,
+        account_id=account_id,
+        user_context=user_context.model_dump(),
+    ))
 
     # Build initial state
     initial_state: AssistantState = {
         "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
+            build_system_message(user_context, message=message, user_id=user_id),
             {"role": "user", "content": message},
         ],
         "account_id": account_id,
@@ -578,7 +708,7 @@ def chat(message: str, user_id: int, account_id: int, db: Session) -> str:
     }
 
     # Run the graph
-    final_state = graph.invoke(initial_state)
+    final_state = await assistant_graph.ainvoke(initial_state, config=config)
 
     # Extract the last assistant message
     for message in reversed(final_state["messages"]):
@@ -0,0 +1,144 @@
+"""Server-Sent Events framing for the chat stream
+
+Text arrives from the model a few characters at a time. Sending each piece as
+its own SSE frame costs a json.dumps, a write and a client-side parse per
+token, so consecutive message_chunk events are merged over a short window
+(SSE_COALESCE_WINDOW_SECONDS, or SSE_COALESCE_MAX_CHARS of text) before they
+are framed. Other events flush the pending text and pass through unchanged.
+Client disconnects are polled every SSE_DISCONNECT_CHECK_SECONDS by a watcher
+task instead of before every event.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional, TypeVar
+
+from fastapi import Request
+
+from app.config import settings
+
+# Marks the end of the source events in the coalescer's queue
+_END = object()
+
+T = TypeVar("T")
+
+
+def format_sse(event: dict[str, Any], event_id: Optional[str] = None) -> str:
+    """One SSE frame, with an id line when the event can be resumed from"""
+    frame = f"data: {json.dumps(event)}\n\n"
+    return f"id: {event_id}\n{frame}" if event_id else frame
+
+
+async def watch_disconnect(request: Request, interval_seconds: float = settings.SSE_DISCONNECT_CHECK_SECONDS) -> None:
+    """Return once the client has disconnected, checking every interval"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval_seconds)
+
+
+async def until_disconnected(events: AsyncIterator[T], request: Request) -> AsyncIterator[T]:
+    """Pass events through until the source ends or the client disconnects (the source is then cancelled)"""
+    watcher = asyncio.create_task(watch_disconnect(request))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(anext(events))
+            await asyncio.wait({next_event, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                await asyncio.gather(next_event, return_exceptions=True)
+                return
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        watcher.cancel()
+
+
+def _is_text_chunk(event: dict[str, Any]) -> bool:
+    return event.get("type") == "message_chunk" and not event.get("is_final") and bool(event.get("content"))
+
+
+async def coalesce_message_chunks(
+    events: AsyncIterator[dict[str, Any]],
+    window_seconds: float = settings.SSE_COALESCE_WINDOW_SECONDS,
+    max_chars: int = settings.SSE_COALESCE_MAX_CHARS,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Merge consecutive text chunks of an event stream.
+
+    The source runs in a task of its own, so pending text is flushed when the
+    window closes even if no further event arrives. Closing this generator
+    cancels the source and waits for its cleanup.
+
+    Args:
+        events: Chat stream events
+        window_seconds: Longest time text is held back
+        max_chars: Pending text length that flushes immediately
+
+    Yields:
+        The same events, with runs of message_chunk events merged
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    producer = asyncio.create_task(produce())
+    loop = asyncio.get_running_loop()
+    pending: list[str] = []
+    pending_chars = 0
+    flush_at: Optional[float] = None
+    next_item: Optional[asyncio.Future] = None
+
+    def flush() -> dict[str, Any]:
+        nonlocal pending, pending_chars, flush_at
+        merged = {"type": "message_chunk", "content": "".join(pending), "is_final": False}
+        pending, pending_chars, flush_at = [], 0, None
+        return merged
+
+    try:
+        while True:
+            if next_item is None:
+                next_item = asyncio.ensure_future(queue.get())
+            timeout = None if flush_at is None else max(flush_at - loop.time(), 0)
+            done, _ = await asyncio.wait({next_item}, timeout=timeout)
+            if not done:
+                yield flush()
+                continue
+
+            item = next_item.result()
+            next_item = None
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                if pending:
+                    yield flush()
+                raise item
+
+            if _is_text_chunk(item):
+                pending.append(item["content"])
+                pending_chars += len(item["content"])
+                if flush_at is None:
+                    flush_at = loop.time() + window_seconds
+                if pending_chars >= max_chars:
+                    yield flush()
+                continue
+
+            if pending:
+                yield flush()
+            yield item
+
+        if pending:
+            yield flush()
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
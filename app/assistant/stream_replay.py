@@ -0,0 +1,257 @@
+"""Resumable chat streams
+
+A chat turn runs in a background task with its own database session and
+writes its events into a bounded per-turn replay buffer; HTTP responses only
+follow the buffer. If the connection drops, the turn still runs to completion
+(the answer is persisted as usual) and the client can reconnect with the last
+SSE id it received (Last-Event-ID: "<turn_id>:<n>") to get the rest instead
+of running the turn again. Finished turns stay resumable for
+STREAM_REPLAY_TTL_SECONDS.
+
+With STREAM_REPLAY_REDIS_URL set, events are also written to Redis, so a
+reconnect that reaches another worker process can follow the turn from there.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+from app.assistant.service import chat_stream
+from app.assistant.sse import coalesce_message_chunks
+from app.config import settings
+from app.database.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeUnavailable(Exception):
+    """The events after the requested ID are no longer buffered"""
+
+
+def format_event_id(turn_id: str, event_id: int) -> str:
+    return f"{turn_id}:{event_id}"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[tuple[str, int]]:
+    """(turn_id, event number) from a Last-Event-ID value, or None if malformed"""
+    turn_id, separator, event_id = (value or "").rpartition(":")
+    if not separator or not turn_id or not event_id.isdigit():
+        return None
+    return turn_id, int(event_id)
+
+
+class TurnStream:
+    """Numbered events of one chat turn; written by the turn's task, read by any number of connections"""
+
+    def __init__(self, turn_id: str, user_id: int, max_events: int = settings.STREAM_REPLAY_MAX_EVENTS):
+        self.turn_id = turn_id
+        self.user_id = user_id
+        self.done = False
+        self.expires_at: Optional[float] = None
+        self._events: deque[tuple[int, dict[str, Any]]] = deque(maxlen=max_events)
+        self._last_id = 0
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, event: dict[str, Any]) -> int:
+        """Buffer an event; returns its number"""
+        self._last_id += 1
+        self._events.append((self._last_id, event))
+        self._notify()
+        return self._last_id
+
+    def finish(self) -> None:
+        self.done = True
+        self.expires_at = time.monotonic() + settings.STREAM_REPLAY_TTL_SECONDS
+        self._notify()
+
+    def can_resume(self, after: int) -> bool:
+        """Whether every event after the given number is still buffered"""
+        oldest = self._events[0][0] if self._events else self._last_id + 1
+        return after >= oldest - 1
+
+    async def follow(self, after: int = 0) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """
+        Buffered events after the given number, then new ones as they arrive, until the turn is done.
+
+        Raises:
+            ResumeUnavailable: Events after `after` were dropped from the bounded buffer
+        """
+        while True:
+            if not self.can_resume(after):
+                raise ResumeUnavailable(f"Events after {after} of turn {self.turn_id} are no longer buffered")
+            changed = self._changed
+            for event_id, event in list(self._events):
+                if event_id > after:
+                    after = event_id
+                    yield event_id, event
+            if self.done and after >= self._last_id:
+                return
+            await changed.wait()
+
+
+class RedisReplayStore:
+    """Copy of every turn's events in Redis, for resumes that reach another worker"""
+
+    def __init__(self, url: str):
+        # Optional dependency (the "redis" extra), only needed when STREAM_REPLAY_REDIS_URL is set
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "STREAM_REPLAY_REDIS_URL is set but redis is not installed; install the 'redis' extra"
+            ) from e
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _keys(turn_id: str) -> tuple[str, str]:
+        return f"chat-turn:{turn_id}", f"chat-turn:{turn_id}:events"
+
+    async def append(self, turn: TurnStream, event_id: int, event: dict[str, Any]) -> None:
+        meta_key, events_key = self._keys(turn.turn_id)
+        await self._redis.hset(meta_key, "user_id", turn.user_id)
+        await self._redis.rpush(events_key, json.dumps([event_id, event]))
+        await self._redis.ltrim(events_key, -settings.STREAM_REPLAY_MAX_EVENTS, -1)
+        # Refreshed on every event, so a running turn never expires
+        for key in (meta_key, events_key):
+            await self._redis.expire(key, settings.STREAM_REPLAY_TTL_SECONDS)
+
+    async def finish(self, turn: TurnStream) -> None:
+        meta_key, _ = self._keys(turn.turn_id)
+        await self._redis.hset(meta_key, "done", 1)
+
+    async def owner(self, turn_id: str) -> Optional[int]:
+        """User the turn belongs to, or None if Redis does not know it"""
+        meta_key, _ = self._keys(turn_id)
+        user_id = await self._redis.hget(meta_key, "user_id")
+        return int(user_id) if user_id is not None else None
+
+    async def follow(self, turn_id: str, after: int = 0) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Like TurnStream.follow, polling Redis every STREAM_REPLAY_POLL_SECONDS"""
+        meta_key, events_key = self._keys(turn_id)
+        while True:
+            # Read the flag first: once it is set, every event is already in the list
+            done = await self._redis.hget(meta_key, "done") is not None
+            events = [json.loads(item) for item in await self._redis.lrange(events_key, 0, -1)]
+            if events and events[0][0] > after + 1:
+                raise ResumeUnavailable(f"Events after {after} of turn {turn_id} are no longer buffered")
+            for event_id, event in events:
+                if event_id > after:
+                    after = event_id
+                    yield event_id, event
+            if done:
+                return
+            await asyncio.sleep(settings.STREAM_REPLAY_POLL_SECONDS)
+
+
+replay_store = RedisReplayStore(settings.STREAM_REPLAY_REDIS_URL) if settings.STREAM_REPLAY_REDIS_URL else None
+
+# Turns of this process by ID, and their tasks (kept referenced until done)
+_turns: dict[str, TurnStream] = {}
+_turn_tasks: set[asyncio.Task] = set()
+
+
+def _prune_expired() -> None:
+    now = time.monotonic()
+    for turn_id in [turn_id for turn_id, turn in _turns.items() if turn.expires_at is not None and turn.expires_at <= now]:
+        del _turns[turn_id]
+
+
+async def _buffer(turn: TurnStream, event: dict[str, Any]) -> None:
+    event_id = turn.append(event)
+    if replay_store is not None:
+        try:
+            await replay_store.append(turn, event_id, event)
+        except Exception as e:
+            logger.warning(f"Failed to copy event {event_id} of turn {turn.turn_id} to the replay store: {e}")
+
+
+async def _run_turn(
+    turn: TurnStream,
+    message: str,
+    account_id: int,
+    conversation_id: Optional[int],
+) -> None:
+    # The request's session closes with the response; the turn may outlive it
+    db = SessionLocal()
+    try:
+        events = chat_stream(
+            message=message,
+            user_id=turn.user_id,
+            account_id=account_id,
+            db=db,
+            conversation_id=conversation_id,
+        )
+        async for event in coalesce_message_chunks(events):
+            await _buffer(turn, event)
+        await _buffer(turn, {"type": "done", "conversation_id": conversation_id or "default"})
+    except Exception as e:
+        logger.error(
+            "Chat turn failed",
+            extra={"user_id": turn.user_id, "account_id": account_id, "error": str(e)},
+            exc_info=True,
+        )
+        await _buffer(turn, {
+            "type": "error",
+            "message": "An error occurred while streaming the response.",
+            "recoverable": False,
+        })
+    finally:
+        db.close()
+        turn.finish()
+        if replay_store is not None:
+            try:
+                await replay_store.finish(turn)
+            except Exception as e:
+                logger.warning(f"Failed to mark turn {turn.turn_id} finished in the replay store: {e}")
+
+
+def start_turn(message: str, user_id: int, account_id: int, conversation_id: Optional[int] = None) -> TurnStream:
+    """
+    Run a chat turn in the background, independent of the connection that started it.
+
+    Returns:
+        The turn's event stream, to follow from the start
+    """
+    _prune_expired()
+    turn = TurnStream(uuid.uuid4().hex, user_id)
+    _turns[turn.turn_id] = turn
+    task = asyncio.create_task(_run_turn(turn, message, account_id, conversation_id))
+    _turn_tasks.add(task)
+    task.add_done_callback(_turn_tasks.discard)
+    return turn
+
+
+async def open_turn(
+    turn_id: str,
+    user_id: int,
+    after: int,
+) -> Optional[AsyncIterator[tuple[int, dict[str, Any]]]]:
+    """
+    Events of a turn after the given number, from this process or the shared store.
+
+    Returns:
+        The events, or None if the turn is unknown, expired or belongs to another user
+
+    Raises:
+        ResumeUnavailable: The turn is known but events after `after` were dropped
+    """
+    _prune_expired()
+    turn = _turns.get(turn_id)
+    if turn is not None:
+        if turn.user_id != user_id:
+            return None
+        if not turn.can_resume(after):
+            raise ResumeUnavailable(f"Events after {after} of turn {turn_id} are no longer buffered")
+        return turn.follow(after)
+
+    if replay_store is not None and await replay_store.owner(turn_id) == user_id:
+        return replay_store.follow(turn_id, after)
+    return None
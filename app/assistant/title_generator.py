@@ -1,30 +1,72 @@
 """Generate conversation titles using Claude Haiku"""
 
+import asyncio
 import logging
-from langchain_anthropic import ChatAnthropic
-from app.config import settings
+import re
+from typing import Optional
+
+from app.crud.conversation_crud import ConversationCrud
+from app.database.database import SessionLocal
+from app.llm.models import create_chat_model
+from app.llm.policy import invoke_llm
+from app.llm.scheduler import Priority
+from app.llm.usage import llm_usage
 
 logger = logging.getLogger(__name__)
 
+MAX_TITLE_LENGTH = 50
+HEURISTIC_TITLE_WORDS = 6
+
+# Title tasks kept referenced until they finish
+_title_tasks: set[asyncio.Task] = set()
+
+
+def _truncate(title: str) -> str:
+    return title[:MAX_TITLE_LENGTH - 3] + "..." if len(title) > MAX_TITLE_LENGTH else title
+
+
+def heuristic_title(first_message: str) -> str:
+    """
+    Build a title locally from the first message: its first sentence, first few words, capitalized.
+    Used as the initial title and whenever the LLM title fails.
+
+    Args:
+        first_message: The user's first message in the conversation
+
+    Returns:
+        Title (max 50 characters)
+    """
+    text = " ".join(first_message.split())
+    first_sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0].rstrip(".!?")
+    words = first_sentence.split()
+    if not words:
+        return "New Conversation"
+
+    title = " ".join(words[:HEURISTIC_TITLE_WORDS])
+    if len(words) > HEURISTIC_TITLE_WORDS:
+        title += "..."
+    return _truncate(title[0].upper() + title[1:])
+
 
-def generate_conversation_title(first_message: str) -> str:
+async def generate_conversation_title(first_message: str, user_id: Optional[int] = None) -> str:
     """
     Generate a concise, descriptive title for a conversation based on the first message.
     Uses Claude Haiku for fast, cost-effective title generation.
 
     Args:
         first_message: The user's first message in the conversation
+        user_id: User the conversation belongs to, for the LLM scheduler's per-user cap
 
     Returns:
-        Generated title (max 50 characters) or truncated first message on error
+        Generated title (max 50 characters) or a heuristic title on error
     """
     try:
         # Initialize Haiku model (fast and cheap)
-        llm = ChatAnthropic(
+        llm = create_chat_model(
+            "title",
             model="claude-haiku-4-20250514",
             temperature=0,
             max_tokens=50,  # Titles should be short
-            api_key=settings.ANTHROPIC_API_KEY
         )
 
         # Prompt for title generation
@@ -41,23 +83,49 @@ Examples:
 """
 
         # Generate title
-        response = llm.invoke(prompt)
+        response = await invoke_llm(llm, prompt, user_id, Priority.BACKGROUND)
+        llm_usage.record("title", response)
         title = response.content.strip()
 
         # Clean up title (remove quotes if present)
         title = title.strip('"\'')
 
-        # Truncate to 50 characters if needed
-        if len(title) > 50:
-            title = title[:47] + "..."
-
         logger.info(f"Generated title: {title}")
-        return title
+        return _truncate(title)
 
     except Exception as e:
         logger.error(f"Error generating title: {e}", exc_info=True)
 
-        # Fallback: truncate first message
-        fallback_title = first_message[:47] + "..." if len(first_message) > 50 else first_message
+        fallback_title = heuristic_title(first_message)
         logger.info(f"Using fallback title: {fallback_title}")
         return fallback_title
+
+
+async def update_title(conversation_id: int, user_id: int, first_message: str) -> Optional[str]:
+    """
+    Generate a title and persist it, using a session of its own so it can outlive the request.
+
+    Returns:
+        The stored title, or None if the conversation no longer exists
+    """
+    title = await generate_conversation_title(first_message, user_id)
+    db = SessionLocal()
+    try:
+        conversation = ConversationCrud.update_title(db, conversation_id, user_id, title)
+        if not conversation:
+            return None
+        logger.info(f"Generated title for conversation {conversation_id}: {title}")
+        return title
+    except Exception as e:
+        logger.error(f"Failed to store title for conversation {conversation_id}: {e}", exc_info=True)
+        return None
+    finally:
+        db.close()
+
+
+def start_title_generation(conversation_id: int, user_id: int, first_message: str) -> asyncio.Task:
+    """Generate and store the conversation title in the background; the task's result is the title"""
+    task = asyncio.create_task(update_title(conversation_id, user_id, first_message))
+    _title_tasks.add(task)
+    task.add_done_callback(_title_tasks.discard)
+    return task
@@ -1 +1,25 @@
 """Assistant tools module"""
+
+from app.assistant.tools.analytics import analytics_tools
+from app.assistant.tools.categories import category_tools
+from app.assistant.tools.tags import tag_tools
+from app.assistant.tools.budgets import budget_tools
+from app.assistant.tools.transactions import transaction_tools
+from app.assistant.tools.advice import advice_tools
+
+# Every tool the assistant can call. Tools read the request's db session, user and
+# account from the RunnableConfig (see context.py), so this list is built once.
+assistant_tools = [
+    *analytics_tools,
+    *category_tools,
+    *tag_tools,
+    *budget_tools,
+    *transaction_tools,
+    *advice_tools,
+]
+
+# Tools without side effects; a turn that only used these can be answered again from the response cache
+read_only_tool_names = {
+    tool.name
+    for tool in [*analytics_tools, *category_tools, *tag_tools, *budget_tools, *advice_tools]
+}
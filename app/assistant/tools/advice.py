@@ -1,50 +1,53 @@
 """Financial advice tool"""
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_anthropic import ChatAnthropic
-from sqlalchemy.orm import Session
 
 from app.assistant.schemas.tools import GetFinancialAdviceInput
-from app.config import settings
-
-
-def create_advice_tools(db: Session, user_id: int, user_context: dict):
-    """Factory to create financial advice tools with context"""
-
-    @tool(args_schema=GetFinancialAdviceInput)
-    def get_financial_advice(question: str, context: str | None = None) -> str:
-        """
-        Get personalized financial advice based on the user's data and question.
-        Use this when the user asks for advice, suggestions, or recommendations.
-
-        Examples:
-        - "How can I save more money?"
-        - "Should I increase my entertainment budget?"
-        - "What's a good budget for groceries?"
-        """
-        # Build context from user data
-        # TODO: most of this is useless, change
-        context_parts = [
-            f"User's current account balance: ${user_context.get('account_balance', 0):.2f}",
-            f"Number of categories: {len(user_context.get('categories', []))}",
-            f"Number of active budgets: {len(user_context.get('budgets', []))}",
-            f"Recent transactions: {len(user_context.get('recent_transactions', []))} in last 30 days",
-        ]
-
-        if context:
-            context_parts.append(f"Additional context: {context}")
-
-        full_context = "\n".join(context_parts)
-
-        # Use LLM for advice generation
-        llm = ChatAnthropic(
-            model="claude-haiku-4-5-20251001",
-            temperature=0.3,  # Slight creativity for advice TODO: play with temp, not sure how creative we want it
-            max_tokens=1024,
-            api_key=settings.ANTHROPIC_API_KEY,
-        )
-
-        advice_prompt = f"""You are a helpful financial advisor. Provide practical, actionable advice based on the user's question and their financial context.
+from app.assistant.tools.context import get_tool_context
+from app.llm.models import create_chat_model
+from app.llm.policy import invoke_llm
+from app.llm.scheduler import Priority
+from app.llm.usage import llm_usage
+
+
+@tool(args_schema=GetFinancialAdviceInput)
+async def get_financial_advice(config: RunnableConfig, question: str, context: str | None = None) -> str:
+    """
+    Get personalized financial advice based on the user's data and question.
+    Use this when the user asks for advice, suggestions, or recommendations.
+
+    Examples:
+    - "How can I save more money?"
+    - "Should I increase my entertainment budget?"
+    - "What's a good budget for groceries?"
+    """
+    ctx = get_tool_context(config)
+    user_context = ctx.user_context
+
+    # Build context from user data
+    # TODO: most of this is useless, change
+    context_parts = [
+        f"User's current account balance: ${user_context.get('account_balance', 0):.2f}",
+        f"Number of categories: {len(user_context.get('categories', []))}",
+        f"Number of active budgets: {len(user_context.get('budgets', []))}",
+        f"Recent transactions: {len(user_context.get('recent_transactions', []))} in last 30 days",
+    ]
+
+    if context:
+        context_parts.append(f"Additional context: {context}")
+
+    full_context = "\n".join(context_parts)
+
+    # Use LLM for advice generation
+    llm = create_chat_model(
+        "advice",
+        model="claude-haiku-4-5-20251001",
+        temperature=0.3,  # Slight creativity for advice TODO: play with temp, not sure how creative we want it
+        max_tokens=1024,
+    )
+
+    advice_prompt = f"""You are a helpful financial advisor. Provide practical, actionable advice based on the user's question and their financial context.
 
                             User's Question: {question}
 
@@ -59,8 +62,12 @@ def create_advice_tools(db: Session, user_id: int, user_context: dict):
 
                             Keep your response concise (1-3 paragraphs) and avoid generic advice."""
 
-        response = llm.invoke([{"role": "user", "content": advice_prompt}])
+    response = await invoke_llm(
+        llm, [{"role": "user", "content": advice_prompt}], ctx.user_id, Priority.INTERACTIVE, config
+    )
+    llm_usage.record("advice", response)
 
-        return response.content
+    return response.content
 
-    return [get_financial_advice]
+
+advice_tools = [get_financial_advice]
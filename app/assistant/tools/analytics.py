@@ -1,8 +1,8 @@
 """Analytics tools for financial insights"""
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
 
 from app.assistant.schemas.tools import (
     GetSpendingByCategoryInput,
@@ -20,6 +20,8 @@ from app.assistant.analytics.queries import (
     income_vs_expense_summary,
     spending_by_tag_query
 )
+from app.assistant.tools.context import get_tool_context, tool_session
+from app.assistant.tools.memo import memoize_tool_result
 from app.assistant.analytics.formatters import (
     format_spending_by_category,
     format_spending_over_time,
@@ -29,244 +31,262 @@ from app.assistant.analytics.formatters import (
     format_spending_by_tag
 )
 from app.database.models.enums import TransactionType
-
-
-# These tools need database access, so they'll be created as factory functions
-# that receive a db session
-
-def create_analytics_tools(db: Session, user_id: int, account_id: int):
-    """Factory to create analytics tools with database and user context"""
-
-    @tool(args_schema=GetSpendingByCategoryInput)
-    def get_spending_by_category(
-        period: str = "month",
-        transaction_type: str | None = "expense"
-    ) -> str:
-        """
-        Get spending or income broken down by category.
-        Returns total amount and transaction count for each category.
-        """
-        # Parse period
-        end_date = datetime.now()
-        start_date = None
-
-        if period == "today":
-            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == "week":
-            start_date = end_date - timedelta(days=7)
-        elif period == "month":
-            start_date = end_date - timedelta(days=30)
-        elif period == "year":
-            start_date = end_date - timedelta(days=365)
-
-        # Parse transaction type
-        trans_type = None
-        if transaction_type == "income":
-            trans_type = TransactionType.INCOME
-        elif transaction_type == "expense":
-            trans_type = TransactionType.EXPENSE
-
+from app.database.slow_query_log import track_query_origin
+
+
+# Request context (user and account) arrives through the RunnableConfig, so these tools
+# are built once and shared by every request. Each call opens its own short-lived session,
+# so parallel tool calls never share one. Results are memoized per
+# conversation until the user's data changes (see app.assistant.tools.memo).
+
+@tool(args_schema=GetSpendingByCategoryInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_spending_by_category(
+    config: RunnableConfig,
+    period: str = "month",
+    transaction_type: str | None = "expense"
+) -> str:
+    """
+    Get spending or income broken down by category.
+    Returns total amount and transaction count for each category.
+    """
+    ctx = get_tool_context(config)
+
+    # Parse period
+    end_date = datetime.now()
+    start_date = None
+
+    if period == "today":
+        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == "week":
+        start_date = end_date - timedelta(days=7)
+    elif period == "month":
+        start_date = end_date - timedelta(days=30)
+    elif period == "year":
+        start_date = end_date - timedelta(days=365)
+
+    # Parse transaction type
+    trans_type = None
+    if transaction_type == "income":
+        trans_type = TransactionType.INCOME
+    elif transaction_type == "expense":
+        trans_type = TransactionType.EXPENSE
+
+    with tool_session(config) as db:
         results = spending_by_category_query(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             start_date=start_date,
             end_date=end_date,
             transaction_type=trans_type
         )
 
-        formatted = format_spending_by_category(results)
-        return formatted["summary"] + "\n\nDetailed breakdown:\n" + "\n".join(
-            f"- {item['category_name']}: ${item['amount']:.2f} ({item['percentage']:.1f}%, {item['transaction_count']} transactions)"
-            for item in formatted["data"]
-        )
-
-    @tool(args_schema=GetSpendingTrendsInput)
-    def get_spending_trends(
-        period: str = "month",
-        group_by: str = "day"
-    ) -> str:
-        """
-        Get spending trends over time, showing income and expenses by day/week/month.
-        Useful for understanding spending patterns and trends.
-        """
-        # Parse period
-        end_date = datetime.now()
-        if period == "week":
-            start_date = end_date - timedelta(days=7)
-        elif period == "month":
-            start_date = end_date - timedelta(days=30)
-        elif period == "quarter":
-            start_date = end_date - timedelta(days=90)
-        elif period == "year":
-            start_date = end_date - timedelta(days=365)
-        else:
-            start_date = end_date - timedelta(days=30)
-
+    formatted = format_spending_by_category(results)
+    if not formatted["data"]:
+        return formatted["summary"]
+    return formatted["summary"] + "\n\n" + formatted["table"]
+
+
+@tool(args_schema=GetSpendingTrendsInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_spending_trends(
+    config: RunnableConfig,
+    period: str = "month",
+    group_by: str = "day"
+) -> str:
+    """
+    Get spending trends over time, showing income and expenses by day/week/month.
+    Useful for understanding spending patterns and trends.
+    """
+    ctx = get_tool_context(config)
+
+    # Parse period
+    end_date = datetime.now()
+    if period == "week":
+        start_date = end_date - timedelta(days=7)
+    elif period == "month":
+        start_date = end_date - timedelta(days=30)
+    elif period == "quarter":
+        start_date = end_date - timedelta(days=90)
+    elif period == "year":
+        start_date = end_date - timedelta(days=365)
+    else:
+        start_date = end_date - timedelta(days=30)
+
+    with tool_session(config) as db:
         results = spending_over_time_query(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             start_date=start_date,
             end_date=end_date,
             group_by=group_by
         )
 
-        formatted = format_spending_over_time(results, group_by)
-        return formatted["summary"]
-
-    @tool(args_schema=GetBudgetAnalysisInput)
-    def get_budget_analysis(
-        month: int | None = None,
-        year: int | None = None
-    ) -> str:
-        """
-        Analyze budget utilization for each category.
-        Shows how much has been spent vs budgeted amounts.
-        Highlights categories over budget or nearing limits.
-        """
+    formatted = format_spending_over_time(results, group_by)
+    return formatted["summary"]
+
+
+@tool(args_schema=GetBudgetAnalysisInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_budget_analysis(
+    config: RunnableConfig,
+    month: int | None = None,
+    year: int | None = None
+) -> str:
+    """
+    Analyze budget utilization for each category.
+    Shows how much has been spent vs budgeted amounts.
+    Highlights categories over budget or nearing limits.
+    """
+    ctx = get_tool_context(config)
+
+    with tool_session(config) as db:
         results = budget_utilization_query(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             month=month,
             year=year
         )
 
-        formatted = format_budget_utilization(results)
-        if not formatted["data"]:
-            return formatted["summary"]
-
-        details = []
-        for item in formatted["data"]:
-            status = "✓" if item["utilization_percent"] <= 80 else "⚠" if item["utilization_percent"] <= 100 else "✗"
-            details.append(
-                f"{status} {item['category_name']}: ${item['spent_amount']:.2f} / ${item['budget_amount']:.2f} "
-                f"({item['utilization_percent']:.1f}%, ${item['remaining']:.2f} remaining)"
-            )
-
-        return formatted["summary"] + "\n\n" + "\n".join(details)
-
-    @tool(args_schema=GetTopExpensesInput)
-    def get_top_expenses(
-        period: str = "month",
-        limit: int = 10
-    ) -> str:
-        """
-        Get the highest expense transactions for a given period.
-        Useful for identifying large purchases or unusual spending.
-        """
-        # Validate and clamp limit
-        limit = max(1, min(50, limit))
-
-        # Parse period
-        end_date = datetime.now()
-        start_date = None
-
-        if period == "week":
-            start_date = end_date - timedelta(days=7)
-        elif period == "month":
-            start_date = end_date - timedelta(days=30)
-        elif period == "year":
-            start_date = end_date - timedelta(days=365)
-
+    formatted = format_budget_utilization(results)
+    if not formatted["data"]:
+        return formatted["summary"]
+    return formatted["summary"] + "\n\n" + formatted["table"]
+
+
+@tool(args_schema=GetTopExpensesInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_top_expenses(
+    config: RunnableConfig,
+    period: str = "month",
+    limit: int = 10
+) -> str:
+    """
+    Get the highest expense transactions for a given period.
+    Useful for identifying large purchases or unusual spending.
+    """
+    ctx = get_tool_context(config)
+
+    # Validate and clamp limit
+    limit = max(1, min(50, limit))
+
+    # Parse period
+    end_date = datetime.now()
+    start_date = None
+
+    if period == "week":
+        start_date = end_date - timedelta(days=7)
+    elif period == "month":
+        start_date = end_date - timedelta(days=30)
+    elif period == "year":
+        start_date = end_date - timedelta(days=365)
+
+    with tool_session(config) as db:
         results = top_expenses_query(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             start_date=start_date,
             end_date=end_date,
             limit=limit
         )
 
-        formatted = format_top_expenses(results)
-        if not formatted["data"]:
-            return formatted["summary"]
-
-        details = []
-        for i, item in enumerate(formatted["data"], 1):
-            details.append(
-                f"{i}. {item['description']} - ${item['amount']:.2f} ({item['category']}, {item['date']})"
-            )
-
-        return formatted["summary"] + "\n\n" + "\n".join(details)
-
-    @tool(args_schema=GetIncomeVsExpenseInput)
-    def get_income_vs_expense(
-        period: str = "month"
-    ) -> str:
-        """
-        Compare total income vs expenses for a period.
-        Shows net savings or deficit.
-        """
-        # Parse period
-        end_date = datetime.now()
-        start_date = None
-
-        if period == "today":
-            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == "week":
-            start_date = end_date - timedelta(days=7)
-        elif period == "month":
-            start_date = end_date - timedelta(days=30)
-        elif period == "year":
-            start_date = end_date - timedelta(days=365)
-
+    formatted = format_top_expenses(results)
+    if not formatted["data"]:
+        return formatted["summary"]
+    return formatted["summary"] + "\n\n" + formatted["table"]
+
+
+@tool(args_schema=GetIncomeVsExpenseInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_income_vs_expense(
+    config: RunnableConfig,
+    period: str = "month"
+) -> str:
+    """
+    Compare total income vs expenses for a period.
+    Shows net savings or deficit.
+    """
+    ctx = get_tool_context(config)
+
+    # Parse period
+    end_date = datetime.now()
+    start_date = None
+
+    if period == "today":
+        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == "week":
+        start_date = end_date - timedelta(days=7)
+    elif period == "month":
+        start_date = end_date - timedelta(days=30)
+    elif period == "year":
+        start_date = end_date - timedelta(days=365)
+
+    with tool_session(config) as db:
         result = income_vs_expense_summary(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             start_date=start_date,
             end_date=end_date
         )
 
-        formatted = format_income_vs_expense(result)
-        return formatted["summary"] + f" (Based on {formatted['data']['total_transactions']} transactions)"
-
-    @tool(args_schema=GetSpendingByTagInput)
-    def get_spending_by_tag(
-        period: str = "month"
-    ) -> str:
-        """
-        Get spending broken down by tags.
-        Useful for tracking spending across custom categories like projects, people, or purposes.
-        """
-        # Parse period
-        end_date = datetime.now()
-        start_date = None
-
-        if period == "week":
-            start_date = end_date - timedelta(days=7)
-        elif period == "month":
-            start_date = end_date - timedelta(days=30)
-        elif period == "year":
-            start_date = end_date - timedelta(days=365)
-
+    formatted = format_income_vs_expense(result)
+    return formatted["summary"] + f" (Based on {formatted['data']['total_transactions']} transactions)"
+
+
+@tool(args_schema=GetSpendingByTagInput, response_format="content_and_artifact")
+@memoize_tool_result
+@track_query_origin
+def get_spending_by_tag(
+    config: RunnableConfig,
+    period: str = "month"
+) -> str:
+    """
+    Get spending broken down by tags.
+    Useful for tracking spending across custom categories like projects, people, or purposes.
+    """
+    ctx = get_tool_context(config)
+
+    # Parse period
+    end_date = datetime.now()
+    start_date = None
+
+    if period == "week":
+        start_date = end_date - timedelta(days=7)
+    elif period == "month":
+        start_date = end_date - timedelta(days=30)
+    elif period == "year":
+        start_date = end_date - timedelta(days=365)
+
+    with tool_session(config) as db:
         results = spending_by_tag_query(
             db=db,
-            user_id=user_id,
-            account_id=account_id,
+            user_id=ctx.user_id,
+            account_id=ctx.account_id,
             start_date=start_date,
             end_date=end_date
         )
 
-        formatted = format_spending_by_tag(results)
-        if not formatted["data"]:
-            return formatted["summary"]
-
-        details = []
-        for item in formatted["data"]:
-            details.append(
-                f"- {item['tag_name']}: ${item['amount']:.2f} ({item['percentage']:.1f}%, {item['transaction_count']} transactions)"
-            )
-
-        return formatted["summary"] + "\n\n" + "\n".join(details)
-
-    return [
-        get_spending_by_category,
-        get_spending_trends,
-        get_budget_analysis,
-        get_top_expenses,
-        get_income_vs_expense,
-        get_spending_by_tag
-    ]
+    formatted = format_spending_by_tag(results)
+    if not formatted["data"]:
+        return formatted["summary"]
+    return formatted["summary"] + "\n\n" + formatted["table"]
+
+
+analytics_tools = [
+    get_spending_by_category,
+    get_spending_trends,
+    get_budget_analysis,
+    get_top_expenses,
+    get_income_vs_expense,
+    get_spending_by_tag
+]
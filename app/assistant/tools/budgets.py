@@ -1,45 +1,41 @@
 """Budget management tools"""
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
 
 from app.assistant.schemas.tools import ListBudgetsInput
+from app.assistant.tools.context import get_tool_context, tool_session
+from app.llm.encoding import encode_table
 from app.crud.budget_crud import BudgetCrud
 from app.crud.category_crud import CategoryCrud
-
-
-def create_budget_tools(db: Session, user_id: int):
-    """Factory to create budget tools with database and user context"""
-
-    @tool(args_schema=ListBudgetsInput)
-    def list_budgets() -> str:
-        """
-        List all budgets with their categories and amounts.
-        Shows which categories have budget limits set.
-        """
-        budgets = BudgetCrud.get_all_budgets(db, user_id)
-
+from app.database.slow_query_log import track_query_origin
+
+
+@tool(args_schema=ListBudgetsInput)
+@track_query_origin
+def list_budgets(config: RunnableConfig) -> str:
+    """
+    List all budgets with their categories and amounts.
+    Shows which categories have budget limits set.
+    """
+    ctx = get_tool_context(config)
+    with tool_session(config) as db:
+        budgets = BudgetCrud.get_all_budgets(db, ctx.user_id)
         if not budgets:
             return "No budgets found. You can create budgets to track spending limits for each category."
 
         # Get categories for name lookup
-        categories = {cat.id: cat for cat in CategoryCrud.get_all_categories(db, user_id)}
-
-        lines = ["Your budgets:"]
-        total_budgeted = 0
-
-        for budget in budgets:
-            category = categories.get(budget.category_id)
-            category_name = category.name if category else f"Category {budget.category_id}"
-            category_icon = category.icon if category else "📁"
-            amount = float(budget.amount)
-            total_budgeted += amount
-
-            notes = f" ({budget.notes})" if budget.notes else ""
-            lines.append(f"- {category_icon} {category_name}: ${amount:.2f}{notes}")
+        categories = {cat.id: cat.name for cat in CategoryCrud.get_all_categories(db, ctx.user_id)}
 
-        lines.append(f"\nTotal budgeted: ${total_budgeted:.2f}")
+    total_budgeted = sum(float(budget.amount) for budget in budgets)
 
-        return "\n".join(lines)
+    table = encode_table(
+        ["category", "amount", "notes"],
+        (
+            [categories.get(budget.category_id, f"Category {budget.category_id}"), float(budget.amount), budget.notes]
+            for budget in budgets
+        )
+    )
+    return f"Your budgets:\n{table}\n\nTotal budgeted: ${total_budgeted:.2f}"
 
-    return [list_budgets]
+budget_tools = [list_budgets]
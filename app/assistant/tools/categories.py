@@ -1,32 +1,32 @@
 """Category management tools"""
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
 
 from app.assistant.schemas.tools import ListCategoriesInput
+from app.assistant.tools.context import get_tool_context, tool_session
+from app.llm.encoding import encode_table
 from app.crud.category_crud import CategoryCrud
+from app.database.slow_query_log import track_query_origin
 
 
-def create_category_tools(db: Session, user_id: int):
-    """Factory to create category tools with database and user context"""
+@tool(args_schema=ListCategoriesInput)
+@track_query_origin
+def list_categories(config: RunnableConfig) -> str:
+    """
+    List all available categories.
+    Shows category IDs, names and icons.
+    """
+    ctx = get_tool_context(config)
+    with tool_session(config) as db:
+        categories = CategoryCrud.get_all_categories(db, ctx.user_id)
 
-    @tool(args_schema=ListCategoriesInput)
-    def list_categories() -> str:
-        """
-        List all available categories.
-        Shows category names, icons, and colors.
-        """
-        categories = CategoryCrud.get_all_categories(db, user_id)
+    if not categories:
+        return "No categories found. You can create categories to organize your transactions."
 
-        if not categories:
-            return "No categories found. You can create categories to organize your transactions."
+    return "Your categories:\n" + encode_table(
+        ["id", "name", "icon"],
+        ([cat.id, cat.name, cat.icon] for cat in categories)
+    )
 
-        lines = ["Your categories:"]
-        for cat in categories:
-            icon = cat.icon or "📁"
-            color = cat.color or "gray"
-            lines.append(f"- {icon} {cat.name} (ID: {cat.id}, color: {color})")
-
-        return "\n".join(lines)
-
-    return [list_categories]
+category_tools = [list_categories]
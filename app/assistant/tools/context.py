@@ -0,0 +1,41 @@
+"""Per-request context handed to assistant tools through the LangGraph config"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+
+
+@dataclass
+class ToolContext:
+    """Everything a tool needs to know about the request it runs for"""
+    user_id: int
+    account_id: int
+    user_context: dict[str, Any] = field(default_factory=dict)
+    conversation_id: Optional[int] = None
+    # Tools never use the request's Session: ToolNode runs parallel tool calls concurrently
+    session_factory: Callable[[], Session] = SessionLocal
+
+
+def build_tool_config(context: ToolContext) -> RunnableConfig:
+    """Config to pass to the compiled graph so its tools see this request's context"""
+    return {"configurable": {"tool_context": context}}
+
+
+def get_tool_context(config: RunnableConfig) -> ToolContext:
+    """Read the request context inside a tool that declares a `config: RunnableConfig` parameter"""
+    return config["configurable"]["tool_context"]
+
+
+@contextmanager
+def tool_session(config: RunnableConfig) -> Iterator[Session]:
+    """Short-lived session for a single tool call, returned to the pool when the block exits"""
+    db = get_tool_context(config).session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
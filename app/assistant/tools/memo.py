@@ -0,0 +1,57 @@
+"""Per-conversation memoization of read-only assistant tool results"""
+
+import inspect
+import json
+from datetime import date
+from functools import wraps
+
+from langchain_core.runnables import RunnableConfig
+
+from app.assistant.tools.context import get_tool_context
+from app.cache import TTLCache
+from app.config import settings
+from app.database.data_version import get_data_version
+
+_tool_results = TTLCache(
+    max_size=settings.TOOL_MEMO_CACHE_SIZE,
+    ttl_seconds=settings.TOOL_MEMO_TTL_SECONDS,
+)
+
+
+def memoize_tool_result(func):
+    """
+    Decorator caching a read-only tool's output within a conversation.
+
+    The key is the conversation, tool name, normalized arguments (defaults applied),
+    the user's data version and today's date, so any committed write to the user's
+    data or a new day invalidates it. The wrapped tool must be declared with
+    response_format="content_and_artifact"; the artifact reports {"cached": bool}.
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(config: RunnableConfig, **kwargs):
+        ctx = get_tool_context(config)
+
+        bound = signature.bind(config, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name != "config"}
+
+        cache_key = (
+            ctx.conversation_id,
+            ctx.user_id,
+            ctx.account_id,
+            func.__name__,
+            json.dumps(arguments, sort_keys=True, default=str),
+            get_data_version(ctx.user_id),
+            date.today(),
+        )
+        result = _tool_results.get(cache_key)
+        if result is not None:
+            return result, {"cached": True}
+
+        result = func(config, **kwargs)
+        _tool_results.set(cache_key, result)
+        return result, {"cached": False}
+
+    return wrapper
@@ -1,31 +1,29 @@
 """Tag management tools"""
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
 
 from app.assistant.schemas.tools import ListTagsInput
+from app.assistant.tools.context import get_tool_context, tool_session
+from app.llm.encoding import encode_table
 from app.crud.tag_crud import TagCrud
+from app.database.slow_query_log import track_query_origin
 
 
-def create_tag_tools(db: Session, user_id: int):
-    """Factory to create tag tools with database and user context"""
+@tool(args_schema=ListTagsInput)
+@track_query_origin
+def list_tags(config: RunnableConfig) -> str:
+    """
+    List all available tags.
+    Shows tag IDs and names.
+    """
+    ctx = get_tool_context(config)
+    with tool_session(config) as db:
+        tags = TagCrud.get_all_tags(db, ctx.user_id)
 
-    @tool(args_schema=ListTagsInput)
-    def list_tags() -> str:
-        """
-        List all available tags.
-        Shows tag names and colors.
-        """
-        tags = TagCrud.get_all_tags(db, user_id)
+    if not tags:
+        return "No tags found. You can create tags to add additional labels to your transactions."
 
-        if not tags:
-            return "No tags found. You can create tags to add additional labels to your transactions."
+    return "Your tags:\n" + encode_table(["id", "name"], ([tag.id, tag.name] for tag in tags))
 
-        lines = ["Your tags:"]
-        for tag in tags:
-            color = tag.color or "gray"
-            lines.append(f"- {tag.name} (ID: {tag.id}, color: {color})")
-
-        return "\n".join(lines)
-
-    return [list_tags]
+tag_tools = [list_tags]
@@ -1,65 +1,86 @@
 """Transaction creation tool - delegates to existing transaction agent"""
 
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
 import json
 
 from app.assistant.schemas.tools import CreateTransactionsInput, TransactionPreviewsOutput
-from app.agent.service import parse_transactions
+from app.assistant.tools.context import get_tool_context, tool_session
+from app.agent.fast_parser import load_category_hints
+from app.agent.service import NESTED_AGENT_TAG, parse_transactions_stream
+from app.crud.account_crud import AccountCrud
 from app.crud.category_crud import CategoryCrud
 from app.crud.tag_crud import TagCrud
+from app.database.slow_query_log import track_query_origin
 
+# Name of the custom events carrying the nested agent's stream events
+TRANSACTION_AGENT_EVENT = "transaction_agent"
 
-def create_transaction_tools(db: Session, user_id: int, account_id: int):
-    """Factory to create transaction tools with database and user context"""
 
-    @tool(args_schema=CreateTransactionsInput)
-    def create_transactions(text: str) -> str:
-        """
-        Parse natural language text to create transaction previews.
-        Use this when the user wants to add transactions by describing them.
+@tool(args_schema=CreateTransactionsInput)
+@track_query_origin
+async def create_transactions(text: str, config: RunnableConfig) -> str:
+    """
+    Parse natural language text to create transaction previews.
+    Use this when the user wants to add transactions by describing them.
 
-        Examples:
-        - "I spent $50 on groceries yesterday"
-        - "Add coffee for $5, lunch $15, and gas $40"
-        - "Got paid $2000 today"
+    Examples:
+    - "I spent $50 on groceries yesterday"
+    - "Add coffee for $5, lunch $15, and gas $40"
+    - "Got paid $2000 today"
 
-        Returns transaction previews that the user will review and confirm.
-        """
-        # Get user context for the transaction agent
-        categories = CategoryCrud.get_all_categories(db, user_id)
-        tags = TagCrud.get_all_tags(db, user_id)
+    Returns transaction previews that the user will review and confirm.
+    """
+    ctx = get_tool_context(config)
 
-        user_categories = [
-            {"id": cat.id, "name": cat.name, "icon": cat.icon}
-            for cat in categories
-        ]
-        user_tags = [
-            {"id": tag.id, "name": tag.name, "color": tag.color}
-            for tag in tags
-        ]
+    # Get user context for the transaction agent
+    with tool_session(config) as db:
+        categories = CategoryCrud.get_all_categories(db, ctx.user_id)
+        tags = TagCrud.get_all_tags(db, ctx.user_id)
+        category_hints = load_category_hints(db, ctx.user_id)
+        account = AccountCrud.get_by_id_and_user(db, ctx.account_id, ctx.user_id)
+        account_currency = account.currency if account else None
 
-        # Use the existing transaction agent
-        transactions = parse_transactions(
-            text=text,
-            account_id=account_id,
-            user_id=user_id,
-            user_categories=user_categories,
-            user_tags=user_tags,
-        )
+    user_categories = [
+        {"id": cat.id, "name": cat.name, "icon": cat.icon}
+        for cat in categories
+    ]
+    user_tags = [
+        {"id": tag.id, "name": tag.name, "color": tag.color}
+        for tag in tags
+    ]
 
-        if not transactions:
-            return "No transactions were identified in that text. Please provide more specific information like amounts and descriptions."
+    # Stream the transaction agent and forward its planning/transaction events to the chat
+    # stream as they happen (see the on_custom_event handling in chat_stream)
+    transactions = []
+    async for event in parse_transactions_stream(
+        text=text,
+        account_id=ctx.account_id,
+        user_id=ctx.user_id,
+        user_categories=user_categories,
+        user_tags=user_tags,
+        config={"tags": [NESTED_AGENT_TAG]},
+        category_hints=category_hints,
+        account_currency=account_currency,
+    ):
+        await adispatch_custom_event(TRANSACTION_AGENT_EVENT, event, config=config)
+        if event["type"] == "transaction":
+            transactions.append(event["data"])
 
-        # Return structured JSON that service layer can detect
-        # Format: JSON object with __special_event__ marker
-        result = {
-            "__special_event__": "transaction_previews",
-            "transactions": transactions,
-            "count": len(transactions),
-            "message": f"Found {len(transactions)} transaction(s) to create"
-        }
+    if not transactions:
+        return "No transactions were identified in that text. Please provide more specific information like amounts and descriptions."
 
-        return json.dumps(result)
+    # Return structured JSON that service layer can detect
+    # Format: JSON object with __special_event__ marker
+    result = {
+        "__special_event__": "transaction_previews",
+        "transactions": transactions,
+        "count": len(transactions),
+        "message": f"Found {len(transactions)} transaction(s) to create"
+    }
 
-    return [create_transactions]
+    return json.dumps(result)
+
+
+transaction_tools = [create_transactions]
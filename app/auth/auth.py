@@ -1,23 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Optional
 from zoneinfo import ZoneInfo
 
 import bcrypt
 import jwt
 from jwt import InvalidTokenError
 
+from app.cache import TTLCache
 from app.config import settings
 
+# Decoded token payloads, keyed by the raw token. Entries never outlive the token's exp claim.
+_token_cache = TTLCache(max_size=settings.TOKEN_CACHE_SIZE, ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+class PasswordHashingBusyError(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, bounded thread pool so that hashing never blocks the event loop.
+    Requests beyond the worker count wait in a queue; once the queue is full they are rejected
+    instead of piling up behind a login storm.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0  # Submitted and not yet finished (queued + running)
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_queue_depth = 0
+        self._total_wait_ms = 0.0
+
+    async def _run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordHashingBusyError("Too many concurrent password hashing requests")
+            self._pending += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._pending - self._running)
+        submitted_at = time.perf_counter()
+
+        def task():
+            with self._lock:
+                self._running += 1
+                self._total_wait_ms += (time.perf_counter() - submitted_at) * 1000
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def release(_future) -> None:
+            # Runs when the thread is done (or the task was cancelled before it started),
+            # not when the caller stops waiting, so the limit counts the real work
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """Whether a hash was made with a different cost factor than BCRYPT_ROUNDS ($2b$<rounds>$...)"""
+        try:
+            rounds = int(hashed_password.split("$")[2])
+        except (IndexError, ValueError):
+            return True
+        return rounds != settings.BCRYPT_ROUNDS
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait_ms / self._completed, 2) if self._completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -30,12 +126,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def decode_access_token(token: str) -> Optional[dict[str, Any]]:
+    """Decode and verify a token, reusing the cached payload of recently seen tokens."""
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except InvalidTokenError:
-        return None
\ No newline at end of file
+        return None
+
+    ttl = min(settings.TOKEN_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        _token_cache.set(token, payload, ttl_seconds=ttl)
+    return payload
+
+
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    return payload.get("sub")
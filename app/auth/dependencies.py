@@ -2,7 +2,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.auth.auth import verify_token
+from app.auth.auth import decode_access_token
+from app.config import settings
 from app.crud.user_crud import UserCrud
 from app.database.database import get_db
 from app.database.models.user import User
@@ -20,12 +21,19 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    email = verify_token(token)
-    if email is None:
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
         raise credentials_exception
 
-    user = UserCrud.get_by_email(db, email=email)
-    if user is None:
+    email = payload["sub"]
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = UserCrud.get_cached(db, user_id)
+    else:
+        # Tokens issued before the uid claim was added
+        user = UserCrud.get_by_email(db, email=email)
+
+    if user is None or user.email != email:
         raise credentials_exception
 
     return user
@@ -35,4 +43,11 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get the current user, requiring them to be listed in ADMIN_EMAILS."""
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
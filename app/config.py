@@ -7,12 +7,117 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api"
 
     DATABASE_URL: str = "sqlite+pysqlite:///./data/money_intelligence.db"
-    DATABASE_ECHO: bool = True
+    DATABASE_ECHO: bool = False
+
+    # Slow query log (statements over the threshold are kept with their query plan)
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_CAPTURE_PLANS: bool = True
+
+    # Emails of users allowed to access /api/admin endpoints
+    ADMIN_EMAILS: list[str] = []
 
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 3000
 
+    # Password hashing (bcrypt runs in its own bounded thread pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Decoded tokens and user rows cached by get_current_user
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Categories, tags and budgets loaded into the assistant context (invalidated on writes)
+    USER_CONTEXT_CACHE_SIZE: int = 1000
+    USER_CONTEXT_CACHE_TTL_SECONDS: int = 600
+
+    # Analytics tool results memoized per conversation (invalidated on writes)
+    TOOL_MEMO_CACHE_SIZE: int = 2000
+    TOOL_MEMO_TTL_SECONDS: int = 900
+
+    # Logging (records go through a queue; the chat stream's per-event logs are sampled)
+    LOG_LEVEL: str = "INFO"
+    STREAM_EVENT_LOG_LEVEL: str = "WARNING"  # Set to DEBUG to log stream events
+    STREAM_EVENT_SAMPLE_RATES: dict[str, float] = {"on_chat_model_stream": 0.01}
+
+    # Full chat stream event traces for these users, written to a bounded rotating file
+    STREAM_TRACE_USER_IDS: list[int] = []
+    STREAM_TRACE_FILE: str = "logs/stream_traces.log"
+    STREAM_TRACE_MAX_BYTES: int = 5_000_000
+    STREAM_TRACE_BACKUP_COUNT: int = 2
+
+    # SSE framing of chat streams: text chunks merged over a short window, disconnects polled on a timer
+    SSE_COALESCE_WINDOW_SECONDS: float = 0.05
+    SSE_COALESCE_MAX_CHARS: int = 512
+    SSE_DISCONNECT_CHECK_SECONDS: float = 1.0
+
+    # Resumable chat streams (app/assistant/stream_replay.py); Redis shares turns between worker processes
+    STREAM_REPLAY_MAX_EVENTS: int = 1000
+    STREAM_REPLAY_TTL_SECONDS: int = 300  # How long a finished turn stays resumable
+    STREAM_REPLAY_POLL_SECONDS: float = 0.25
+    STREAM_REPLAY_REDIS_URL: str = ""  # Needs the "redis" extra (uv sync --extra redis)
+
+    # Complete answers to first-turn questions, replayed while the user's data and the date are unchanged
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+
+    # LLM titles of new conversations are generated alongside the answer; the stream's end waits this long for one
+    TITLE_WAIT_SECONDS: float = 2.0
+
+    # Conversation history sent to the assistant: newest messages up to a token budget,
+    # older turns folded into a rolling summary in the background
+    HISTORY_TOKEN_BUDGET: int = 4000
+    HISTORY_MAX_MESSAGES: int = 100
+    HISTORY_SUMMARY_MODEL: str = "claude-haiku-4-5-20251001"
+    HISTORY_SUMMARY_MAX_TOKENS: int = 400
+    HISTORY_TOOL_RESULT_MAX_CHARS: int = 4000  # Longer read-only tool results are not kept with the answer
+
+    # Rule-based transaction parser tried before the agent; inputs below the confidence go to the agent
+    FAST_PARSER_ENABLED: bool = True
+    FAST_PARSER_MIN_CONFIDENCE: float = 0.8
+    FAST_PARSER_MAX_INPUT_LENGTH: int = 200
+
+    # Per-user naive Bayes category/tag classifier (kept current from committed writes)
+    CLASSIFIER_CACHE_SIZE: int = 1000
+    CLASSIFIER_TTL_SECONDS: int = 86400
+    CLASSIFIER_MAX_TRAINING_ROWS: int = 5000
+    CLASSIFIER_MIN_PROBABILITY: float = 0.85
+    CLASSIFIER_MIN_TAG_EXAMPLES: int = 3
+
+    # Users with more categories/tags than the threshold only get the most relevant ones in prompts
+    TAXONOMY_SHORTLIST_THRESHOLD: int = 40
+    TAXONOMY_SHORTLIST_SIZE: int = 15
+
+    # Concurrent LLM calls: global and per-user caps; calls beyond them queue by priority
+    LLM_MAX_CONCURRENT: int = 8
+    LLM_MAX_CONCURRENT_PER_USER: int = 2
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 60.0
+
+    # Retries, deadlines and hedging of LLM calls (app/llm/policy.py)
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    LLM_CALL_DEADLINE_SECONDS: float = 90.0
+    LLM_BACKGROUND_DEADLINE_SECONDS: float = 30.0
+    LLM_HEDGE_AFTER_SECONDS: float = 0.0  # Hedge interactive calls with no first chunk after this long; 0 disables
+
+    # Chat model provider: "anthropic", or "fake" for the scripted offline model in app/llm/fake.py
+    LLM_PROVIDER: str = "anthropic"
+    FAKE_LLM_FIRST_TOKEN_SECONDS: float = 0.4
+    FAKE_LLM_TOKENS_PER_SECOND: float = 60.0
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_SLOW_RATE: float = 0.0
+    FAKE_LLM_SLOW_SECONDS: float = 5.0
+    FAKE_LLM_SEED: int = 0
+    FAKE_LLM_SCRIPT_FILE: str = ""  # JSON {component: {"preamble": "...", "tool_calls": [...], "reply": "..."}} overriding the defaults
+
     ANTHROPIC_API_KEY: str
 
     # Phoenix Observability
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, case
 from datetime import datetime
 
+from app.dates import month_date_range
 from app.database.models.account import Account
 from app.database.models.transaction import Transaction
 from app.database.models.enums import TransactionType
@@ -79,6 +80,16 @@ class AccountCrud:
             return True
         return False
 
+    @staticmethod
+    def get_current_balance(db: Session, account: Account) -> float:
+        """Initial balance plus the signed sum of the account's transactions, computed in SQL"""
+        signed_amount = case(
+            (Transaction.type == TransactionType.INCOME, Transaction.amount),
+            else_=-Transaction.amount,
+        )
+        total = db.query(func.sum(signed_amount)).filter(Transaction.account_id == account.id).scalar() or 0
+        return float(account.initial_balance or 0) + float(total)
+
     @staticmethod
     def get_monthly_stats(db: Session, user_id: int, account_id: int | None = None) -> dict:
         if account_id:
@@ -100,18 +111,17 @@ class AccountCrud:
                 }
 
         now = datetime.now()
-        current_month = now.month
-        current_year = now.year
+        month_start, month_end = month_date_range(now.month, now.year)
 
         # Calculate total balance across all accounts
-        total_balance = sum(float(acc.current_balance) for acc in accounts)
+        total_balance = sum(AccountCrud.get_current_balance(db, acc) for acc in accounts)
 
         # Calculate monthly income (filter by account_id if specified)
         income_query = db.query(func.sum(Transaction.amount)).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.INCOME,
-            extract('month', Transaction.date) == current_month,
-            extract('year', Transaction.date) == current_year
+            Transaction.date >= month_start,
+            Transaction.date < month_end
         )
         if account_id:
             income_query = income_query.filter(Transaction.account_id == account_id)
@@ -121,8 +131,8 @@ class AccountCrud:
         expenses_query = db.query(func.sum(Transaction.amount)).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.EXPENSE,
-            extract('month', Transaction.date) == current_month,
-            extract('year', Transaction.date) == current_year
+            Transaction.date >= month_start,
+            Transaction.date < month_end
         )
         if account_id:
             expenses_query = expenses_query.filter(Transaction.account_id == account_id)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.dates import month_date_range
 from app.database.models.budget import Budget
 from app.database.models.transaction import Transaction
 from app.database.models.enums import TransactionType
@@ -71,14 +72,15 @@ class BudgetCrud:
             now = datetime.now()
             month = month or now.month
             year = year or now.year
+        month_start, month_end = month_date_range(month, year)
 
         # Sum expenses for this category in the specified month
         spent = db.query(func.sum(Transaction.amount)).filter(
             Transaction.user_id == user_id,
             Transaction.category_id == budget.category_id,
             Transaction.type == TransactionType.EXPENSE,
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
+            Transaction.date >= month_start,
+            Transaction.date < month_end
         ).scalar() or Decimal(0)
 
         return {
@@ -97,6 +99,7 @@ class BudgetCrud:
             now = datetime.now()
             month = month or now.month
             year = year or now.year
+        month_start, month_end = month_date_range(month, year)
 
         result = []
         for budget in budgets:
@@ -105,8 +108,8 @@ class BudgetCrud:
                 Transaction.user_id == user_id,
                 Transaction.category_id == budget.category_id,
                 Transaction.type == TransactionType.EXPENSE,
-                extract('month', Transaction.date) == month,
-                extract('year', Transaction.date) == year
+                Transaction.date >= month_start,
+                Transaction.date < month_end
             ).scalar() or Decimal(0)
 
             budget_dict = {
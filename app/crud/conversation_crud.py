@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
 from app.database.models.conversation import Conversation, Message
+from app.llm.tokens import estimate_tokens
 
 
 class ConversationCrud:
@@ -93,6 +94,23 @@ class ConversationCrud:
             db.refresh(conversation)
         return conversation
 
+    @staticmethod
+    def update_summary(db: Session, conversation_id: int, summary: str, through_message_id: int) -> None:
+        """
+        Store the rolling summary of a conversation's older turns.
+
+        Args:
+            db: Database session
+            conversation_id: Conversation ID
+            summary: Summary text
+            through_message_id: Newest message ID the summary covers
+        """
+        db.query(Conversation).filter(Conversation.id == conversation_id).update({
+            Conversation.summary: summary,
+            Conversation.summary_through_message_id: through_message_id,
+        }, synchronize_session=False)
+        db.commit()
+
     @staticmethod
     def delete(db: Session, conversation_id: int, user_id: int) -> bool:
         """
@@ -159,7 +177,8 @@ class MessageCrud:
             conversation_id=conversation_id,
             role=role,
             content=content,
-            tool_calls_summary=tool_calls_summary
+            tool_calls_summary=tool_calls_summary,
+            token_estimate=estimate_tokens(content)
         )
         db.add(message)
         db.commit()
@@ -199,6 +218,57 @@ class MessageCrud:
 
         return query.all()
 
+    @staticmethod
+    def get_latest_after(
+        db: Session,
+        conversation_id: int,
+        after_message_id: Optional[int] = None,
+        limit: int = 100
+    ) -> List[Message]:
+        """
+        Get the newest messages of a conversation, newest first.
+
+        Args:
+            db: Database session
+            conversation_id: Conversation ID
+            after_message_id: Only return messages with a greater ID (e.g. not yet summarized)
+            limit: Maximum number of messages to return
+
+        Returns:
+            List of messages in reverse chronological order
+        """
+        query = db.query(Message).filter(Message.conversation_id == conversation_id)
+        if after_message_id is not None:
+            query = query.filter(Message.id > after_message_id)
+        return query.order_by(desc(Message.created_at), desc(Message.id)).limit(limit).all()
+
+    @staticmethod
+    def get_range(
+        db: Session,
+        conversation_id: int,
+        after_message_id: Optional[int],
+        through_message_id: int
+    ) -> List[Message]:
+        """
+        Get messages with after_message_id < id <= through_message_id in chronological order.
+
+        Args:
+            db: Database session
+            conversation_id: Conversation ID
+            after_message_id: Exclusive lower bound (None for the start of the conversation)
+            through_message_id: Inclusive upper bound
+
+        Returns:
+            List of messages in chronological order
+        """
+        query = db.query(Message).filter(
+            Message.conversation_id == conversation_id,
+            Message.id <= through_message_id
+        )
+        if after_message_id is not None:
+            query = query.filter(Message.id > after_message_id)
+        return query.order_by(Message.created_at, Message.id).all()
+
     @staticmethod
     def delete_conversation_messages(db: Session, conversation_id: int) -> int:
         """
@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from datetime import date
+
+from sqlalchemy.orm import Session, selectinload
 
 from app.database.models.transaction import Transaction
 from app.database.models.tag import Tag
@@ -27,6 +29,63 @@ class TransactionCrud:
     def get_all(db: Session, user_id: int):
         return db.query(Transaction).filter(Transaction.user_id == user_id).all()
 
+    @staticmethod
+    def get_recent(db: Session, user_id: int, since: date, limit: int = 50):
+        return (
+            db.query(Transaction)
+            .filter(Transaction.user_id == user_id, Transaction.date >= since)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def get_category_history(db: Session, user_id: int, limit: int = 1000):
+        """
+        Get (description, category_id, type) of the user's newest categorized transactions.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            limit: Maximum number of rows
+
+        Returns:
+            List of row tuples, newest first
+        """
+        return (
+            db.query(Transaction.description, Transaction.category_id, Transaction.type)
+            .filter(
+                Transaction.user_id == user_id,
+                Transaction.category_id.isnot(None),
+                Transaction.description.isnot(None),
+            )
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def get_training_rows(db: Session, user_id: int, limit: int = 5000):
+        """
+        Get the user's newest categorized transactions with their tags loaded.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            limit: Maximum number of transactions
+
+        Returns:
+            List of transactions, newest first
+        """
+        return (
+            db.query(Transaction)
+            .options(selectinload(Transaction.tags))
+            .filter(Transaction.user_id == user_id, Transaction.category_id.isnot(None))
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .limit(limit)
+            .all()
+        )
+
     @staticmethod
     def get_by_id(db: Session, transaction_id: int, user_id: int):
         return db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
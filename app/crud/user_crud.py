@@ -1,24 +1,55 @@
-from sqlalchemy.orm import Session
+import logging
 
-from app.auth.auth import get_password_hash, verify_password
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.auth.auth import PasswordHashingBusyError, password_hasher
+from app.cache import TTLCache
+from app.config import settings
 from app.crud.account_crud import AccountCrud
 from app.crud.category_crud import CategoryCrud
 from app.database.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# Column values of recently authenticated users, keyed by user id
+_user_cache = TTLCache(max_size=settings.USER_CACHE_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
+logger = logging.getLogger(__name__)
+
 
 class UserCrud:
     @staticmethod
     def get(db: Session, user_id: int) -> User | None:
         return db.query(User).filter(User.id == user_id).first()
 
+    @staticmethod
+    def get_cached(db: Session, user_id: int) -> User | None:
+        """
+        Primary-key lookup served from the identity cache when possible.
+        Cache hits are merged into db without a query, so the returned user can be modified and committed as usual.
+        """
+        columns = _user_cache.get(user_id)
+        if columns is None:
+            user = UserCrud.get(db, user_id)
+            if user is not None:
+                _user_cache.set(user_id, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+            return user
+
+        user = User(**columns)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    @staticmethod
+    def invalidate_cache(user_id: int) -> None:
+        _user_cache.delete(user_id)
+
     @staticmethod
     def get_by_email(db: Session, email: str) -> User | None:
         return db.query(User).filter(User.email == email).first()
 
     @staticmethod
-    def create(db: Session, obj_in: UserCreate) -> User:
-        hashed_password = get_password_hash(obj_in.password)
+    async def create(db: Session, obj_in: UserCreate) -> User:
+        hashed_password = await password_hasher.hash(obj_in.password)
         user = User(
             name=obj_in.name,
             email=obj_in.email,
@@ -32,12 +63,23 @@ class UserCrud:
         return user
 
     @staticmethod
-    def authenticate(db: Session, email: str, password: str) -> User | None:
+    async def authenticate(db: Session, email: str, password: str) -> User | None:
         user = UserCrud.get_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
+
+        # Transparently upgrade hashes made with a different BCRYPT_ROUNDS. Best effort: the password
+        # is already verified, so a full hashing queue skips the upgrade (retried on the next login)
+        if password_hasher.needs_rehash(user.hashed_password):
+            try:
+                user.hashed_password = await password_hasher.hash(password)
+            except PasswordHashingBusyError:
+                logger.info(f"Password hashing queue full, not rehashing the password of user {user.id}")
+                return user
+            db.commit()
+            UserCrud.invalidate_cache(user.id)
         return user
 
     @staticmethod
@@ -52,4 +94,5 @@ class UserCrud:
 
         db.commit()
         db.refresh(user)
+        UserCrud.invalidate_cache(user_id)
         return user
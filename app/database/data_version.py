@@ -0,0 +1,61 @@
+"""Per-user data versions used to invalidate caches derived from a user's financial data"""
+
+import threading
+import uuid
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+# Tables whose rows feed the assistant's context, analytics and cached answers
+TRACKED_TABLES = ("transactions", "categories", "tags", "budgets", "accounts")
+
+_versions: dict[int, int] = {}
+_lock = threading.Lock()
+
+# Versions live in this process and restart at 0; persisted stamps only compare equal within it
+_EPOCH = uuid.uuid4().hex
+
+
+def get_data_version(user_id: int) -> int:
+    """Current data version of a user; changes whenever a tracked row of theirs is committed"""
+    with _lock:
+        return _versions.get(user_id, 0)
+
+
+def get_data_stamp(user_id: int) -> str:
+    """Data version of a user qualified by the process, for values persisted outside it"""
+    return f"{_EPOCH}:{get_data_version(user_id)}"
+
+
+def bump_data_version(user_id: int) -> int:
+    """Mark a user's data as changed, e.g. after a bulk UPDATE that bypasses the session"""
+    with _lock:
+        version = _versions.get(user_id, 0) + 1
+        _versions[user_id] = version
+        return version
+
+
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, "__tablename__", None) in TRACKED_TABLES:
+            user_id = getattr(obj, "user_id", None)
+            if user_id is not None:
+                changed.add(user_id)
+
+
+def _bump_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        bump_data_version(user_id)
+
+
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
+
+
+def register_data_version_listeners(session_factory: sessionmaker) -> None:
+    """Bump the data version of every user whose tracked rows a committed transaction touched"""
+    event.listen(session_factory, "after_flush", _collect_changed_users)
+    event.listen(session_factory, "after_commit", _bump_changed_users)
+    event.listen(session_factory, "after_rollback", _discard_changed_users)
@@ -4,6 +4,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.config import settings
+from app.database.data_version import register_data_version_listeners
+from app.database.slow_query_log import SlowQueryLog
 
 engine = create_engine(
     settings.DATABASE_URL,
@@ -11,7 +13,16 @@ engine = create_engine(
     echo=settings.DATABASE_ECHO
 )
 
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    capture_plans=settings.SLOW_QUERY_CAPTURE_PLANS,
+)
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.attach(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+register_data_version_listeners(SessionLocal)
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -18,6 +18,8 @@ class Conversation(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(200), default="New Conversation", nullable=False)
+    summary = Column(Text, nullable=True)  # Rolling summary of turns older than the history window
+    summary_through_message_id = Column(Integer, nullable=True)  # Last message covered by the summary
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -49,6 +51,7 @@ class Message(Base):
     role = Column(String(20), nullable=False)  # "user", "assistant", "system"
     content = Column(Text, nullable=False)
     tool_calls_summary = Column(Text, nullable=True)  # JSON string of tool call metadata
+    token_estimate = Column(Integer, nullable=True)  # Approximate prompt tokens of content
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, String, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 
 from app.database.models.base import BaseDbModel, Base
@@ -30,6 +30,10 @@ class TransactionTag(Base):
     transaction_id = Column(Integer, ForeignKey('transactions.id'), primary_key=True)
     tag_id = Column(Integer, ForeignKey('tags.id'), primary_key=True)
 
+    __table_args__ = (
+        Index('ix_transaction_tags_tag_id', 'tag_id', 'transaction_id'),
+    )
+
 
 class ReminderTag(Base):
     __tablename__ = 'reminder_tags'
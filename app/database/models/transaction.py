@@ -24,7 +24,9 @@ class Transaction(BaseDbModel):
 
     __table_args__ = (
         Index('ix_transaction_user_date', 'user_id', 'date'),
-        Index('ix_transaction_user_category', 'user_id', 'category_id'),
+        Index('ix_transaction_user_account_type_date', 'user_id', 'account_id', 'type', 'date', 'category_id', 'amount'),
+        Index('ix_transaction_user_category_type_date', 'user_id', 'category_id', 'type', 'date', 'amount'),
+        Index('ix_transaction_account_type', 'account_id', 'type', 'amount'),
     )
 
     @validates('amount')
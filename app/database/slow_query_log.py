@@ -0,0 +1,194 @@
+"""Slow query log with captured query plans"""
+
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Label of the route or tool currently issuing queries (e.g. "GET /api/budget/")
+_query_origin: ContextVar[Optional[str]] = ContextVar("query_origin", default=None)
+
+MAX_PARAMETER_LENGTH = 200
+
+
+@contextmanager
+def query_origin(label: str):
+    """
+    Attribute all queries issued inside the block to the given label.
+    Nested labels are joined, e.g. "POST /api/assistant/chat-stream > tool:list_tags".
+    """
+    parent = _query_origin.get()
+    token = _query_origin.set(f"{parent} > {label}" if parent else label)
+    try:
+        yield
+    finally:
+        _query_origin.reset(token)
+
+
+def track_query_origin(func):
+    """Decorator attributing queries issued by an assistant tool (sync or async) to that tool"""
+    label = f"tool:{func.__name__}"
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with query_origin(label):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with query_origin(label):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class QueryOriginMiddleware:
+    """ASGI middleware labelling queries with the HTTP route that issued them"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_origin(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+
+def _format_parameters(parameters: Any) -> Any:
+    """Make bound parameters JSON-friendly and keep long values short"""
+    def shorten(value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        text = str(value)
+        if len(text) > MAX_PARAMETER_LENGTH:
+            return text[:MAX_PARAMETER_LENGTH] + "..."
+        return text
+
+    if isinstance(parameters, dict):
+        return {key: shorten(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [shorten(value) for value in parameters]
+    return shorten(parameters)
+
+
+class SlowQueryLog:
+    """
+    Records statements slower than a threshold in a bounded ring buffer,
+    together with their parameters, query plan and calling route or tool.
+    """
+
+    def __init__(self, threshold_ms: float, max_entries: int = 100, capture_plans: bool = True):
+        self.threshold_ms = threshold_ms
+        self.capture_plans = capture_plans
+        self._entries: deque[dict[str, Any]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        """Register timing hooks on the engine"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Recorded slow queries, most recent first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_time")
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        origin = _query_origin.get()
+        plan = None
+        if self.capture_plans and not executemany:
+            plan = explain_statement(conn, statement, parameters)
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters": _format_parameters(parameters),
+            "plan": plan,
+            "origin": origin,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+        logger.warning(f"Slow query ({duration_ms:.0f}ms) from {origin or 'unknown'}: {statement[:200]}")
+
+
+def explain_statement(conn, statement: str, parameters: Any, analyze: bool = True) -> Optional[str]:
+    """
+    Capture the plan of a statement on the same DBAPI connection, so it sees the same transaction.
+    EXPLAIN ANALYZE re-runs the statement, so Postgres only analyzes SELECTs.
+
+    Args:
+        conn: SQLAlchemy Connection the statement ran on
+        statement: SQL string with DBAPI placeholders
+        parameters: Bound parameters for the statement
+        analyze: Use EXPLAIN (ANALYZE, BUFFERS) on Postgres
+
+    Returns:
+        Plan text, one line per plan node, or None if the dialect is unsupported
+    """
+    dialect = conn.dialect.name
+    is_select = statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze and is_select else "EXPLAIN "
+    else:
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # A failed EXPLAIN must not abort the caller's transaction
+            cursor.execute("SAVEPOINT explain_statement")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            if dialect == "postgresql":
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_statement")
+            return f"Plan unavailable: {e}"
+        if dialect == "postgresql":
+            cursor.execute("RELEASE SAVEPOINT explain_statement")
+    except Exception as e:
+        logger.debug(f"Could not capture query plan: {e}")
+        return None
+    finally:
+        cursor.close()
+
+    if dialect == "sqlite":
+        # Rows are (id, parent, notused, detail)
+        return "\n".join(str(row[-1]) for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
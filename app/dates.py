@@ -0,0 +1,20 @@
+"""Date range helpers shared by the CRUD and analytics layers"""
+
+from datetime import date
+
+
+def month_date_range(month: int, year: int) -> tuple[date, date]:
+    """
+    Get the [start, end) date range of a calendar month.
+    Filtering on a range instead of extract('month', ...) lets the date indexes be used.
+
+    Args:
+        month: Month number (1-12)
+        year: Year
+
+    Returns:
+        Tuple of first day of the month and first day of the following month
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
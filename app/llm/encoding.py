@@ -0,0 +1,55 @@
+"""Compact text encodings for data embedded in LLM prompts and tool outputs
+
+Tab-separated tables and id=name maps carry the same facts as Python dict reprs,
+JSON or one prose line per row in a fraction of the tokens.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Sequence
+
+# Free-text fields (descriptions, notes) are cut to this many characters
+MAX_FIELD_LENGTH = 40
+
+
+def compact_value(value: Any, max_length: int = MAX_FIELD_LENGTH) -> str:
+    """Render one field: numbers without trailing zeros, ISO dates, single-line trimmed text"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "y" if value else "n"
+    if isinstance(value, (float, Decimal)):
+        text = f"{float(value):.2f}".rstrip("0").rstrip(".")
+        return text if text != "-0" else "0"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    text = " ".join(str(value).split())
+    if len(text) > max_length:
+        text = text[:max_length - 1] + "…"
+    return text
+
+
+def encode_table(columns: Sequence[str], rows: Iterable[Sequence[Any]], max_length: int = MAX_FIELD_LENGTH) -> str:
+    """
+    Encode rows as a tab-separated table with a header line.
+
+    Args:
+        columns: Column names
+        rows: Row values in column order
+        max_length: Maximum length of text fields
+
+    Returns:
+        Table text, or an empty string when there are no rows
+    """
+    lines = ["\t".join(compact_value(value, max_length) for value in row) for row in rows]
+    if not lines:
+        return ""
+    return "\t".join(columns) + "\n" + "\n".join(lines)
+
+
+def encode_id_map(items: Iterable[Mapping[str, Any]], label: str = "name", key: str = "id") -> str:
+    """Encode items as "id=label" pairs sorted by id, e.g. "1=Food|2=Rent" ("-" when empty)"""
+    pairs = sorted((item[key], item[label]) for item in items)
+    if not pairs:
+        return "-"
+    return "|".join(f"{item_id}={compact_value(name)}" for item_id, name in pairs)
@@ -0,0 +1,236 @@
+"""Offline stand-in for ChatAnthropic
+
+Selected with LLM_PROVIDER=fake (see app.llm.models.create_chat_model). The
+model answers from a script per component instead of calling the API. On the
+first turn it emits the component's scripted tool calls (after an optional
+preamble of text, as Claude often announces them), and after tool
+results (or when it has no tool calls) it streams the scripted reply word by
+word. Latency, token rate and injected errors come from the FAKE_LLM_*
+settings, and a seeded random generator makes runs repeatable. Usage reports
+prompt cache reads and writes for the system prompt's cache_control
+breakpoints, as the API would, so cache accounting works offline. Used by
+benchmarks/chat_load.py to measure the app without spending on API calls.
+"""
+
+import asyncio
+import json
+import random
+import re
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+import anthropic
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field, PrivateAttr
+
+from app.config import settings
+from app.llm.tokens import estimate_tokens
+
+_WORD_RE = re.compile(r"\S+\s*")
+
+# What each component says by default; FAKE_LLM_SCRIPT_FILE can override any of them
+DEFAULT_SCRIPTS: dict[str, dict[str, Any]] = {
+    "assistant": {
+        "tool_calls": [{"name": "get_spending_by_category", "args": {"period": "month"}}],
+        "reply": (
+            "Here is how your spending breaks down this month. Groceries and dining out make up the largest "
+            "share, followed by transport and subscriptions. Compared with last month you spent a little more "
+            "on dining out and a little less on transport. If you want to save more, setting a monthly budget "
+            "for dining out would be a good place to start, and I can create one for you."
+        ),
+    },
+    "agent": {
+        "tool_calls": [{
+            "name": "create_transaction_preview",
+            "args": {"amount": 12.5, "description": "Coffee and sandwich", "category_id": 1, "transaction_type": "expense"},
+        }],
+        "reply": "Created the transaction preview.",
+    },
+    "advice": {
+        "reply": (
+            "Start by tracking where your money goes for a month, then set budgets for the two or three "
+            "categories where you spend the most. Small, consistent changes add up faster than big cuts."
+        ),
+    },
+    "title": {"reply": "Monthly Spending Overview"},
+    "history_summary": {"reply": "The user asked about their monthly spending by category."},
+}
+
+
+def load_script(component: str) -> dict[str, Any]:
+    """Script for a component: the default, overridden by the component's entry in FAKE_LLM_SCRIPT_FILE"""
+    script = dict(DEFAULT_SCRIPTS.get(component, {"reply": "OK."}))
+    if settings.FAKE_LLM_SCRIPT_FILE:
+        overrides = json.loads(Path(settings.FAKE_LLM_SCRIPT_FILE).read_text())
+        script.update(overrides.get(component, {}))
+    return script
+
+
+def _overloaded_error() -> anthropic.APIStatusError:
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(529, request=request)
+    return anthropic.OverloadedError(
+        "Overloaded (injected by the fake LLM)",
+        response=response,
+        body={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+    )
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic scripted chat model that streams at a configurable rate"""
+
+    component: str = "assistant"
+    tool_calls: list[dict[str, Any]] = Field(default_factory=list)
+    preamble: str = ""  # Text streamed before the tool calls
+    reply: str = "OK."
+    first_token_seconds: float = 0.0
+    tokens_per_second: float = 0.0  # 0 streams without delay
+    error_rate: float = 0.0  # Share of requests failing with a 529 before their first chunk
+    slow_rate: float = 0.0  # Share of requests waiting slow_seconds more before their first chunk
+    slow_seconds: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    _calls: int = PrivateAttr(default=0)
+    _cached_prefixes: set[str] = PrivateAttr(default_factory=set)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(f"{self.seed}:{self.component}")
+
+    @classmethod
+    def for_component(cls, component: str) -> "FakeChatModel":
+        """Model with the component's script and the FAKE_LLM_* settings"""
+        script = load_script(component)
+        return cls(
+            component=component,
+            tool_calls=script.get("tool_calls", []),
+            preamble=script.get("preamble", ""),
+            reply=script.get("reply", "OK."),
+            first_token_seconds=settings.FAKE_LLM_FIRST_TOKEN_SECONDS,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            slow_rate=settings.FAKE_LLM_SLOW_RATE,
+            slow_seconds=settings.FAKE_LLM_SLOW_SECONDS,
+            seed=settings.FAKE_LLM_SEED,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        # Scripted tool calls do not depend on the bound schemas
+        return self
+
+    def _wants_tools(self, messages: list[BaseMessage]) -> bool:
+        return bool(self.tool_calls) and not (messages and isinstance(messages[-1], ToolMessage))
+
+    def _prompt_cache_usage(self, messages: list[BaseMessage]) -> dict[str, int]:
+        """
+        Cache read and creation tokens for the system prompt's breakpoints.
+
+        Like the API, the longest prefix ending at a breakpoint that was sent before is read
+        from the cache and the rest, up to the last breakpoint, is written to it. Tool
+        definitions are not modelled since bind_tools ignores them.
+        """
+        prefix = ""
+        breakpoints = []
+        for message in messages:
+            if not isinstance(message, SystemMessage) or isinstance(message.content, str):
+                continue
+            for block in message.content:
+                if not isinstance(block, dict):
+                    continue
+                prefix += block.get("text", "")
+                if block.get("cache_control"):
+                    breakpoints.append(prefix)
+        if not breakpoints:
+            return {"cache_read": 0, "cache_creation": 0}
+
+        cache_read = max((estimate_tokens(p) for p in breakpoints if p in self._cached_prefixes), default=0)
+        self._cached_prefixes.update(breakpoints)
+        return {"cache_read": cache_read, "cache_creation": estimate_tokens(breakpoints[-1]) - cache_read}
+
+    def _chunks(self, messages: list[BaseMessage]) -> Iterator[AIMessageChunk]:
+        """The response as it is streamed: an empty start chunk, then preamble words and tool calls or reply words, then usage"""
+        self._calls += 1
+        yield AIMessageChunk(content="")
+        if self._wants_tools(messages):
+            output = self.preamble
+            for word in _WORD_RE.findall(self.preamble):
+                yield AIMessageChunk(content=word)
+            for index, call in enumerate(self.tool_calls):
+                args = json.dumps(call.get("args", {}))
+                output += args
+                yield AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": call["name"],
+                    "args": args,
+                    "id": f"fake_{self.component}_{self._calls}_{index}",
+                    "index": index,
+                }])
+        else:
+            output = self.reply
+            for word in _WORD_RE.findall(self.reply):
+                yield AIMessageChunk(content=word)
+        input_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        output_tokens = estimate_tokens(output)
+        yield AIMessageChunk(content="", usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": self._prompt_cache_usage(messages),
+        })
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Synchronous calls answer at once; latency and errors are only simulated when streaming
+        response = None
+        for chunk in self._chunks(messages):
+            response = chunk if response is None else response + chunk
+        message = AIMessage(
+            content=response.content,
+            tool_calls=response.tool_calls,
+            usage_metadata=response.usage_metadata,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay = self.first_token_seconds
+        if self._rng.random() < self.slow_rate:
+            delay += self.slow_seconds
+        fail = self._rng.random() < self.error_rate
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise _overloaded_error()
+
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for chunk in self._chunks(messages):
+            if interval and chunk.content:
+                await asyncio.sleep(interval)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
@@ -0,0 +1,39 @@
+"""Chat model construction for every LLM call site
+
+LLM_PROVIDER selects the Anthropic API ("anthropic") or the scripted offline
+stand-in in app.llm.fake ("fake"). Anthropic clients are created with
+max_retries=0 because app.llm.policy does the retrying.
+"""
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.language_models import BaseChatModel
+
+from app.config import settings
+
+
+def create_chat_model(component: str, model: str, temperature: float, max_tokens: int) -> BaseChatModel:
+    """
+    Chat model for a call site.
+
+    Args:
+        component: Call site name, e.g. "assistant" or "title" (picks the fake model's script)
+        model: Anthropic model name
+        temperature: Sampling temperature
+        max_tokens: Maximum output tokens
+
+    Returns:
+        ChatAnthropic, or FakeChatModel when LLM_PROVIDER is "fake"
+    """
+    if settings.LLM_PROVIDER == "fake":
+        from app.llm.fake import FakeChatModel
+        return FakeChatModel.for_component(component)
+    if settings.LLM_PROVIDER != "anthropic":
+        raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER!r}")
+
+    return ChatAnthropic(
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        api_key=settings.ANTHROPIC_API_KEY,
+        max_retries=0,
+    )
@@ -0,0 +1,267 @@
+"""Retries, deadlines and hedging for LLM calls
+
+Every model call goes through invoke_llm, which takes the scheduler slot and
+streams the response. A request that fails with a rate limit, overload or
+server error before anything was streamed is retried after a jittered
+exponential backoff (or the provider's retry-after, when longer). The whole
+call, retries included, must finish within a deadline. Interactive calls can
+also be hedged: when no first chunk has arrived after LLM_HEDGE_AFTER_SECONDS,
+a second identical request is raced against the first, and whichever starts
+streaming first is kept while the other is cancelled. The first chunk from
+the API (message_start) carries no text, so the cancelled request never
+reaches the client.
+
+The ChatAnthropic clients are created with max_retries=0 (see
+app.llm.models) so that retries happen only here.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import anthropic
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from app.config import settings
+from app.llm.scheduler import Priority, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Request timeout, conflict, rate limit; 5xx (including 529 overloaded) are retried too
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """An LLM call, with its retries, did not finish within the policy deadline"""
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """How a call is retried, how long it may take, and whether it is hedged"""
+    max_attempts: int
+    deadline_seconds: float
+    hedge_after_seconds: Optional[float] = None
+
+
+INTERACTIVE_POLICY = CallPolicy(
+    max_attempts=settings.LLM_MAX_ATTEMPTS,
+    deadline_seconds=settings.LLM_CALL_DEADLINE_SECONDS,
+    hedge_after_seconds=settings.LLM_HEDGE_AFTER_SECONDS or None,
+)
+BACKGROUND_POLICY = CallPolicy(
+    max_attempts=settings.LLM_MAX_ATTEMPTS,
+    deadline_seconds=settings.LLM_BACKGROUND_DEADLINE_SECONDS,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request may succeed when sent again"""
+    if isinstance(error, anthropic.APIConnectionError):  # Includes client-side timeouts
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay requested by the provider in retry-after-ms or retry-after (seconds or an HTTP date)"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error: BaseException) -> float:
+    """Full-jitter exponential backoff after the given (1-based) attempt, at least the provider's retry-after"""
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+    delay = random.uniform(0, ceiling)
+    retry_after = retry_after_seconds(error)
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+class LLMCallStats:
+    """Totals of calls, retries, hedges and failures since startup; used from the event loop only"""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.failures = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "failures": self.failures,
+        }
+
+
+llm_call_stats = LLMCallStats()
+
+
+class _Attempt:
+    """One request: waits for a slot, then streams the response into a single message"""
+
+    def __init__(self, race: "_Race", slot_config: Optional[RunnableConfig]):
+        self.race = race
+        self.task = asyncio.create_task(self._run(slot_config))
+
+    async def _run(self, slot_config: Optional[RunnableConfig]) -> BaseMessage:
+        race = self.race
+        response = None
+        try:
+            async with llm_scheduler.slot(race.user_id, race.priority, slot_config):
+                async for chunk in race.llm.astream(race.input, config=race.config):
+                    race.claim(self)
+                    if chunk.content or getattr(chunk, "tool_call_chunks", None):
+                        race.streamed = True
+                    response = chunk if response is None else response + chunk
+            race.claim(self)
+            return message_chunk_to_message(response)
+        finally:
+            race.progress.set()
+
+
+class _Race:
+    """A request and its optional hedge; the first to stream a chunk wins and the other is cancelled"""
+
+    def __init__(
+        self,
+        llm: Runnable,
+        input: LanguageModelInput,
+        user_id: Optional[int],
+        priority: Priority,
+        config: Optional[RunnableConfig],
+    ):
+        self.llm = llm
+        self.input = input
+        self.user_id = user_id
+        self.priority = priority
+        self.config = config
+        self.attempts: list[_Attempt] = []
+        self.winner: Optional[_Attempt] = None
+        self.streamed = False  # Text or tool calls reached the callbacks, so the client may have seen them
+        self.progress = asyncio.Event()
+
+    def claim(self, attempt: _Attempt) -> None:
+        if self.winner is not None:
+            return
+        self.winner = attempt
+        for other in self.attempts:
+            if other is not attempt:
+                other.task.cancel()
+        self.progress.set()
+
+    async def run(self, hedge_after_seconds: Optional[float]) -> BaseMessage:
+        self.attempts.append(_Attempt(self, self.config))
+        try:
+            if hedge_after_seconds:
+                try:
+                    await asyncio.wait_for(self.progress.wait(), hedge_after_seconds)
+                except TimeoutError:
+                    # Still no first chunk; only the primary reports its queue position to the client
+                    logger.info(f"No first chunk after {hedge_after_seconds}s for user {self.user_id}, hedging")
+                    llm_call_stats.hedges += 1
+                    self.attempts.append(_Attempt(self, None))
+
+            while self.winner is None and not all(attempt.task.done() for attempt in self.attempts):
+                self.progress.clear()
+                await self.progress.wait()
+
+            if self.winner is not None:
+                if self.winner is not self.attempts[0]:
+                    llm_call_stats.hedge_wins += 1
+                return await self.winner.task
+            # Every request failed before streaming; report the primary's error
+            return await self.attempts[0].task
+        finally:
+            for attempt in self.attempts:
+                attempt.task.cancel()
+            await asyncio.gather(*(attempt.task for attempt in self.attempts), return_exceptions=True)
+
+
+async def invoke_llm(
+    llm: Runnable,
+    input: LanguageModelInput,
+    user_id: Optional[int],
+    priority: Priority = Priority.INTERACTIVE,
+    config: Optional[RunnableConfig] = None,
+    policy: Optional[CallPolicy] = None,
+) -> BaseMessage:
+    """
+    Call a chat model under the scheduler, with retries, a deadline and optional hedging.
+
+    Args:
+        llm: Chat model (or a binding of one, e.g. with tools)
+        input: Model input, as for ainvoke
+        user_id: User the call is made for, for the scheduler's per-user cap
+        priority: Scheduler priority class
+        config: Run config of the calling graph node or tool, so streamed chunks and
+            queue positions reach its event stream
+        policy: Retry, deadline and hedging policy (default by priority class)
+
+    Returns:
+        The model's response message
+
+    Raises:
+        LLMDeadlineExceeded: The call did not finish within the policy deadline
+        LLMQueueTimeout: No scheduler slot became free in time
+    """
+    if policy is None:
+        policy = INTERACTIVE_POLICY if priority == Priority.INTERACTIVE else BACKGROUND_POLICY
+    llm_call_stats.calls += 1
+    deadline = time.monotonic() + policy.deadline_seconds
+    deadline_timeout = asyncio.timeout(policy.deadline_seconds)
+    try:
+        async with deadline_timeout:
+            attempt = 1
+            while True:
+                race = _Race(llm, input, user_id, priority, config)
+                try:
+                    return await race.run(policy.hedge_after_seconds)
+                except Exception as error:
+                    # A retry after streamed output would repeat it to the client
+                    if attempt >= policy.max_attempts or race.streamed or not is_retryable(error):
+                        raise
+                    delay = backoff_delay(attempt, error)
+                    if time.monotonic() + delay >= deadline:
+                        raise
+                    logger.warning(
+                        f"LLM call for user {user_id} failed ({type(error).__name__}), "
+                        f"retrying in {delay:.2f}s (attempt {attempt + 1}/{policy.max_attempts})"
+                    )
+                    llm_call_stats.retries += 1
+                    await asyncio.sleep(delay)
+                    attempt += 1
+    except TimeoutError:
+        if deadline_timeout.expired():
+            llm_call_stats.deadline_exceeded += 1
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {policy.deadline_seconds}s deadline") from None
+        llm_call_stats.failures += 1
+        raise
+    except Exception:
+        llm_call_stats.failures += 1
+        raise
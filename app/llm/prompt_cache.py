@@ -0,0 +1,59 @@
+"""Anthropic prompt caching helpers
+
+The API caches the request prefix up to each cache_control breakpoint, in the
+order tools -> system -> messages. Stable parts therefore go first with a
+breakpoint after each (tool definitions, instructions, per-user taxonomy) and
+volatile parts (date, history, the new message) follow. At most four
+breakpoints are allowed per request.
+"""
+
+from typing import Any, Sequence
+
+from langchain_anthropic.chat_models import convert_to_anthropic_tool
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cacheable_tools(tools: Sequence[Any]) -> list[dict[str, Any]]:
+    """
+    Convert tools to Anthropic tool definitions with a cache breakpoint after the last one.
+
+    Args:
+        tools: LangChain tools (or anything bind_tools accepts)
+
+    Returns:
+        Tool definitions to pass to bind_tools
+    """
+    definitions = [dict(convert_to_anthropic_tool(tool)) for tool in tools]
+    if definitions:
+        definitions[-1]["cache_control"] = CACHE_CONTROL
+    return definitions
+
+
+def build_system_message(stable_blocks: Sequence[str], volatile: str = "") -> dict[str, Any]:
+    """
+    Build a system message whose stable blocks each end with a cache breakpoint.
+
+    Args:
+        stable_blocks: Blocks that only change rarely, most stable first
+        volatile: Text that changes between requests (e.g. the current date), not cached
+
+    Returns:
+        System message dict with text content blocks
+    """
+    content = [
+        {"type": "text", "text": block, "cache_control": CACHE_CONTROL}
+        for block in stable_blocks
+        if block
+    ]
+    if volatile:
+        content.append({"type": "text", "text": volatile})
+    return {"role": "system", "content": content}
+
+
+def message_text(message: dict[str, Any]) -> str:
+    """Plain text of a message dict whose content is a string or a list of text blocks"""
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
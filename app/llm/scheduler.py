@@ -0,0 +1,195 @@
+"""Concurrency scheduler for LLM calls
+
+Every model call takes a slot first. Slots are capped globally and per user;
+when none is free the call waits in a queue ordered by priority class
+(interactive chat before background titles and summaries), then by how many
+slots the user already holds, then by arrival. Callers running inside a graph
+pass their RunnableConfig and get "llm_queued" custom events with their queue
+position, which the streams forward to the client as "queued" events.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Name of the custom event reporting a queued call's position
+LLM_QUEUED_EVENT = "llm_queued"
+
+
+class Priority(IntEnum):
+    """Priority classes, lowest value served first"""
+    INTERACTIVE = 0  # A user is waiting on the response (chat, transaction parsing, advice)
+    BACKGROUND = 1  # Titles and history summaries
+
+
+class LLMQueueTimeout(TimeoutError):
+    """A call waited longer than LLM_QUEUE_TIMEOUT_SECONDS for a slot"""
+
+
+class _Waiter:
+    __slots__ = ("user_id", "priority", "sequence", "enqueued_at", "changed", "granted")
+
+    def __init__(self, user_id: Optional[int], priority: Priority, sequence: int):
+        self.user_id = user_id
+        self.priority = priority
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+        self.changed = asyncio.Event()
+        self.granted = False
+
+
+class LLMScheduler:
+    """Global and per-user concurrency caps with a priority queue; used from the event loop only"""
+
+    def __init__(self, max_concurrent: int, max_per_user: int, queue_timeout_seconds: float):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._active = 0
+        self._active_by_user: dict[Optional[int], int] = {}
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._granted = 0
+        self._queued = 0
+        self._timeouts = 0
+        self._max_wait_ms = 0.0
+
+    def _has_capacity(self, user_id: Optional[int]) -> bool:
+        if self._active >= self.max_concurrent:
+            return False
+        return user_id is None or self._active_by_user.get(user_id, 0) < self.max_per_user
+
+    def _acquire(self, user_id: Optional[int]) -> None:
+        self._active += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+        self._granted += 1
+
+    def _release(self, user_id: Optional[int]) -> None:
+        self._active -= 1
+        remaining = self._active_by_user.get(user_id, 1) - 1
+        if remaining:
+            self._active_by_user[user_id] = remaining
+        else:
+            self._active_by_user.pop(user_id, None)
+        self._dispatch()
+
+    def _queue_order(self, waiter: _Waiter) -> tuple[int, int, int]:
+        return waiter.priority, self._active_by_user.get(waiter.user_id, 0), waiter.sequence
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters in queue order, then tell the rest their new positions"""
+        for waiter in sorted(self._waiters, key=self._queue_order):
+            if self._active >= self.max_concurrent:
+                break
+            if self._has_capacity(waiter.user_id):
+                self._waiters.remove(waiter)
+                self._acquire(waiter.user_id)
+                waiter.granted = True
+                waiter.changed.set()
+                self._max_wait_ms = max(self._max_wait_ms, (time.monotonic() - waiter.enqueued_at) * 1000)
+        for waiter in self._waiters:
+            waiter.changed.set()
+
+    def position(self, waiter: _Waiter) -> int:
+        """1-based place of a waiter in the queue"""
+        return sorted(self._waiters, key=self._queue_order).index(waiter) + 1
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: Optional[int],
+        priority: Priority = Priority.INTERACTIVE,
+        config: Optional[RunnableConfig] = None,
+    ) -> AsyncIterator[None]:
+        """
+        Hold an LLM slot for the duration of the block, waiting in the queue if necessary.
+
+        Args:
+            user_id: User the call is made for (None for calls not tied to a user)
+            priority: Priority class of the call
+            config: Run config of the calling graph node or tool; queue positions are
+                dispatched to it as LLM_QUEUED_EVENT custom events
+
+        Raises:
+            LLMQueueTimeout: No slot became free within LLM_QUEUE_TIMEOUT_SECONDS
+        """
+        if not self._waiters and self._has_capacity(user_id):
+            self._acquire(user_id)
+        else:
+            await self._wait(user_id, priority, config)
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+    async def _wait(self, user_id: Optional[int], priority: Priority, config: Optional[RunnableConfig]) -> None:
+        waiter = _Waiter(user_id, priority, next(self._sequence))
+        self._waiters.append(waiter)
+        self._queued += 1
+        # A waiter may be granted right away if it sorts ahead of the others
+        self._dispatch()
+
+        reported = None
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                while not waiter.granted:
+                    position = self.position(waiter)
+                    if position != reported:
+                        reported = position
+                        logger.info(f"LLM call for user {user_id} queued at position {position}")
+                        if config is not None:
+                            await adispatch_custom_event(LLM_QUEUED_EVENT, {"position": position}, config=config)
+                    if waiter.granted:
+                        break
+                    waiter.changed.clear()
+                    await waiter.changed.wait()
+        except TimeoutError:
+            if waiter.granted:
+                return
+            self._waiters.remove(waiter)
+            self._timeouts += 1
+            self._dispatch()
+            raise LLMQueueTimeout(f"LLM queue timeout after {self.queue_timeout_seconds}s") from None
+        except BaseException:
+            # Cancelled while queued: give up the place, or the slot if it was just granted
+            if waiter.granted:
+                self._release(user_id)
+            else:
+                self._waiters.remove(waiter)
+                self._dispatch()
+            raise
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current load and totals since startup"""
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "queued": len(self._waiters),
+            "queued_by_priority": {
+                priority.name.lower(): sum(1 for waiter in self._waiters if waiter.priority == priority)
+                for priority in Priority
+            },
+            "granted_total": self._granted,
+            "queued_total": self._queued,
+            "timeouts_total": self._timeouts,
+            "max_wait_ms": round(self._max_wait_ms, 1),
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrent=settings.LLM_MAX_CONCURRENT,
+    max_per_user=settings.LLM_MAX_CONCURRENT_PER_USER,
+    queue_timeout_seconds=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+)
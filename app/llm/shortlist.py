@@ -0,0 +1,129 @@
+"""Top-k retrieval of a user's categories and tags for prompts
+
+Users with large taxonomies would otherwise send every category and tag with
+each request. A character trigram index over the names (built once per user and
+data version, so category and tag writes rebuild it) picks the ones similar to
+the words of the input; only those are put in the prompt.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable, Optional, Sequence
+
+from app.cache import TTLCache
+from app.config import settings
+
+_WORD_RE = re.compile(r"[^\W_]{3,}")
+
+# A query word matches a name word from this Dice similarity of their trigrams
+MIN_SIMILARITY = 0.6
+
+_indexes = TTLCache(
+    max_size=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.USER_CONTEXT_CACHE_TTL_SECONDS,
+)
+
+
+def _trigrams(word: str) -> frozenset[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass
+class Shortlist:
+    """Items selected for a prompt out of all the user's items"""
+    items: list[dict[str, Any]]
+    total: int
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.items) < self.total
+
+
+class TrigramIndex:
+    """Inverted index from name-word trigrams to items"""
+
+    def __init__(self, items: Sequence[dict[str, Any]], label: str = "name"):
+        self.items = list(items)
+        self._word_trigrams: list[list[frozenset[str]]] = []
+        self._postings: dict[str, set[tuple[int, int]]] = {}
+        for position, item in enumerate(self.items):
+            words = [_trigrams(word) for word in _WORD_RE.findall(str(item[label]).lower())]
+            self._word_trigrams.append(words)
+            for word_position, trigrams in enumerate(words):
+                for trigram in trigrams:
+                    self._postings.setdefault(trigram, set()).add((position, word_position))
+
+    def search(self, text: str, limit: int) -> list[dict[str, Any]]:
+        """
+        Items whose names share words (allowing for typos and inflections) with the text.
+
+        Args:
+            text: Input text
+            limit: Maximum number of items
+
+        Returns:
+            Matching items, best first
+        """
+        scores: dict[int, float] = {}
+        for word in set(_WORD_RE.findall(text.lower())):
+            query = _trigrams(word)
+            shared: dict[tuple[int, int], int] = {}
+            for trigram in query:
+                for posting in self._postings.get(trigram, ()):
+                    shared[posting] = shared.get(posting, 0) + 1
+            for (position, word_position), count in shared.items():
+                similarity = 2 * count / (len(query) + len(self._word_trigrams[position][word_position]))
+                if similarity >= MIN_SIMILARITY:
+                    scores[position] = scores.get(position, 0.0) + similarity
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))[:limit]
+        return [self.items[position] for position in ranked]
+
+
+def shortlist_taxonomy(
+    items: list[dict[str, Any]],
+    text: str,
+    cache_key: Hashable,
+    limit: int = settings.TAXONOMY_SHORTLIST_SIZE,
+    always: Iterable[Any] = (),
+    keep_all_without_match: bool = True,
+) -> Shortlist:
+    """
+    Pick the items relevant to the input when the user has more than TAXONOMY_SHORTLIST_THRESHOLD of them.
+
+    Args:
+        items: All of the user's categories or tags ({"id", "name", ...} dicts)
+        text: Input text to match against
+        cache_key: Identifies the index, e.g. (user_id, data_version, "categories")
+        limit: Maximum number of matched items
+        always: IDs to include regardless of the match (e.g. classifier suggestions)
+        keep_all_without_match: Return every item when nothing matches, instead of none
+
+    Returns:
+        Shortlist with the selected items in their original order
+    """
+    if len(items) <= settings.TAXONOMY_SHORTLIST_THRESHOLD:
+        return Shortlist(items=items, total=len(items))
+
+    index = _indexes.get(cache_key)
+    if index is None:
+        index = TrigramIndex(items)
+        _indexes.set(cache_key, index)
+
+    selected = {item["id"] for item in index.search(text, limit)} | set(always)
+    if not selected and keep_all_without_match:
+        return Shortlist(items=items, total=len(items))
+    return Shortlist(items=[item for item in items if item["id"] in selected], total=len(items))
+
+
+def shortlist_note(shortlist: Shortlist, list_tool: Optional[str] = None) -> str:
+    """Label suffix telling the model the list is partial, e.g. ", 12 most relevant of 240" """
+    if not shortlist.truncated:
+        return ""
+    if not shortlist.items:
+        note = f", none of the {shortlist.total} match this input"
+    else:
+        note = f", {len(shortlist.items)} most relevant of {shortlist.total}"
+    if list_tool:
+        note += f"; call {list_tool} for all"
+    return note
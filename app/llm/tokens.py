@@ -0,0 +1,11 @@
+"""Cheap token estimates for prompt budgeting"""
+
+# Claude tokenizers average roughly four characters of English text per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of prompt tokens in a piece of text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
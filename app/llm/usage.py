@@ -0,0 +1,71 @@
+"""Token usage and prompt cache accounting for LLM calls"""
+
+import logging
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageStats:
+    """Per-component totals of input, output and prompt cache tokens"""
+
+    def __init__(self):
+        self._totals: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, component: str, message: Any) -> None:
+        """
+        Record the usage reported on an LLM response.
+
+        Args:
+            component: Caller name, e.g. "assistant" or "agent"
+            message: AIMessage returned by the model (usage_metadata may be missing)
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+
+        details = usage.get("input_token_details") or {}
+        cache_read = details.get("cache_read") or 0
+        cache_creation = details.get("cache_creation") or (
+            (details.get("ephemeral_5m_input_tokens") or 0) + (details.get("ephemeral_1h_input_tokens") or 0)
+        )
+
+        with self._lock:
+            totals = self._totals.setdefault(component, {
+                "calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cache_read_tokens": 0,
+                "cache_creation_tokens": 0,
+            })
+            totals["calls"] += 1
+            totals["input_tokens"] += usage.get("input_tokens", 0)
+            totals["output_tokens"] += usage.get("output_tokens", 0)
+            totals["cache_read_tokens"] += cache_read
+            totals["cache_creation_tokens"] += cache_creation
+
+        logger.debug(
+            f"LLM usage ({component}): input={usage.get('input_tokens', 0)} output={usage.get('output_tokens', 0)} "
+            f"cache_read={cache_read} cache_creation={cache_creation}"
+        )
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Totals per component, with the share of input tokens served from the cache"""
+        with self._lock:
+            result = {}
+            for component, totals in self._totals.items():
+                input_tokens = totals["input_tokens"]
+                result[component] = {
+                    **totals,
+                    "cache_hit_ratio": round(totals["cache_read_tokens"] / input_tokens, 4) if input_tokens else 0.0,
+                }
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+llm_usage = LLMUsageStats()
@@ -0,0 +1,125 @@
+"""Non-blocking structured logging and per-user stream event traces"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import Any, Optional
+
+from app.config import settings
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Per-event logs from the chat stream (sampled by event type, off unless STREAM_EVENT_LOG_LEVEL allows DEBUG)
+stream_event_logger = logging.getLogger("app.stream_events")
+
+# Full event traces for selected users, written to a bounded rotating file
+_trace_logger = logging.getLogger("app.stream_traces")
+
+_listeners: list[logging.handlers.QueueListener] = []
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats the message followed by the record's `extra` fields as key=value pairs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class EventSamplingFilter(logging.Filter):
+    """Keeps a fraction of records per `event_type` extra; types without a rate are always kept"""
+
+    def __init__(self, sample_rates: dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.sample_rates.get(getattr(record, "event_type", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class StreamTraceRecorder:
+    """Captures every chat stream event for users switched into trace mode"""
+
+    def __init__(self, user_ids: list[int]):
+        self._user_ids = set(user_ids)
+        self._lock = threading.Lock()
+
+    def is_enabled(self, user_id: int) -> bool:
+        return user_id in self._user_ids
+
+    def enable(self, user_id: int) -> None:
+        with self._lock:
+            self._user_ids = self._user_ids | {user_id}
+
+    def disable(self, user_id: int) -> None:
+        with self._lock:
+            self._user_ids = self._user_ids - {user_id}
+
+    def user_ids(self) -> list[int]:
+        return sorted(self._user_ids)
+
+    def record(self, user_id: int, conversation_id: Optional[int], event: dict[str, Any]) -> None:
+        """Write one raw stream event; a no-op unless the user is being traced"""
+        if user_id not in self._user_ids:
+            return
+        _trace_logger.info(json.dumps(
+            {"user_id": user_id, "conversation_id": conversation_id, "event": event},
+            default=str,
+        ))
+
+
+stream_traces = StreamTraceRecorder(settings.STREAM_TRACE_USER_IDS)
+
+
+def _queue_logger(logger: logging.Logger, handler: logging.Handler) -> None:
+    """Route a logger through a queue so the calling thread never blocks on I/O"""
+    log_queue: queue.Queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def setup_logging() -> None:
+    """Configure root logging through a background queue listener"""
+    if _listeners:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(StructuredFormatter('%(asctime)s | %(name)s | %(message)s', datefmt='%H:%M:%S'))
+
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    _queue_logger(root, console)
+
+    stream_event_logger.setLevel(settings.STREAM_EVENT_LOG_LEVEL)
+    stream_event_logger.addFilter(EventSamplingFilter(settings.STREAM_EVENT_SAMPLE_RATES))
+
+    trace_dir = os.path.dirname(settings.STREAM_TRACE_FILE)
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+    trace_file = logging.handlers.RotatingFileHandler(
+        settings.STREAM_TRACE_FILE,
+        maxBytes=settings.STREAM_TRACE_MAX_BYTES,
+        backupCount=settings.STREAM_TRACE_BACKUP_COUNT,
+        delay=True,
+    )
+    trace_file.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    _trace_logger.setLevel(logging.INFO)
+    _trace_logger.propagate = False
+    _queue_logger(_trace_logger, trace_file)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener threads"""
+    while _listeners:
+        _listeners.pop().stop()
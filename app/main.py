@@ -1,20 +1,19 @@
-import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.agent.classifier import register_classifier_listeners
 from app.config import settings
+from app.database.database import SessionLocal
+from app.database.slow_query_log import QueryOriginMiddleware
+from app.logging_config import setup_logging, shutdown_logging
 from app.observability import init_phoenix, shutdown_phoenix
 
-from app.routers import auth, account, transaction, category, tag, budget, agent, reminder, savings_goal, analytics, onboarding
+from app.routers import auth, account, transaction, category, tag, budget, agent, reminder, savings_goal, analytics, onboarding, admin
 from app.assistant import router as assistant_router
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(name)s | %(message)s',
-    datefmt='%H:%M:%S'
-)
+# Configure logging (handlers run on a background queue listener)
+setup_logging()
 
 
 @asynccontextmanager
@@ -22,9 +21,12 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler for startup and shutdown"""
     # Startup: Initialize Phoenix observability
     init_phoenix()
+    # Keep the per-user category classifiers current with transaction writes
+    register_classifier_listeners(SessionLocal)
     yield
     # Shutdown: Cleanup Phoenix
     shutdown_phoenix()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -41,6 +43,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryOriginMiddleware)
 
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["authentication"])
 app.include_router(onboarding.router, prefix=f"{settings.API_V1_STR}/onboarding", tags=["onboarding"])
@@ -55,6 +58,7 @@ app.include_router(savings_goal.router, prefix=f"{settings.API_V1_STR}/savings-g
 app.include_router(agent.router, prefix=f"{settings.API_V1_STR}/agent", tags=["agent"])
 app.include_router(assistant_router.router, prefix=f"{settings.API_V1_STR}/assistant", tags=["assistant"])
 app.include_router(analytics.router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 
 @app.get("/api")
 async def root():
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends
+
+from app.agent.fast_parser import fast_parser_stats
+from app.assistant.response_cache import clear_response_cache, response_cache_stats
+from app.auth.auth import password_hasher
+from app.auth.dependencies import get_current_admin_user
+from app.database.database import slow_query_log
+from app.llm.policy import llm_call_stats
+from app.llm.scheduler import llm_scheduler
+from app.llm.usage import llm_usage
+from app.logging_config import stream_traces
+from app.schemas.admin import SlowQuery
+from app.schemas.user import User
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=list[SlowQuery])
+async def get_slow_queries(current_user: User = Depends(get_current_admin_user)):
+    """Most recent statements over SLOW_QUERY_THRESHOLD_MS, newest first, with their query plans."""
+    return slow_query_log.entries()
+
+
+@router.delete("/slow-queries", status_code=204)
+async def clear_slow_queries(current_user: User = Depends(get_current_admin_user)):
+    slow_query_log.clear()
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Queue depth, wait times and rejections of the bcrypt thread pool."""
+    return password_hasher.metrics()
+
+
+@router.get("/llm-usage")
+async def get_llm_usage(current_user: User = Depends(get_current_admin_user)):
+    """Input, output and prompt cache tokens per LLM caller since startup."""
+    return llm_usage.snapshot()
+
+
+@router.delete("/llm-usage", status_code=204)
+async def clear_llm_usage(current_user: User = Depends(get_current_admin_user)):
+    llm_usage.clear()
+
+
+@router.get("/fast-parser")
+async def get_fast_parser_stats(current_user: User = Depends(get_current_admin_user)):
+    """Share of transaction inputs answered by the rule-based parser instead of the agent."""
+    return fast_parser_stats.snapshot()
+
+
+@router.delete("/fast-parser", status_code=204)
+async def clear_fast_parser_stats(current_user: User = Depends(get_current_admin_user)):
+    fast_parser_stats.clear()
+
+
+@router.get("/response-cache")
+async def get_response_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Size, hits and misses of the cache of first-turn assistant answers."""
+    return response_cache_stats()
+
+
+@router.delete("/response-cache", status_code=204)
+async def clear_response_cache_entries(current_user: User = Depends(get_current_admin_user)):
+    clear_response_cache()
+
+
+@router.get("/llm-scheduler")
+async def get_llm_scheduler_stats(current_user: User = Depends(get_current_admin_user)):
+    """Active and queued LLM calls, and queueing totals since startup."""
+    return llm_scheduler.snapshot()
+
+
+@router.get("/llm-calls")
+async def get_llm_call_stats(current_user: User = Depends(get_current_admin_user)):
+    """LLM call retries, hedges, deadline overruns and failures since startup."""
+    return llm_call_stats.snapshot()
+
+
+@router.get("/stream-traces")
+async def get_stream_trace_users(current_user: User = Depends(get_current_admin_user)):
+    """Users whose chat stream events are captured to STREAM_TRACE_FILE."""
+    return {"user_ids": stream_traces.user_ids()}
+
+
+@router.put("/stream-traces/{user_id}", status_code=204)
+async def enable_stream_trace(user_id: int, current_user: User = Depends(get_current_admin_user)):
+    stream_traces.enable(user_id)
+
+
+@router.delete("/stream-traces/{user_id}", status_code=204)
+async def disable_stream_trace(user_id: int, current_user: User = Depends(get_current_admin_user)):
+    stream_traces.disable(user_id)
@@ -1,20 +1,28 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import asyncio
 import json
 
 from app.auth.dependencies import get_current_active_user
 from app.database.database import get_db
 from app.schemas.agent import AgentProcessRequest, AgentProcessResponse
 from app.schemas.user import User
+from app.crud.account_crud import AccountCrud
 from app.crud.category_crud import CategoryCrud
 from app.crud.tag_crud import TagCrud
+from app.agent.fast_parser import load_category_hints
 from app.agent.service import parse_transactions, parse_transactions_stream
 
 
 router = APIRouter()
 
 
+def _account_currency(db: Session, account_id: int, user_id: int) -> str | None:
+    account = AccountCrud.get_by_id_and_user(db, account_id, user_id)
+    return account.currency if account else None
+
+
 @router.post("/process", response_model=AgentProcessResponse)
 async def process_agent_input(
     request: AgentProcessRequest,
@@ -41,12 +49,14 @@ async def process_agent_input(
     ]
 
     # Parse transactions using agent
-    transactions = parse_transactions(
+    transactions = await parse_transactions(
         text=request.text,
         account_id=request.account_id,
         user_id=current_user.id,
         user_categories=user_categories,
         user_tags=user_tags,
+        category_hints=await asyncio.to_thread(load_category_hints, db, current_user.id),
+        account_currency=_account_currency(db, request.account_id, current_user.id),
     )
 
     return AgentProcessResponse(transactions=transactions)
@@ -78,6 +88,10 @@ async def process_agent_input_stream(
         for tag in tags
     ]
 
+    # Loading the hints may train the user's classifier; keep it off the event loop
+    category_hints = await asyncio.to_thread(load_category_hints, db, current_user.id)
+    account_currency = _account_currency(db, request.account_id, current_user.id)
+
     async def event_generator():
         """Generate SSE events for each event from the agent stream"""
         try:
@@ -87,6 +101,8 @@ async def process_agent_input_stream(
                 user_id=current_user.id,
                 user_categories=user_categories,
                 user_tags=user_tags,
+                category_hints=category_hints,
+                account_currency=account_currency,
             ):
                 # Pass through the event as-is (already has correct type)
                 event_data = json.dumps(event)
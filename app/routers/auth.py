@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.auth.auth import create_access_token
+from app.auth.auth import PasswordHashingBusyError, create_access_token
 from app.auth.dependencies import get_current_active_user
 from app.config import settings
 from app.crud.user_crud import UserCrud
@@ -23,7 +23,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
 
-    user = UserCrud.create(db=db, obj_in=user_data)
+    try:
+        user = await UserCrud.create(db=db, obj_in=user_data)
+    except PasswordHashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
     return user
 
 
@@ -32,7 +39,14 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = UserCrud.authenticate(db, email=form_data.username, password=form_data.password)
+    try:
+        user = await UserCrud.authenticate(db, email=form_data.username, password=form_data.password)
+    except PasswordHashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,7 +56,7 @@ async def login_for_access_token(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
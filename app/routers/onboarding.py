@@ -143,6 +143,7 @@ async def complete_onboarding(
     current_user.onboarding_completed = True
     db.commit()
     db.refresh(current_user)
+    UserCrud.invalidate_cache(current_user.id)
 
     return {"message": "Onboarding completed successfully", "user": current_user}
 
@@ -1,10 +1,16 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.agent.classifier import get_classifier
 from app.auth.dependencies import get_current_active_user
+from app.config import settings
 from app.database.database import get_db
 from app.crud.transaction_crud import TransactionCrud
-from app.schemas.transaction import Transaction, TransactionCreate, TransactionUpdate
+from app.crud.category_crud import CategoryCrud
+from app.crud.tag_crud import TagCrud
+from app.schemas.transaction import CategorySuggestion, Transaction, TransactionCreate, TransactionUpdate
 from app.schemas.user import User
 
 
@@ -26,6 +32,29 @@ async def get_transactions(
 ):
     return TransactionCrud.get_all(db, current_user.id)
 
+@router.get("/suggest", response_model=CategorySuggestion)
+async def suggest_category(
+        description: str,
+        current_user: User = Depends(get_current_active_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Predict the category and tags of a description from the user's own transactions, without an LLM call.
+    A category less likely than CLASSIFIER_MIN_PROBABILITY is not suggested.
+    """
+    # Training a user's first model runs queries; keep it off the event loop
+    classifier = await asyncio.to_thread(get_classifier, db, current_user.id)
+    category_ids = {category.id for category in CategoryCrud.get_all_categories(db, current_user.id)}
+    tag_ids = {tag.id for tag in TagCrud.get_all_tags(db, current_user.id)}
+    category_id, probability = classifier.predict_category(description, category_ids)
+    if probability < settings.CLASSIFIER_MIN_PROBABILITY:
+        category_id, probability = None, 0.0
+    return CategorySuggestion(
+        category_id=category_id,
+        probability=round(probability, 4),
+        tags=classifier.predict_tags(description, tag_ids),
+    )
+
 @router.delete("/{transaction_id}", status_code=204)
 async def delete_transaction(
         transaction_id: int,
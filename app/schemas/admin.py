@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class SlowQuery(BaseModel):
+    timestamp: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any = None
+    plan: Optional[str] = None
+    origin: Optional[str] = None
+
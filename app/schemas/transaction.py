@@ -53,4 +53,11 @@ class TransactionInDB(TransactionBase):
 
 
 class Transaction(TransactionInDB):
-    tags: List[Tag] = []
\ No newline at end of file
+    tags: List[Tag] = []
+
+
+class CategorySuggestion(BaseModel):
+    """Category and tags predicted from a description by the user's classifier"""
+    category_id: Optional[int] = None
+    probability: float = 0.0
+    tags: List[int] = []
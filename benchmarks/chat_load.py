@@ -0,0 +1,385 @@
+"""
+Load test: concurrent chat and transaction streams against the fake LLM.
+
+Runs the FastAPI app in-process over an ASGI transport with LLM_PROVIDER=fake
+(app/llm/fake.py), so no API calls are made. Each simulated client holds one
+SSE stream at a time and sends --turns requests, alternating
+/api/assistant/chat-stream (continuing its conversation) and
+/api/agent/process-stream, or only one of them with --endpoint. The model's
+latency, token rate and injected errors come from the FAKE_LLM_* settings,
+and the LLM_MAX_CONCURRENT* settings apply as in production.
+
+Reported per endpoint: time to first token (first text chunk, or first
+transaction for the agent), streamed tokens/sec, turn latency p50/p99 and
+errors. Overall: event-loop lag, peak concurrent streams, and RSS growth per
+concurrent stream (peak RSS during the run minus the RSS before it, divided
+by the peak concurrent streams), plus the LLM scheduler and call totals.
+
+Each open stream holds a database connection from the engine's pool for its
+whole duration (SQLAlchemy's default QueuePool allows 15). Beyond that,
+requests block the event loop on connection checkout, which shows up here as
+event-loop lag and pool timeout errors.
+
+The load users are registered through the API, so point the app's
+DATABASE_URL at a scratch database.
+
+Usage (from the repository root):
+    python -m benchmarks.chat_load --clients 200 --users 50 --turns 3
+    FAKE_LLM_ERROR_RATE=0.05 LLM_MAX_CONCURRENT=64 python -m benchmarks.chat_load --clients 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+
+from app.llm.tokens import estimate_tokens
+
+AGENT_INPUT = "Dinner with Anna yesterday, my share was 23.40 and I also paid the 5 euro tip"
+CHAT_QUESTIONS = [
+    "How much did I spend on each category this month?",
+    "Where could I cut back on my spending?",
+    "How does this month compare with last month?",
+]
+
+# Lag monitor tick; RSS is sampled every RSS_SAMPLE_TICKS ticks
+LAG_INTERVAL_SECONDS = 0.01
+RSS_SAMPLE_TICKS = 10
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    def __init__(self, queue: asyncio.Queue, disconnected: asyncio.Event, task: asyncio.Task):
+        self.queue = queue
+        self.disconnected = disconnected
+        self.task = task
+
+    async def __aiter__(self):
+        while (chunk := await self.queue.get()) is not None:
+            yield chunk
+
+    async def aclose(self) -> None:
+        self.disconnected.set()
+        await self.task
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """ASGI transport that hands body chunks to the client as the app sends them
+
+    httpx.ASGITransport collects the whole response before returning it, which
+    would hide time to first token.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(name.lower(), value) for name, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 0),
+            "root_path": "",
+        }
+        queue: asyncio.Queue = asyncio.Queue()
+        started: asyncio.Future = asyncio.get_running_loop().create_future()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    queue.put_nowait(message["body"])
+                if not message.get("more_body", False):
+                    queue.put_nowait(None)
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+            finally:
+                if not started.done():
+                    started.set_exception(RuntimeError("App finished without a response"))
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(run_app())
+        start = await started
+        return httpx.Response(
+            start["status"],
+            headers=start.get("headers", []),
+            stream=_QueueStream(queue, disconnected, task),
+        )
+
+
+@dataclass
+class Turn:
+    endpoint: str
+    latency: float
+    ttft: Optional[float] = None
+    tokens: int = 0
+    streaming_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadMonitor:
+    """Event-loop lag, RSS and concurrent streams while the load runs"""
+    lags: list[float] = field(default_factory=list)
+    baseline_rss: int = 0
+    peak_rss: int = 0
+    streams: int = 0
+    peak_streams: int = 0
+
+    async def run(self) -> None:
+        self.baseline_rss = self.peak_rss = _rss_bytes()
+        ticks = 0
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL_SECONDS)
+            self.lags.append(max(time.perf_counter() - started - LAG_INTERVAL_SECONDS, 0.0))
+            ticks += 1
+            if ticks % RSS_SAMPLE_TICKS == 0:
+                self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def stream_opened(self) -> None:
+        self.streams += 1
+        self.peak_streams = max(self.peak_streams, self.streams)
+
+    def stream_closed(self) -> None:
+        self.streams -= 1
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak size where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def create_user(client: httpx.AsyncClient, run_id: str, index: int) -> dict[str, Any]:
+    """Register and onboard a load user; returns its auth headers and account ID"""
+    email = f"load-{run_id}-{index}@example.com"
+    password = "load-test-password"
+    response = await client.post("/api/register", json={"name": f"Load {index}", "email": email, "password": password})
+    response.raise_for_status()
+    response = await client.post("/api/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post(
+        "/api/onboarding/complete", headers=headers, json={"initial_balance": 1000, "currency": "EUR"}
+    )
+    response.raise_for_status()
+    response = await client.get("/api/account/", headers=headers)
+    response.raise_for_status()
+    return {"headers": headers, "account_id": response.json()[0]["id"]}
+
+
+async def stream_turn(
+    client: httpx.AsyncClient,
+    monitor: LoadMonitor,
+    endpoint: str,
+    path: str,
+    headers: dict[str, str],
+    payload: dict[str, Any],
+) -> tuple[Turn, dict[str, Any]]:
+    """Send one streaming request; returns its measurements and the last conversation_id event, if any"""
+    started = time.perf_counter()
+    first_token = None
+    tokens = 0
+    error = None
+    conversation: dict[str, Any] = {}
+    monitor.stream_opened()
+    try:
+        async with client.stream("POST", path, headers=headers, json=payload) as response:
+            if response.status_code != 200:
+                error = f"HTTP {response.status_code}"
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                event_type = event.get("type")
+                if event_type == "error":
+                    error = event.get("message", "error")
+                elif event_type == "conversation_id":
+                    conversation = event
+                elif event_type == "message_chunk" and event.get("content"):
+                    tokens += estimate_tokens(event["content"])
+                    first_token = first_token or time.perf_counter()
+                elif event_type == "transaction":
+                    tokens += 1
+                    first_token = first_token or time.perf_counter()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        monitor.stream_closed()
+
+    finished = time.perf_counter()
+    turn = Turn(
+        endpoint=endpoint,
+        latency=finished - started,
+        ttft=first_token - started if first_token else None,
+        tokens=tokens,
+        streaming_seconds=finished - first_token if first_token else 0.0,
+        error=error,
+    )
+    return turn, conversation
+
+
+async def run_client(
+    client: httpx.AsyncClient,
+    monitor: LoadMonitor,
+    user: dict[str, Any],
+    client_index: int,
+    turns: int,
+    endpoint: str,
+) -> list[Turn]:
+    results = []
+    conversation_id = None
+    for turn_index in range(turns):
+        use_chat = endpoint == "chat" or (endpoint == "both" and (client_index + turn_index) % 2 == 0)
+        if use_chat:
+            # Unique questions so the response cache does not answer them
+            question = CHAT_QUESTIONS[turn_index % len(CHAT_QUESTIONS)]
+            payload = {
+                "message": f"{question} (client {client_index}, turn {turn_index})",
+                "account_id": user["account_id"],
+                "conversation_id": conversation_id,
+            }
+            turn, conversation = await stream_turn(
+                client, monitor, "chat-stream", "/api/assistant/chat-stream", user["headers"], payload
+            )
+            conversation_id = conversation.get("conversation_id") or conversation_id
+        else:
+            payload = {"text": AGENT_INPUT, "account_id": user["account_id"]}
+            turn, _ = await stream_turn(
+                client, monitor, "process-stream", "/api/agent/process-stream", user["headers"], payload
+            )
+        results.append(turn)
+    return results
+
+
+def report(turns: list[Turn], monitor: LoadMonitor, elapsed: float) -> None:
+    from app.llm.policy import llm_call_stats
+    from app.llm.scheduler import llm_scheduler
+
+    print(f"{len(turns)} turns in {elapsed:.1f}s ({len(turns) / elapsed:.1f} turns/s)")
+    print(
+        f"{'endpoint':16}{'turns':>7}{'errors':>8}{'ttft p50':>10}{'ttft p99':>10}"
+        f"{'tok/s p50':>11}{'latency p50':>13}{'latency p99':>13}"
+    )
+    for endpoint in sorted({turn.endpoint for turn in turns}):
+        selected = [turn for turn in turns if turn.endpoint == endpoint]
+        ttfts = [turn.ttft for turn in selected if turn.ttft is not None]
+        rates = [turn.tokens / turn.streaming_seconds for turn in selected if turn.streaming_seconds > 0]
+        latencies = [turn.latency for turn in selected]
+        errors = sum(1 for turn in selected if turn.error)
+        print(
+            f"{endpoint:16}{len(selected):>7}{errors:>8}{_percentile(ttfts, 50):>9.2f}s{_percentile(ttfts, 99):>9.2f}s"
+            f"{_percentile(rates, 50):>11.1f}{_percentile(latencies, 50):>12.2f}s{_percentile(latencies, 99):>12.2f}s"
+        )
+
+    lags_ms = [lag * 1000 for lag in monitor.lags]
+    print(
+        f"event-loop lag: p50 {_percentile(lags_ms, 50):.1f}ms, p99 {_percentile(lags_ms, 99):.1f}ms, "
+        f"max {max(lags_ms, default=0):.1f}ms"
+    )
+    growth = max(monitor.peak_rss - monitor.baseline_rss, 0)
+    per_stream = growth / monitor.peak_streams if monitor.peak_streams else 0
+    print(
+        f"peak concurrent streams: {monitor.peak_streams}, RSS growth {growth / 2**20:.1f} MiB "
+        f"(~{per_stream / 2**10:.0f} KiB per stream)"
+    )
+    print(f"llm scheduler: {llm_scheduler.snapshot()}")
+    print(f"llm calls: {llm_call_stats.snapshot()}")
+
+    errors: dict[str, int] = {}
+    for turn in turns:
+        if turn.error:
+            errors[turn.error] = errors.get(turn.error, 0) + 1
+    for message, count in sorted(errors.items(), key=lambda item: -item[1]):
+        print(f"  {count} x {message}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.main import app
+
+    run_id = uuid.uuid4().hex[:8]
+    transport = StreamingASGITransport(app)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=timeout) as client:
+        users = [await create_user(client, run_id, index) for index in range(args.users)]
+        print(f"Registered {len(users)} load users (run {run_id})")
+
+        monitor = LoadMonitor()
+        monitor_task = asyncio.create_task(monitor.run())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_client(client, monitor, users[index % len(users)], index, args.turns, args.endpoint)
+            for index in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+        monitor_task.cancel()
+
+    report([turn for client_turns in results for turn in client_turns], monitor, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients")
+    parser.add_argument("--users", type=int, default=50, help="distinct users the clients are spread over")
+    parser.add_argument("--turns", type=int, default=3, help="requests per client, one after another")
+    parser.add_argument("--endpoint", choices=["both", "chat", "agent"], default="both")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    parser.add_argument("--fast-parser", action="store_true", help="let simple agent inputs skip the LLM")
+    args = parser.parse_args()
+
+    # Settings are read at import, so these must be set before the app is imported
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ.setdefault("PHOENIX_ENABLED", "false")
+    if not args.fast_parser:
+        os.environ["FAST_PARSER_ENABLED"] = "false"
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
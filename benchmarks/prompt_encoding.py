@@ -0,0 +1,199 @@
+"""
+Benchmark: prompt tokens of the compact encodings vs the previous formats.
+
+Renders the same synthetic user data with the legacy formats (dict reprs and
+one prose line per row) and with the current prompt builders and tool
+formatters, then reports estimated tokens saved per request type.
+
+Usage (from the repository root, with the app's .env configured):
+    python -m benchmarks.prompt_encoding
+"""
+
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+
+from app.agent.service import build_agent_system_message
+from app.assistant.analytics.formatters import (
+    format_spending_by_category,
+    format_top_expenses,
+    format_budget_utilization,
+    format_spending_by_tag,
+)
+from app.assistant.schemas.chat import UserContext
+from app.assistant.service import format_user_taxonomy
+from app.llm.encoding import encode_table
+from app.llm.tokens import estimate_tokens
+
+CategoryRow = namedtuple("CategoryRow", "category_id category_name total_amount transaction_count")
+TagRow = namedtuple("TagRow", "tag_id tag_name total_amount transaction_count")
+ExpenseRow = namedtuple("ExpenseRow", "date description amount category_name")
+
+CATEGORY_NAMES = [
+    "Food & Groceries", "Transportation", "Shopping", "Entertainment", "Bills & Utilities",
+    "Healthcare", "Income", "Other", "Rent", "Travel", "Education", "Gifts",
+]
+TAG_NAMES = ["work", "family", "vacation", "subscription", "reimbursable", "cash", "online", "weekend"]
+
+
+def sample_data(seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    categories = [
+        {"id": i, "name": name, "icon": "📁", "color": "#D3D3D3"}
+        for i, name in enumerate(CATEGORY_NAMES, 1)
+    ]
+    tags = [{"id": i, "name": name, "color": "#45B7D1"} for i, name in enumerate(TAG_NAMES, 1)]
+    budgets = [
+        {"id": i, "category_id": cat["id"], "amount": float(rng.randrange(100, 800, 50)), "notes": None}
+        for i, cat in enumerate(categories[:6], 1)
+    ]
+    category_rows = [
+        CategoryRow(cat["id"], cat["name"], rng.uniform(20, 900), rng.randint(1, 40))
+        for cat in categories
+    ]
+    tag_rows = [TagRow(tag["id"], tag["name"], rng.uniform(10, 400), rng.randint(1, 20)) for tag in tags]
+    expense_rows = [
+        ExpenseRow(
+            date.today() - timedelta(days=rng.randint(0, 30)),
+            rng.choice(["Weekly groceries at the supermarket", "Train ticket", "Dinner with friends", "Electricity bill"]),
+            rng.uniform(40, 500),
+            rng.choice(CATEGORY_NAMES),
+        )
+        for _ in range(10)
+    ]
+    budget_rows = []
+    for budget in budgets:
+        spent = rng.uniform(0, budget["amount"] * 1.3)
+        budget_rows.append({
+            "category_name": CATEGORY_NAMES[budget["category_id"] - 1],
+            "budget_amount": budget["amount"],
+            "spent_amount": spent,
+            "remaining": budget["amount"] - spent,
+            "utilization_percent": spent / budget["amount"] * 100,
+        })
+    return {
+        "categories": categories,
+        "tags": tags,
+        "budgets": budgets,
+        "category_rows": category_rows,
+        "tag_rows": tag_rows,
+        "expense_rows": expense_rows,
+        "budget_rows": budget_rows,
+    }
+
+
+# Previous formats, kept verbatim for comparison
+
+def legacy_agent_context(data: dict) -> str:
+    categories = [{"id": c["id"], "name": c["name"], "icon": c["icon"]} for c in data["categories"]]
+    return f"Available categories: {categories}\nAvailable tags: {data['tags']}\n"
+
+
+def legacy_assistant_context(data: dict) -> str:
+    return str({"categories": data["categories"], "tags": data["tags"], "budgets": data["budgets"]})
+
+
+def legacy_spending_by_category(data: dict) -> str:
+    formatted = format_spending_by_category(data["category_rows"])
+    return formatted["summary"] + "\n\nDetailed breakdown:\n" + "\n".join(
+        f"- {item['category_name']}: ${item['amount']:.2f} ({item['percentage']:.1f}%, {item['transaction_count']} transactions)"
+        for item in formatted["data"]
+    )
+
+
+def legacy_top_expenses(data: dict) -> str:
+    formatted = format_top_expenses(data["expense_rows"])
+    return formatted["summary"] + "\n\n" + "\n".join(
+        f"{i}. {item['description']} - ${item['amount']:.2f} ({item['category']}, {item['date']})"
+        for i, item in enumerate(formatted["data"], 1)
+    )
+
+
+def legacy_budget_analysis(data: dict) -> str:
+    formatted = format_budget_utilization(data["budget_rows"])
+    details = []
+    for item in formatted["data"]:
+        status = "✓" if item["utilization_percent"] <= 80 else "⚠" if item["utilization_percent"] <= 100 else "✗"
+        details.append(
+            f"{status} {item['category_name']}: ${item['spent_amount']:.2f} / ${item['budget_amount']:.2f} "
+            f"({item['utilization_percent']:.1f}%, ${item['remaining']:.2f} remaining)"
+        )
+    return formatted["summary"] + "\n\n" + "\n".join(details)
+
+
+def legacy_spending_by_tag(data: dict) -> str:
+    formatted = format_spending_by_tag(data["tag_rows"])
+    return formatted["summary"] + "\n\n" + "\n".join(
+        f"- {item['tag_name']}: ${item['amount']:.2f} ({item['percentage']:.1f}%, {item['transaction_count']} transactions)"
+        for item in formatted["data"]
+    )
+
+
+def legacy_list_categories(data: dict) -> str:
+    return "\n".join(["Your categories:"] + [
+        f"- {c['icon']} {c['name']} (ID: {c['id']}, color: {c['color']})" for c in data["categories"]
+    ])
+
+
+# Current formats
+
+def compact_agent_context(data: dict) -> str:
+    message = build_agent_system_message(
+        [{"id": c["id"], "name": c["name"], "icon": c["icon"]} for c in data["categories"]],
+        data["tags"],
+    )
+    return message["content"][1]["text"]
+
+
+def compact_assistant_context(data: dict) -> str:
+    user_context = UserContext(
+        categories=data["categories"],
+        tags=data["tags"],
+        budgets=data["budgets"],
+        recent_transactions=[],
+        account_balance=0,
+    )
+    return format_user_taxonomy(user_context)
+
+
+def compact_tool_output(formatter, rows):
+    formatted = formatter(rows)
+    return formatted["summary"] + "\n\n" + formatted["table"]
+
+
+def compact_list_categories(data: dict) -> str:
+    return "Your categories:\n" + encode_table(
+        ["id", "name", "icon"], ([c["id"], c["name"], c["icon"]] for c in data["categories"])
+    )
+
+
+def main():
+    data = sample_data()
+    cases = [
+        ("agent system: categories/tags", legacy_agent_context(data), compact_agent_context(data)),
+        ("assistant system: taxonomy", legacy_assistant_context(data), compact_assistant_context(data)),
+        ("tool: get_spending_by_category", legacy_spending_by_category(data),
+         compact_tool_output(format_spending_by_category, data["category_rows"])),
+        ("tool: get_top_expenses", legacy_top_expenses(data),
+         compact_tool_output(format_top_expenses, data["expense_rows"])),
+        ("tool: get_budget_analysis", legacy_budget_analysis(data),
+         compact_tool_output(format_budget_utilization, data["budget_rows"])),
+        ("tool: get_spending_by_tag", legacy_spending_by_tag(data),
+         compact_tool_output(format_spending_by_tag, data["tag_rows"])),
+        ("tool: list_categories", legacy_list_categories(data), compact_list_categories(data)),
+    ]
+
+    print(f"{'request type':<34} {'before':>7} {'after':>7} {'saved':>7}")
+    total_before = total_after = 0
+    for name, before, after in cases:
+        before_tokens, after_tokens = estimate_tokens(before), estimate_tokens(after)
+        total_before += before_tokens
+        total_after += after_tokens
+        saved = (1 - after_tokens / before_tokens) * 100 if before_tokens else 0
+        print(f"{name:<34} {before_tokens:>7} {after_tokens:>7} {saved:>6.1f}%")
+    print(f"{'total':<34} {total_before:>7} {total_after:>7} {(1 - total_after / total_before) * 100:>6.1f}%")
+    print("\nTokens estimated at ~4 characters per token (app.llm.tokens.estimate_tokens).")
+
+
+if __name__ == "__main__":
+    main()
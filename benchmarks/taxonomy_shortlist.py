@@ -0,0 +1,69 @@
+"""
+Benchmark: agent prompt tokens and recall of the category/tag shortlist.
+
+Uses a recorded power-user taxonomy (82 categories, 189 tags) and inputs with
+the category and tags a person assigned to them
+(benchmarks/fixtures/taxonomy_shortlist.json). For each input the agent system
+message is built with the full taxonomy and with the shortlist, and the report
+shows the tokens saved and how often the expected category and tags survive
+the cut. The classifier suggestions are left out, so recall is from the
+trigram match alone.
+
+Usage (from the repository root, with the app's .env configured):
+    python -m benchmarks.taxonomy_shortlist
+"""
+
+import json
+from pathlib import Path
+
+from app.agent.service import build_agent_system_message
+from app.llm.prompt_cache import message_text
+from app.llm.tokens import estimate_tokens
+
+FIXTURE = Path(__file__).parent / "fixtures" / "taxonomy_shortlist.json"
+
+# Any user ID works; it only keys the cached index
+BENCHMARK_USER_ID = 0
+
+
+def main() -> None:
+    fixture = json.loads(FIXTURE.read_text())
+    categories, tags = fixture["categories"], fixture["tags"]
+    category_ids = {cat["name"]: cat["id"] for cat in categories}
+    tag_ids = {tag["name"]: tag["id"] for tag in tags}
+
+    full_tokens = shortlisted_tokens = 0
+    category_hits = tag_hits = expected_tags = 0
+    misses = []
+    for case in fixture["cases"]:
+        full = build_agent_system_message(categories, tags)
+        shortlisted = build_agent_system_message(categories, tags, case["text"], BENCHMARK_USER_ID)
+        full_tokens += estimate_tokens(message_text(full))
+        shortlisted_tokens += estimate_tokens(message_text(shortlisted))
+
+        # The shortlisted ids appear in the prompt as "id=name"
+        prompt = message_text(shortlisted)
+        category = f"{category_ids[case['category']]}={case['category']}"
+        if category in prompt:
+            category_hits += 1
+        else:
+            misses.append(f"{case['text']!r} -> {case['category']}")
+        for tag in case["tags"]:
+            expected_tags += 1
+            if f"{tag_ids[tag]}={tag}" in prompt:
+                tag_hits += 1
+
+    cases = len(fixture["cases"])
+    saved = 1 - shortlisted_tokens / full_tokens
+    print(f"{cases} inputs, {len(categories)} categories, {len(tags)} tags")
+    print(f"{'':28}{'full':>8}{'shortlist':>11}{'saved':>8}")
+    print(f"{'agent system tokens / input':28}{full_tokens / cases:>8.0f}{shortlisted_tokens / cases:>11.0f}{saved:>8.1%}")
+    print(f"category recall: {category_hits}/{cases} ({category_hits / cases:.1%})")
+    print(f"tag recall: {tag_hits}/{expected_tags} ({tag_hits / expected_tags:.1%})")
+    for miss in misses:
+        print(f"  missed category: {miss}")
+    print("\nTokens estimated at ~4 characters per token (app.llm.tokens.estimate_tokens).")
+
+
+if __name__ == "__main__":
+    main()
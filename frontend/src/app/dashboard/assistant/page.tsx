@@ -17,6 +17,7 @@ export default function AssistantPage() {
   const [selectedAccount, setSelectedAccount] = useState<Account | null>(null);
   const [loading, setLoading] = useState(true);
   const [currentConversationId, setCurrentConversationId] = useState<number | undefined>(undefined);
+  const [updatedTitle, setUpdatedTitle] = useState<{ conversationId: number; title: string } | undefined>(undefined);
 
   useEffect(() => {
     if (!authLoading && !user) {
@@ -90,6 +91,10 @@ export default function AssistantPage() {
     setCurrentConversationId(conversationId);
   };
 
+  const handleTitleChange = (conversationId: number, title: string) => {
+    setUpdatedTitle({ conversationId, title });
+  };
+
   return (
     <div className="h-screen flex flex-col overflow-hidden">
       <Navbar
@@ -104,6 +109,7 @@ export default function AssistantPage() {
             currentConversationId={currentConversationId}
             onConversationSelect={handleConversationSelect}
             onNewConversation={handleNewConversation}
+            updatedTitle={updatedTitle}
           />
         </div>
 
@@ -113,6 +119,7 @@ export default function AssistantPage() {
             accountId={selectedAccount.id}
             conversationId={currentConversationId}
             onConversationChange={setCurrentConversationId}
+            onTitleChange={handleTitleChange}
           />
         </div>
       </main>
@@ -20,9 +20,10 @@ interface AssistantChatProps {
   accountId: number;
   conversationId?: number;
   onConversationChange?: (conversationId: number) => void;
+  onTitleChange?: (conversationId: number, title: string) => void;
 }
 
-export default function AssistantChat({ accountId, conversationId, onConversationChange }: AssistantChatProps) {
+export default function AssistantChat({ accountId, conversationId, onConversationChange, onTitleChange }: AssistantChatProps) {
   const { user } = useAuth();
   const {
     messages,
@@ -35,7 +36,7 @@ export default function AssistantChat({ accountId, conversationId, onConversatio
     sendMessage,
     clearMessages,
     dismissTransactions,
-  } = useAssistantChat({ accountId, conversationId, onConversationChange });
+  } = useAssistantChat({ accountId, conversationId, onConversationChange, onTitleChange });
 
   const [categories, setCategories] = useState<Category[]>([]);
   const [tags, setTags] = useState<Tag[]>([]);
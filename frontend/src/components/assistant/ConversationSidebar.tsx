@@ -11,12 +11,14 @@ interface ConversationSidebarProps {
   currentConversationId?: number;
   onConversationSelect: (conversationId: number | undefined) => void;
   onNewConversation: () => void;
+  updatedTitle?: { conversationId: number; title: string };
 }
 
 export default function ConversationSidebar({
   currentConversationId,
   onConversationSelect,
   onNewConversation,
+  updatedTitle,
 }: ConversationSidebarProps) {
   const [conversations, setConversations] = useState<Conversation[]>([]);
   const [loading, setLoading] = useState(true);
@@ -88,6 +90,18 @@ export default function ConversationSidebar({
     }
   }, [currentConversationId]);
 
+  // Show a generated title as soon as the assistant announces it
+  useEffect(() => {
+    if (!updatedTitle) return;
+    if (conversations.find(c => c.id === updatedTitle.conversationId)) {
+      setConversations(prev => prev.map(c =>
+        c.id === updatedTitle.conversationId ? { ...c, title: updatedTitle.title } : c
+      ));
+    } else {
+      loadConversations();
+    }
+  }, [updatedTitle]);
+
   return (
     <div className="flex flex-col h-full border-r bg-muted/10">
       {/* Header */}
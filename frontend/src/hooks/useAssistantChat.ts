@@ -6,9 +6,10 @@ interface UseAssistantChatProps {
   accountId: number;
   conversationId?: number;
   onConversationChange?: (conversationId: number) => void;
+  onTitleChange?: (conversationId: number, title: string) => void;
 }
 
-export function useAssistantChat({ accountId, conversationId, onConversationChange }: UseAssistantChatProps) {
+export function useAssistantChat({ accountId, conversationId, onConversationChange, onTitleChange }: UseAssistantChatProps) {
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [isLoadingHistory, setIsLoadingHistory] = useState(false);
@@ -108,6 +109,11 @@ export function useAssistantChat({ accountId, conversationId, onConversationChan
         setIsLoading(true);
         break;
 
+      case 'queued':
+        // Waiting for a free model slot; keep the loading indicator up
+        setIsLoading(true);
+        break;
+
       case 'tool_start':
         // Add or update tool call
         setCurrentToolCalls(prev => {
@@ -201,6 +207,16 @@ export function useAssistantChat({ accountId, conversationId, onConversationChan
         }
         break;
 
+      case 'planning':
+        // The transaction agent is starting a new batch of previews
+        setPendingTransactions([]);
+        break;
+
+      case 'transaction':
+        // Show each preview as soon as the transaction agent produces it
+        setPendingTransactions(prev => [...(prev ?? []), event.data]);
+        break;
+
       case 'transaction_previews':
         // Handle transaction previews
         setPendingTransactions(event.transactions);
@@ -214,6 +230,13 @@ export function useAssistantChat({ accountId, conversationId, onConversationChan
         }
         break;
 
+      case 'title_updated':
+        // Generated title of a new conversation; let the sidebar replace the placeholder
+        if (onTitleChange) {
+          onTitleChange(event.conversation_id, event.title);
+        }
+        break;
+
       case 'done':
         // Stream complete
         setIsLoading(false);
@@ -353,17 +353,70 @@ export const assistantApi = {
   ): (() => void) => {
     const token = localStorage.getItem('token');
     const url = `${API_BASE_URL}/assistant/chat-stream`;
+    const resumeUrl = `${API_BASE_URL}/assistant/chat-stream/resume`;
+    const maxResumeAttempts = 3;
 
     const controller = new AbortController();
+    // SSE id of the last event handled ("<turn_id>:<n>"); a dropped stream resumes after it
+    let lastEventId: string | null = null;
+    let finished = false;
+
+    const handleMessage = (message: string) => {
+      const idMatch = message.match(/^id: (.+)$/m);
+      const dataMatch = message.match(/^data: (.+)$/m);
+      if (!dataMatch) return;
+      try {
+        const event = JSON.parse(dataMatch[1]);
+        if (idMatch) lastEventId = idMatch[1];
+        if (event.type === 'done' || event.type === 'error') finished = true;
+        onEvent(event);
+      } catch (e) {
+        console.error('Failed to parse SSE message:', e);
+      }
+    };
+
+    const readStream = async (response: Response) => {
+      const reader = response.body?.getReader();
+      const decoder = new TextDecoder();
+
+      if (!reader) {
+        throw new Error('No response body');
+      }
+
+      let buffer = '';
+
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+
+          if (done) {
+            if (buffer.trim()) handleMessage(buffer);
+            break;
+          }
+
+          buffer += decoder.decode(value, { stream: true });
+
+          const messages = buffer.split('\n\n');
+          buffer = messages.pop() || '';
+
+          for (const message of messages) {
+            if (!message.trim()) continue;
+            handleMessage(message);
+          }
+        }
+      } finally {
+        reader.releaseLock();
+      }
+    };
 
     const streamWithFetch = async () => {
+      const headers = { ...(token && { Authorization: `Bearer ${token}` }) };
+      let lastError: any = null;
+
       try {
         const response = await fetch(url, {
           method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-            ...(token && { Authorization: `Bearer ${token}` }),
-          },
+          headers: { 'Content-Type': 'application/json', ...headers },
           body: JSON.stringify(data),
           signal: controller.signal,
         });
@@ -372,62 +425,42 @@ export const assistantApi = {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const reader = response.body?.getReader();
-        const decoder = new TextDecoder();
-
-        if (!reader) {
-          throw new Error('No response body');
-        }
-
-        let buffer = '';
+        await readStream(response);
+      } catch (error: any) {
+        if (error.name === 'AbortError') return;
+        lastError = error;
+      }
 
+      // The turn keeps running on the server when the connection drops; pick it up where it stopped
+      for (let attempt = 1; !finished && lastEventId && attempt <= maxResumeAttempts; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** (attempt - 1)));
+        if (controller.signal.aborted) return;
         try {
-          while (true) {
-            const { done, value } = await reader.read();
-
-            if (done) {
-              if (buffer.trim()) {
-                const dataMatch = buffer.match(/^data: (.+)$/m);
-                if (dataMatch) {
-                  try {
-                    const event = JSON.parse(dataMatch[1]);
-                    onEvent(event);
-                  } catch (e) {
-                    console.error('Failed to parse SSE message:', e);
-                  }
-                }
-              }
-              break;
-            }
-
-            buffer += decoder.decode(value, { stream: true });
-
-            const messages = buffer.split('\n\n');
-            buffer = messages.pop() || '';
-
-            for (const message of messages) {
-              if (!message.trim()) continue;
-
-              const dataMatch = message.match(/^data: (.+)$/m);
-              if (dataMatch) {
-                try {
-                  const event = JSON.parse(dataMatch[1]);
-                  onEvent(event);
-                } catch (e) {
-                  console.error('Failed to parse SSE message:', e);
-                }
-              }
-            }
+          const response = await fetch(resumeUrl, {
+            headers: { ...headers, 'Last-Event-ID': lastEventId },
+            signal: controller.signal,
+          });
+
+          if (response.status === 404 || response.status === 410) {
+            lastError = new Error('The rest of this answer is no longer available. Reload the conversation to see it.');
+            break;
           }
-        } finally {
-          reader.releaseLock();
-        }
-      } catch (error: any) {
-        if (error.name !== 'AbortError') {
-          console.error('Stream error:', error);
-          onEvent({ type: 'error', message: error.message || 'Stream failed', recoverable: false });
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+          }
+
+          await readStream(response);
+        } catch (error: any) {
+          if (error.name === 'AbortError') return;
+          lastError = error;
         }
       }
+
+      if (!finished) {
+        const error = lastError || new Error('Stream ended unexpectedly');
+        console.error('Stream error:', error);
+        onEvent({ type: 'error', message: error.message || 'Stream failed', recoverable: false });
+      }
     };
 
     streamWithFetch();
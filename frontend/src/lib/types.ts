@@ -315,10 +315,15 @@ export interface ConversationUpdate {
 // SSE Event types
 export type ChatEvent =
   | { type: 'thinking' }
+  | { type: 'queued'; position: number }
   | { type: 'tool_start'; tool_name: string; tool_input: any }
   | { type: 'tool_end'; tool_name: string; tool_output: any; success: boolean; error?: string }
   | { type: 'message_chunk'; content: string; is_final: boolean }
   | { type: 'transaction_previews'; transactions: TransactionPreview[]; count: number }
+  | { type: 'planning'; count: number }
+  | { type: 'transaction_start'; description: string; amount: number }
+  | { type: 'transaction'; data: TransactionPreview }
   | { type: 'conversation_id'; conversation_id: number }
+  | { type: 'title_updated'; conversation_id: number; title: string }
   | { type: 'done'; conversation_id?: number }
   | { type: 'error'; message: string; recoverable: boolean };
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""Shared test setup: a throwaway SQLite database and the offline chat model
+
+Settings are read when app.config is first imported, so the environment is
+set here before any test module imports the app.
+"""
+
+import os
+import tempfile
+import uuid
+
+import pytest
+
+_database_dir = tempfile.mkdtemp(prefix="money-intelligence-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{_database_dir}/test.db"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_FIRST_TOKEN_SECONDS"] = "0"
+os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = "0"
+os.environ["PHOENIX_ENABLED"] = "false"
+os.environ["SLOW_QUERY_LOG_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-api-key")
+
+from app.database.database import SessionLocal, engine  # noqa: E402
+from app.database.models import Account, BaseDbModel, User  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema once for the whole run"""
+    BaseDbModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def account(db) -> Account:
+    """A new user with one EUR account; users are never shared between tests"""
+    user = User(name="Test", email=f"test-{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, name="Main Account", initial_balance=0, currency="EUR")
+    db.add(account)
+    db.commit()
+    return account
@@ -0,0 +1,150 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent import classifier as classifier_module
+from app.agent.classifier import get_classifier, register_classifier_listeners
+from app.config import settings
+from app.database.database import SessionLocal
+from app.database.models import Category, Transaction, TransactionType
+from app.routers.transaction import suggest_category
+
+
+def test_database_layer_does_not_import_the_agent():
+    code = "import sys, app.database.database; sys.exit('app.agent' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_users_train_in_parallel(monkeypatch):
+    # Both trainings must be inside get_training_rows at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def training_rows(db, user_id, limit):
+        calls.append(user_id)
+        barrier.wait()
+        return []
+
+    monkeypatch.setattr(classifier_module.TransactionCrud, "get_training_rows", training_rows)
+    user_ids = [-101, -102]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        classifiers = list(pool.map(lambda user_id: get_classifier(None, user_id), user_ids))
+
+    assert sorted(calls) == sorted(user_ids)
+    assert classifiers[0] is not classifiers[1]
+
+
+def test_concurrent_first_use_trains_a_user_once(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def training_rows(db, user_id, limit):
+        calls.append(user_id)
+        started.set()
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(classifier_module.TransactionCrud, "get_training_rows", training_rows)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(get_classifier, None, -103)
+        started.wait(5)
+        second = pool.submit(get_classifier, None, -103)
+        release.set()
+
+    assert calls == [-103]
+    assert first.result() is second.result()
+
+
+def add_transactions(db, account, rows) -> dict[str, int]:
+    """Categorized expenses from (description, category name) pairs; returns the category IDs by name"""
+    categories = {}
+    for description, name in rows:
+        if name not in categories:
+            category = Category(user_id=account.user_id, name=name)
+            db.add(category)
+            db.flush()
+            categories[name] = category.id
+        db.add(Transaction(
+            user_id=account.user_id,
+            account_id=account.id,
+            category_id=categories[name],
+            type=TransactionType.EXPENSE,
+            amount=Decimal("10"),
+            description=description,
+            date=date.today(),
+        ))
+    db.commit()
+    return categories
+
+
+def suggest(db, account, description: str):
+    return asyncio.run(suggest_category(description=description, current_user=SimpleNamespace(id=account.user_id), db=db))
+
+
+@pytest.fixture
+def labelled(db, account):
+    register_classifier_listeners(SessionLocal)
+    return add_transactions(db, account, [
+        ("Lidl weekly groceries", "Groceries"),
+        ("Aldi groceries", "Groceries"),
+        ("Supermarket groceries", "Groceries"),
+        ("Uber ride home", "Transport"),
+        ("Taxi ride weekly", "Transport"),
+    ])
+
+
+def test_suggest_returns_a_confident_category(db, account, labelled):
+    suggestion = suggest(db, account, "Groceries at Lidl")
+
+    assert suggestion.category_id == labelled["Groceries"]
+    assert suggestion.probability >= settings.CLASSIFIER_MIN_PROBABILITY
+
+
+def test_suggest_returns_nothing_below_the_threshold(db, account, labelled):
+    # "weekly" was seen once in each category
+    classifier = get_classifier(db, account.user_id)
+    assert 0 < classifier.predict_category("weekly")[1] < settings.CLASSIFIER_MIN_PROBABILITY
+
+    suggestion = suggest(db, account, "weekly")
+    assert suggestion.category_id is None
+    assert suggestion.probability == 0.0
+
+
+def test_transaction_committed_during_first_training_is_learned(db, account, labelled, monkeypatch):
+    rows_read = threading.Event()
+    committed = threading.Event()
+    get_training_rows = classifier_module.TransactionCrud.get_training_rows
+
+    def training_rows(db, user_id, limit):
+        rows = get_training_rows(db, user_id, limit)
+        rows_read.set()
+        committed.wait(5)
+        return rows
+
+    monkeypatch.setattr(classifier_module.TransactionCrud, "get_training_rows", training_rows)
+
+    def train():
+        training_db = SessionLocal()
+        try:
+            return get_classifier(training_db, account.user_id)
+        finally:
+            training_db.close()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        training = pool.submit(train)
+        assert rows_read.wait(5)
+        # Committed after the training rows were read, before the model is published
+        categories = add_transactions(db, account, [("Netflix subscription", "Subscriptions")])
+        committed.set()
+        classifier = training.result()
+
+    assert classifier.size == 6
+    assert classifier.predict_category("Netflix subscription")[0] == categories["Subscriptions"]
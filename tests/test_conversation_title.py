@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from app.assistant import title_generator
+from app.assistant.service import chat_stream
+from app.config import settings
+from app.database.models.conversation import Conversation
+
+
+@pytest.fixture
+def title_after(monkeypatch):
+    """Make title generation take the given number of seconds"""
+    def set_delay(seconds: float) -> None:
+        async def slow_title(first_message, user_id=None):
+            await asyncio.sleep(seconds)
+            return "Slow Title"
+        monkeypatch.setattr(title_generator, "generate_conversation_title", slow_title)
+    return set_delay
+
+
+def new_conversation_turn(db, account) -> list[dict]:
+    async def turn():
+        return [event async for event in chat_stream("What is my balance?", account.user_id, account.id, db)]
+    return asyncio.run(turn())
+
+
+def test_title_finishing_after_the_answer_is_still_announced(db, account, title_after, monkeypatch):
+    monkeypatch.setattr(settings, "TITLE_WAIT_SECONDS", 5)
+    title_after(0.2)
+
+    events = new_conversation_turn(db, account)
+    types = [event["type"] for event in events]
+
+    # The answer is complete before the title arrives, and the title comes before the stream ends
+    assert types.index("title_updated") > types.index("message_chunk")
+    assert types[-2:] == ["title_updated", "conversation_id"]
+    title_event = events[types.index("title_updated")]
+    assert title_event["title"] == "Slow Title"
+
+    db.expire_all()
+    assert db.get(Conversation, title_event["conversation_id"]).title == "Slow Title"
+
+
+def test_stream_end_waits_for_the_title_only_briefly(db, account, title_after, monkeypatch):
+    monkeypatch.setattr(settings, "TITLE_WAIT_SECONDS", 0.05)
+    title_after(5)
+
+    started = time.monotonic()
+    events = new_conversation_turn(db, account)
+
+    assert time.monotonic() - started < 2
+    assert "title_updated" not in [event["type"] for event in events]
+    assert events[-1]["type"] == "conversation_id"
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.agent.fast_parser import build_category_hints, fast_parse
+
+TODAY = date(2026, 10, 15)
+
+CATEGORIES = [{"id": 1, "name": "Coffee"}, {"id": 2, "name": "Food"}]
+
+HINTS = build_category_hints([
+    ("coffee", 1, "expense"),
+    ("coffee", 1, "expense"),
+    ("lunch", 2, "expense"),
+    ("lunch", 2, "expense"),
+])
+
+
+def parse(text: str, currency: str = "EUR"):
+    return fast_parse(text, CATEGORIES, [], HINTS, today=TODAY, currency=currency)
+
+
+@pytest.mark.parametrize("text, days_back", [
+    ("coffee 5", 0),
+    ("coffee 5 yesterday", 1),
+    ("coffee 5 3 days ago", 3),
+    ("lunch 10 day before yesterday", 2),
+])
+def test_parses_supported_dates(text, days_back):
+    result = parse(text)
+
+    assert result is not None
+    [transaction] = result.transactions
+    assert transaction["amount"] == float(text.split()[1])
+    assert transaction["date"] == (TODAY - timedelta(days=days_back)).isoformat()
+    assert transaction["description"] in ("coffee", "lunch")
+
+
+@pytest.mark.parametrize("text", [
+    "coffee 5 last week",
+    "coffee 5 two days ago",
+    "coffee 5 a few days ago",
+    "coffee 5 in march",
+    "coffee 5 on 3 sept",
+    "lunch 10 last month",
+    "lunch 10 this week",
+    "lunch 10 2 weeks ago",
+    "lunch 10 last year",
+    "coffee 5 a fortnight back",
+])
+def test_leaves_unread_dates_to_the_agent(text):
+    assert parse(text) is None
+
+
+@pytest.mark.parametrize("text", ["coffee 5 eur", "coffee €5", "coffee 5 euros", "coffee 5 bucks", "coffee 5"])
+def test_accepts_the_account_currency(text):
+    result = parse(text, currency="EUR")
+
+    assert result is not None
+    assert result.transactions[0]["amount"] == 5.0
+
+
+@pytest.mark.parametrize("text, currency", [
+    ("coffee 5 eur", "USD"),
+    ("coffee $5", "EUR"),
+    ("coffee 5 dollars", "EUR"),
+    ("coffee 5 gbp", "EUR"),
+    ("coffee 5 eur", None),
+])
+def test_leaves_other_currencies_to_the_agent(text, currency):
+    assert parse(text, currency=currency) is None
@@ -0,0 +1,232 @@
+import asyncio
+import json
+from datetime import date, timedelta
+
+import pytest
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import convert_to_messages
+
+from app.assistant import history as history_module
+from app.assistant.history import encode_tool_calls, load_conversation_history, refresh_summary
+from app.assistant.schemas.chat import UserContext
+from app.assistant.service import build_system_message, chat_stream
+from app.config import settings
+from app.crud.conversation_crud import ConversationCrud, MessageCrud
+from app.database.data_version import bump_data_version, get_data_stamp
+from app.database.models.conversation import Conversation, Message
+from app.llm.fake import DEFAULT_SCRIPTS
+
+# 100 estimated tokens each
+TURN_TEXT = {"user": "q" * 400, "assistant": "a" * 400}
+
+
+@pytest.fixture
+def conversation(db, account):
+    """A conversation of eight 100-token messages, alternating user and assistant"""
+    conversation = ConversationCrud.create(db, account.user_id)
+    for n in range(8):
+        role = "user" if n % 2 == 0 else "assistant"
+        MessageCrud.create(db, conversation.id, role, f"{n}:{TURN_TEXT[role]}"[:400])
+    return conversation
+
+
+def message_ids(db, conversation) -> list[int]:
+    return [m.id for m in db.query(Message).filter_by(conversation_id=conversation.id).order_by(Message.id)]
+
+
+def test_newest_messages_within_the_budget_are_kept(db, conversation):
+    ids = message_ids(db, conversation)
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=450)
+
+    # Four messages fit; the window starts on a user turn
+    assert [m["content"][0] for m in history.messages] == ["4", "5", "6", "7"]
+    assert [m["role"] for m in history.messages] == ["user", "assistant", "user", "assistant"]
+    assert history.summarize_through == ids[3]
+
+
+def test_window_opens_with_a_user_turn(db, conversation):
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=350)
+
+    # Three messages fit, but the oldest of them is an assistant answer
+    assert [m["content"][0] for m in history.messages] == ["6", "7"]
+
+
+def test_everything_fits_without_a_summary(db, conversation):
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=10_000)
+
+    assert len(history.messages) == 8
+    assert history.summary is None
+    assert history.summarize_through is None
+
+
+def test_summarized_messages_are_excluded_and_the_summary_is_prepended(db, conversation):
+    ids = message_ids(db, conversation)
+    ConversationCrud.update_summary(db, conversation.id, "The user asked about groceries.", ids[3])
+
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=10_000)
+
+    assert [m["content"][0] for m in history.messages] == ["4", "5", "6", "7"]
+    assert history.summary == "The user asked about groceries."
+    assert history.summarize_through is None
+
+    context = UserContext(categories=[], tags=[], budgets=[], recent_transactions=[], account_balance=0.0)
+    system = build_system_message(context, history.summary)
+    assert "The user asked about groceries." in system["content"][-1]["text"]
+    assert "cache_control" not in system["content"][-1]
+
+
+def test_messages_without_a_token_estimate_are_estimated_from_content(db, conversation):
+    db.query(Message).filter_by(conversation_id=conversation.id).update({Message.token_estimate: None})
+    db.commit()
+
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=450)
+
+    assert [m["content"][0] for m in history.messages] == ["4", "5", "6", "7"]
+
+
+def test_stored_token_estimates_are_used(db, conversation):
+    ids = message_ids(db, conversation)
+    # Claim the two newest messages are huge: nothing else fits
+    db.query(Message).filter(Message.id.in_(ids[6:])).update({Message.token_estimate: 200})
+    db.commit()
+
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=450)
+
+    assert [m["content"][0] for m in history.messages] == ["6", "7"]
+
+
+def test_other_users_conversation_is_not_loaded(db, conversation):
+    history = load_conversation_history(db, conversation.id, conversation.user_id + 1000)
+    assert history.messages == [] and history.summary is None
+
+
+def test_refresh_summary_folds_older_messages(db, conversation):
+    ids = message_ids(db, conversation)
+
+    window = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=450)
+    asyncio.run(refresh_summary(conversation.id, window.summarize_through))
+
+    db.expire_all()
+    stored = db.get(Conversation, conversation.id)
+    assert stored.summary == DEFAULT_SCRIPTS["history_summary"]["reply"]
+    assert stored.summary_through_message_id == ids[3]
+
+    # The next turn loads only the unsummarized messages, and the summary is no longer behind
+    history = load_conversation_history(db, conversation.id, conversation.user_id, token_budget=450)
+    assert [m["content"][0] for m in history.messages] == ["4", "5", "6", "7"]
+    assert history.summary == stored.summary
+    assert history.summarize_through is None
+
+    # Refreshing through an older message is a no-op
+    asyncio.run(refresh_summary(conversation.id, ids[1]))
+    db.expire_all()
+    assert db.get(Conversation, conversation.id).summary_through_message_id == ids[3]
+
+
+def tool_call(call_id: str, name: str = "get_spending_by_category", output: str = "category,amount\nGroceries,120") -> dict:
+    return {"id": call_id, "name": name, "args": {"period": "month"}, "output": output}
+
+
+@pytest.fixture
+def answered_with_tools(db, account):
+    """A conversation whose answer used two read-only tools against the user's current data"""
+    conversation = ConversationCrud.create(db, account.user_id)
+    MessageCrud.create(db, conversation.id, "user", "How much did I spend?")
+    summary = encode_tool_calls(
+        [tool_call("toolu_1"), tool_call("toolu_2", "get_top_expenses", "description,amount\nRent,900")],
+        get_data_stamp(account.user_id),
+    )
+    MessageCrud.create(db, conversation.id, "assistant", "You spent 1020 EUR.", tool_calls_summary=summary)
+    return conversation
+
+
+def answered_tool_uses(history: list[dict]) -> list[str]:
+    """
+    IDs of the tool_use blocks in the Messages API request the history would produce,
+    checking that each is answered by a tool_result in the next user message
+    """
+    llm = ChatAnthropic(model="claude-sonnet-4-5-20250929", api_key="test-api-key")
+    messages = [*history, {"role": "user", "content": "And last month?"}]
+    payload = llm._get_request_payload(convert_to_messages(messages))["messages"]
+
+    answered = []
+    for message, following in zip(payload, payload[1:]):
+        if message["role"] != "assistant" or isinstance(message["content"], str):
+            continue
+        tool_use_ids = [block["id"] for block in message["content"] if block["type"] == "tool_use"]
+        if tool_use_ids:
+            assert following["role"] == "user"
+            assert [block["tool_use_id"] for block in following["content"] if block["type"] == "tool_result"] == tool_use_ids
+            answered.extend(tool_use_ids)
+    return answered
+
+
+def test_encode_tool_calls_drops_oversized_results(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_TOOL_RESULT_MAX_CHARS", 20)
+    encoded = json.loads(encode_tool_calls([tool_call("toolu_1", output="short"), tool_call("toolu_2", output="x" * 21)], "stamp"))
+
+    assert [call["id"] for call in encoded["calls"]] == ["toolu_1"]
+    assert encoded["data_stamp"] == "stamp"
+    assert encode_tool_calls([tool_call("toolu_3", output="x" * 21)], "stamp") is None
+
+
+def test_tool_calls_are_replayed_before_the_answer(db, answered_with_tools):
+    history = load_conversation_history(db, answered_with_tools.id, answered_with_tools.user_id)
+
+    assert [m["role"] for m in history.messages] == ["user", "assistant", "tool", "tool", "assistant"]
+    calls = history.messages[1]["tool_calls"]
+    assert [call["id"] for call in calls] == ["toolu_1", "toolu_2"]
+    assert [m["tool_call_id"] for m in history.messages[2:4]] == ["toolu_1", "toolu_2"]
+    assert history.messages[2]["content"] == "category,amount\nGroceries,120"
+    assert history.messages[4]["content"] == "You spent 1020 EUR."
+
+
+def test_replayed_tool_calls_form_a_valid_anthropic_request(db, answered_with_tools):
+    history = load_conversation_history(db, answered_with_tools.id, answered_with_tools.user_id)
+    assert answered_tool_uses(history.messages) == ["toolu_1", "toolu_2"]
+
+
+def test_tool_calls_are_dropped_after_a_data_change(db, answered_with_tools):
+    bump_data_version(answered_with_tools.user_id)
+    history = load_conversation_history(db, answered_with_tools.id, answered_with_tools.user_id)
+
+    assert [m["role"] for m in history.messages] == ["user", "assistant"]
+    assert history.messages[1]["content"] == "You spent 1020 EUR."
+
+
+def test_tool_calls_are_dropped_on_another_day(db, answered_with_tools, monkeypatch):
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(history_module, "date", Tomorrow)
+    history = load_conversation_history(db, answered_with_tools.id, answered_with_tools.user_id)
+
+    assert [m["role"] for m in history.messages] == ["user", "assistant"]
+
+
+def test_malformed_tool_calls_summary_is_ignored(db, account):
+    conversation = ConversationCrud.create(db, account.user_id)
+    MessageCrud.create(db, conversation.id, "user", "How much did I spend?")
+    MessageCrud.create(db, conversation.id, "assistant", "You spent 1020 EUR.", tool_calls_summary="not json")
+
+    history = load_conversation_history(db, conversation.id, conversation.user_id)
+    assert [m["role"] for m in history.messages] == ["user", "assistant"]
+
+
+def test_chat_turn_persists_its_read_only_tool_calls_for_the_next_turn(db, account):
+    async def turn() -> list[dict]:
+        return [event async for event in chat_stream("How much did I spend this month?", account.user_id, account.id, db)]
+
+    events = asyncio.run(turn())
+    conversation_id = next(event["conversation_id"] for event in events if event["type"] == "conversation_id")
+
+    answer = db.query(Message).filter_by(conversation_id=conversation_id, role="assistant").one()
+    stored = json.loads(answer.tool_calls_summary)
+    assert [call["name"] for call in stored["calls"]] == ["get_spending_by_category"]
+
+    history = load_conversation_history(db, conversation_id, account.user_id)
+    assert [m["role"] for m in history.messages] == ["user", "assistant", "tool", "assistant"]
+    assert history.messages[1]["tool_calls"][0]["id"] == history.messages[2]["tool_call_id"] == stored["calls"][0]["id"]
+    assert answered_tool_uses(history.messages) == [stored["calls"][0]["id"]]
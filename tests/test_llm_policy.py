@@ -0,0 +1,186 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+import anthropic
+import httpx
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from pydantic import Field, PrivateAttr
+
+from app.config import settings
+from app.llm import policy
+from app.llm.fake import FakeChatModel, _overloaded_error
+from app.llm.policy import CallPolicy, LLMDeadlineExceeded, backoff_delay, invoke_llm, llm_call_stats
+from app.llm.scheduler import LLMScheduler
+
+INPUT = [HumanMessage(content="How much did I spend this month?")]
+
+
+def rate_limit_error(retry_after: str) -> anthropic.RateLimitError:
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, request=request, headers={"retry-after": retry_after})
+    return anthropic.RateLimitError("Rate limited", response=response, body=None)
+
+
+class ScriptedModel(FakeChatModel):
+    """
+    Fake model whose attempts follow a script, one step per request:
+    an exception is raised before the first chunk, ("stall", seconds) waits before answering,
+    ("drip", seconds) waits that long before every word, "fail-after-chunk" streams one word
+    and then fails; requests past the script answer at once.
+    """
+
+    steps: list[Any] = Field(default_factory=list)
+    reply: str = "You spent 120 EUR."
+
+    _requests: int = PrivateAttr(default=0)
+    _cancelled: list[int] = PrivateAttr(default_factory=list)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        request = self._requests
+        self._requests += 1
+        step = self.steps[request] if request < len(self.steps) else None
+        try:
+            if isinstance(step, BaseException):
+                raise step
+            if isinstance(step, tuple) and step[0] == "stall":
+                await asyncio.sleep(step[1])
+            if step == "fail-after-chunk":
+                yield ChatGenerationChunk(message=AIMessageChunk(content="You spent "))
+                raise _overloaded_error()
+            for chunk in self._chunks(messages):
+                if isinstance(step, tuple) and step[0] == "drip" and chunk.content:
+                    await asyncio.sleep(step[1])
+                yield ChatGenerationChunk(message=chunk)
+        except asyncio.CancelledError:
+            self._cancelled.append(request)
+            raise
+
+
+@pytest.fixture
+def scheduler(monkeypatch) -> LLMScheduler:
+    """A fresh scheduler, so every test can check that its slots were given back"""
+    scheduler = LLMScheduler(max_concurrent=4, max_per_user=2, queue_timeout_seconds=5)
+    monkeypatch.setattr(policy, "llm_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY_SECONDS", 0.0)
+
+
+def idle(scheduler: LLMScheduler) -> bool:
+    snapshot = scheduler.snapshot()
+    return snapshot["active"] == 0 and snapshot["queued"] == 0
+
+
+def quick_policy(**overrides) -> CallPolicy:
+    return CallPolicy(**{"max_attempts": 3, "deadline_seconds": 5, **overrides})
+
+
+@pytest.mark.parametrize("error", [rate_limit_error("0"), _overloaded_error()], ids=["429", "529"])
+def test_overload_and_rate_limit_are_retried(scheduler, error):
+    model = ScriptedModel(steps=[error])
+    response = asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy()))
+    assert response.content == "You spent 120 EUR."
+    assert model._requests == 2
+    assert idle(scheduler)
+
+
+def test_retry_waits_for_retry_after(scheduler):
+    model = ScriptedModel(steps=[rate_limit_error("0.2")])
+    started = time.monotonic()
+    asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy()))
+    assert time.monotonic() - started >= 0.2
+    assert model._requests == 2
+
+
+def test_backoff_is_at_least_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY_SECONDS", 0.01)
+    assert backoff_delay(1, rate_limit_error("3")) == 3.0
+    assert backoff_delay(1, _overloaded_error()) <= 0.01
+
+
+def test_gives_up_after_max_attempts(scheduler):
+    model = ScriptedModel(steps=[_overloaded_error()] * 3)
+    with pytest.raises(anthropic.OverloadedError):
+        asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy(max_attempts=2)))
+    assert model._requests == 2
+    assert idle(scheduler)
+
+
+def test_no_retry_once_chunks_were_streamed(scheduler):
+    model = ScriptedModel(steps=["fail-after-chunk"])
+    with pytest.raises(anthropic.OverloadedError):
+        asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy()))
+    assert model._requests == 1
+    assert idle(scheduler)
+
+
+def test_non_retryable_error_is_raised_at_once(scheduler):
+    model = ScriptedModel(steps=[ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy()))
+    assert model._requests == 1
+    assert idle(scheduler)
+
+
+def test_call_past_its_deadline_raises(scheduler):
+    model = ScriptedModel(steps=[("stall", 5)])
+    exceeded = llm_call_stats.deadline_exceeded
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy(deadline_seconds=0.05)))
+    assert llm_call_stats.deadline_exceeded == exceeded + 1
+    assert model._cancelled == [0]
+    assert idle(scheduler)
+
+
+def test_no_retry_that_would_end_past_the_deadline(scheduler):
+    model = ScriptedModel(steps=[rate_limit_error("10")])
+    with pytest.raises(anthropic.RateLimitError):
+        asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy(deadline_seconds=1)))
+    assert model._requests == 1
+    assert idle(scheduler)
+
+
+def test_hedge_wins_and_the_stalled_request_is_cancelled(scheduler):
+    model = ScriptedModel(steps=[("stall", 5)])
+    hedge_wins = llm_call_stats.hedge_wins
+    started = time.monotonic()
+    response = asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy(hedge_after_seconds=0.05)))
+    assert response.content == "You spent 120 EUR."
+    assert time.monotonic() - started < 1
+    assert model._requests == 2
+    assert model._cancelled == [0]
+    assert llm_call_stats.hedge_wins == hedge_wins + 1
+    assert idle(scheduler)
+
+
+def test_streaming_primary_is_not_hedged(scheduler):
+    # The empty start chunk arrives at once; the words take longer than the hedge delay
+    model = ScriptedModel(steps=[("drip", 0.05)], reply="one two three four five six")
+    hedges = llm_call_stats.hedges
+    response = asyncio.run(invoke_llm(model, INPUT, user_id=1, policy=quick_policy(hedge_after_seconds=0.1)))
+    assert response.content == "one two three four five six"
+    assert model._requests == 1
+    assert llm_call_stats.hedges == hedges
+    assert idle(scheduler)
+
+
+def test_cancelled_call_releases_its_slot(scheduler):
+    model = ScriptedModel(steps=[("stall", 5)])
+
+    async def cancel_midway() -> None:
+        task = asyncio.create_task(invoke_llm(model, INPUT, user_id=1, policy=quick_policy()))
+        await asyncio.sleep(0.05)
+        assert scheduler.snapshot()["active"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    assert model._cancelled == [0]
+    assert idle(scheduler)
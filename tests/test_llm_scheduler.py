@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from app.llm.scheduler import LLMQueueTimeout, LLMScheduler, Priority
+
+
+class Holder:
+    """A call that holds a slot until it is told to finish"""
+
+    def __init__(self, scheduler: LLMScheduler, user_id, priority: Priority = Priority.INTERACTIVE, log=None):
+        self.finish = asyncio.Event()
+        self.entered = asyncio.Event()
+        self.after_release = None  # Called in the same step the slot is released, before any waiter resumes
+        self.task = asyncio.create_task(self._run(scheduler, user_id, priority, log))
+
+    async def _run(self, scheduler, user_id, priority, log):
+        async with scheduler.slot(user_id, priority):
+            if log is not None:
+                log.append(user_id)
+            self.entered.set()
+            await self.finish.wait()
+        if self.after_release is not None:
+            self.after_release()
+
+
+async def settle() -> None:
+    """Let every ready task run until it blocks"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_per_user_cap_queues_only_that_user():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=4, max_per_user=1, queue_timeout_seconds=5)
+        first = Holder(scheduler, user_id=1)
+        second = Holder(scheduler, user_id=1)
+        other = Holder(scheduler, user_id=2)
+        await settle()
+        assert first.entered.is_set() and other.entered.is_set()
+        assert not second.entered.is_set()
+        assert scheduler.snapshot()["queued"] == 1
+
+        first.finish.set()
+        await settle()
+        assert second.entered.is_set()
+        second.finish.set()
+        other.finish.set()
+        await asyncio.gather(first.task, second.task, other.task)
+        assert scheduler.snapshot()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_interactive_runs_before_background():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=2, max_per_user=2, queue_timeout_seconds=5)
+        log = []
+        holders = [Holder(scheduler, user_id=1), Holder(scheduler, user_id=2)]
+        await settle()
+        assert scheduler.snapshot()["active"] == 2
+
+        # Queued in arrival order: background first, then interactive
+        waiters = [
+            Holder(scheduler, user_id=3, priority=Priority.BACKGROUND, log=log),
+            Holder(scheduler, user_id=4, priority=Priority.BACKGROUND, log=log),
+            Holder(scheduler, user_id=5, priority=Priority.INTERACTIVE, log=log),
+        ]
+        await settle()
+        assert scheduler.snapshot()["queued_by_priority"] == {"interactive": 1, "background": 2}
+
+        holders[0].finish.set()
+        await settle()
+        assert log == [5]
+
+        for holder in holders + waiters:
+            holder.finish.set()
+        await asyncio.gather(*(holder.task for holder in holders + waiters))
+        assert log == [5, 3, 4]
+        assert scheduler.snapshot()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_removes_the_waiter():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_per_user=1, queue_timeout_seconds=0.05)
+        holder = Holder(scheduler, user_id=1)
+        await settle()
+
+        with pytest.raises(LLMQueueTimeout):
+            async with scheduler.slot(user_id=2):
+                pass
+        snapshot = scheduler.snapshot()
+        assert snapshot["queued"] == 0
+        assert snapshot["timeouts_total"] == 1
+        assert snapshot["active"] == 1
+
+        holder.finish.set()
+        await holder.task
+        assert scheduler.snapshot()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_per_user=1, queue_timeout_seconds=5)
+        holder = Holder(scheduler, user_id=1)
+        await settle()
+        waiter = Holder(scheduler, user_id=2)
+        await settle()
+        assert scheduler.snapshot()["queued"] == 1
+
+        waiter.task.cancel()
+        await settle()
+        assert scheduler.snapshot()["queued"] == 0
+
+        holder.finish.set()
+        await holder.task
+        assert not waiter.entered.is_set()
+        assert scheduler.snapshot()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_right_after_its_grant_gives_the_slot_back():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_per_user=1, queue_timeout_seconds=5)
+        holder = Holder(scheduler, user_id=1)
+        await settle()
+        waiter = Holder(scheduler, user_id=2)
+        next_waiter = Holder(scheduler, user_id=3)
+        await settle()
+
+        # The release grants the slot to the waiter; cancel the waiter before it resumes
+        granted = []
+
+        def cancel_waiter():
+            granted.append(scheduler.snapshot()["queued"])
+            waiter.task.cancel()
+
+        holder.after_release = cancel_waiter
+        holder.finish.set()
+        await holder.task
+        await settle()
+        assert granted == [1]
+
+        assert not waiter.entered.is_set()
+        assert next_waiter.entered.is_set()
+        next_waiter.finish.set()
+        await next_waiter.task
+        assert scheduler.snapshot()["active"] == 0
+
+    asyncio.run(scenario())
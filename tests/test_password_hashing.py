@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import bcrypt
+import pytest
+
+from app.auth.auth import PasswordHasher, PasswordHashingBusyError, password_hasher
+from app.config import settings
+from app.crud.user_crud import UserCrud
+from app.database.models import User
+
+
+def test_login_succeeds_when_the_rehash_finds_the_queue_full(db, account, monkeypatch):
+    user = db.get(User, account.user_id)
+    old_hash = bcrypt.hashpw(b"secret-password", bcrypt.gensalt(rounds=4)).decode()
+    user.hashed_password = old_hash
+    db.commit()
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+    async def busy_hash(password: str) -> str:
+        raise PasswordHashingBusyError("Too many concurrent password hashing requests")
+
+    monkeypatch.setattr(password_hasher, "hash", busy_hash)
+
+    authenticated = asyncio.run(UserCrud.authenticate(db, user.email, "secret-password"))
+
+    assert authenticated is not None and authenticated.id == user.id
+    db.refresh(user)
+    assert user.hashed_password == old_hash
+
+
+def test_login_rehashes_with_the_configured_rounds(db, account, monkeypatch):
+    user = db.get(User, account.user_id)
+    user.hashed_password = bcrypt.hashpw(b"secret-password", bcrypt.gensalt(rounds=4)).decode()
+    db.commit()
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+    assert asyncio.run(UserCrud.authenticate(db, user.email, "secret-password")) is not None
+
+    db.refresh(user)
+    assert not password_hasher.needs_rehash(user.hashed_password)
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_thread_finishes():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_work() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def scenario():
+        waiter = asyncio.create_task(hasher._run(blocking_work))
+        await asyncio.to_thread(started.wait, 5)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # The bcrypt thread is still running, so there is no free slot yet
+        with pytest.raises(PasswordHashingBusyError):
+            await hasher._run(blocking_work)
+
+        release.set()
+        while hasher.metrics()["completed"] < 1:
+            await asyncio.sleep(0.01)
+        assert hasher.metrics()["queue_depth"] == 0
+        assert await hasher._run(lambda: "next") == "next"
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage
+
+from app.agent.graph import tools as agent_tools
+from app.agent.service import build_agent_system_message
+from app.assistant.schemas.chat import UserContext
+from app.assistant.service import build_system_message
+from app.assistant.tools import assistant_tools
+from app.llm.fake import FakeChatModel
+from app.llm.prompt_cache import CACHE_CONTROL, cacheable_tools
+from app.llm.usage import LLMUsageStats
+
+USER_CONTEXT = UserContext(
+    categories=[{"id": 1, "name": "Groceries"}, {"id": 2, "name": "Transport"}],
+    tags=[{"id": 1, "name": "work"}],
+    budgets=[{"id": 1, "category_id": 1, "amount": 300.0}],
+    recent_transactions=[],
+    account_balance=1200.0,
+)
+
+
+def request_payload(tools, system_message: dict) -> dict:
+    """The Messages API request body, built offline by the real client"""
+    llm = ChatAnthropic(model="claude-sonnet-4-5-20250929", api_key="test-api-key")
+    bound = llm.bind_tools(cacheable_tools(tools))
+    return bound.bound._get_request_payload([system_message, HumanMessage(content="coffee 4")], **bound.kwargs)
+
+
+def breakpoints(blocks: list[dict]) -> list[bool]:
+    return [block.get("cache_control") == CACHE_CONTROL for block in blocks]
+
+
+@pytest.mark.parametrize(
+    "tools, system_message",
+    [
+        (assistant_tools, build_system_message(USER_CONTEXT, history_summary="Asked about groceries.")),
+        (agent_tools, build_agent_system_message(USER_CONTEXT.categories, USER_CONTEXT.tags)),
+    ],
+    ids=["assistant", "agent"],
+)
+def test_breakpoints_follow_the_last_tool_and_the_stable_system_blocks(tools, system_message):
+    payload = request_payload(tools, system_message)
+
+    assert breakpoints(payload["tools"]) == [False] * (len(tools) - 1) + [True]
+    # Instructions and taxonomy are cached; the date (and summary) after them are not
+    assert breakpoints(payload["system"]) == [True, True, False]
+    assert "Groceries" in payload["system"][1]["text"]
+    assert "Groceries" not in payload["system"][2]["text"]
+    assert sum(breakpoints(payload["tools"]) + breakpoints(payload["system"])) <= 4
+    assert not any("cache_control" in str(message) for message in payload["messages"])
+
+
+def test_truncated_taxonomy_moves_to_the_uncached_block():
+    categories = [{"id": i, "name": f"Category {i}"} for i in range(1, 200)]
+    context = USER_CONTEXT.model_copy(update={"categories": categories})
+    payload = request_payload(assistant_tools, build_system_message(context, message="Category 7 spending", user_id=1))
+
+    assert breakpoints(payload["system"]) == [True, False]
+    assert "Category 7" in payload["system"][1]["text"]
+
+
+def test_fake_model_reports_cache_reads_for_a_repeated_prefix():
+    model = FakeChatModel(reply="OK.")
+    usage = LLMUsageStats()
+    system_message = build_system_message(USER_CONTEXT)
+
+    async def ask(question: str):
+        return await model.ainvoke([system_message, HumanMessage(content=question)])
+
+    first = asyncio.run(ask("How much did I spend?"))
+    second = asyncio.run(ask("What is my balance?"))
+    usage.record("assistant", first)
+    usage.record("assistant", second)
+
+    assert first.usage_metadata["input_token_details"]["cache_read"] == 0
+    assert first.usage_metadata["input_token_details"]["cache_creation"] > 0
+    assert second.usage_metadata["input_token_details"] == {
+        "cache_read": first.usage_metadata["input_token_details"]["cache_creation"],
+        "cache_creation": 0,
+    }
+    totals = usage.snapshot()["assistant"]
+    assert totals["calls"] == 2
+    assert totals["cache_read_tokens"] == second.usage_metadata["input_token_details"]["cache_read"]
+    assert 0 < totals["cache_hit_ratio"] < 1
+
+
+def test_fake_model_writes_only_the_changed_suffix():
+    model = FakeChatModel(reply="OK.")
+    asyncio.run(model.ainvoke([build_system_message(USER_CONTEXT), HumanMessage(content="hi")]))
+
+    # Same instructions, different taxonomy: the instructions are read, the taxonomy written
+    other = USER_CONTEXT.model_copy(update={"tags": [{"id": 2, "name": "travel"}]})
+    response = asyncio.run(model.ainvoke([build_system_message(other), HumanMessage(content="hi")]))
+    details = response.usage_metadata["input_token_details"]
+    assert details["cache_read"] > 0
+    assert details["cache_creation"] > 0
@@ -0,0 +1,183 @@
+"""Every hot analytics, budget and account query must read the large tables through an index"""
+
+import asyncio
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.assistant.analytics.queries import (
+    budget_utilization_query,
+    income_vs_expense_summary,
+    spending_by_category_query,
+    spending_by_tag_query,
+    spending_over_time_query,
+    top_expenses_query,
+)
+from app.crud.account_crud import AccountCrud
+from app.crud.budget_crud import BudgetCrud
+from app.database.models import Budget, Category, Tag, Transaction, TransactionType
+from app.database.slow_query_log import explain_statement
+from app.routers import analytics
+
+END = date.today()
+START = END - timedelta(days=30)
+
+# Tables that grow with usage and must never be read with a full scan
+LARGE_TABLES = ("transactions", "transaction_tags")
+
+# SQLite names the alias in plans ("SCAN transactions_1"); aliases are resolved from the statement
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_TABLE_ALIAS = re.compile(r"(?:\bFROM|\bJOIN|,)\s+\"?(\w+)\"?\s+AS\s+\"?(\w+)\"?", re.IGNORECASE)
+
+
+def find_table_scans(plan: str, statement: str = "") -> list[str]:
+    """The large tables a plan reads with a full scan; aliases are resolved from the planned SQL"""
+    aliases = {alias: table for table, alias in _TABLE_ALIAS.findall(statement)}
+    scanned = []
+    for line in plan.splitlines():
+        match = _SQLITE_SCAN.match(line.strip()) or _POSTGRES_SCAN.search(line)
+        if not match:
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table in LARGE_TABLES:
+            scanned.append(table)
+    return scanned
+
+
+def capture_plans(db: Session, run_query: Callable[[], Any]) -> list[tuple[str, str]]:
+    """Run a query function and return (statement, plan) for every statement it issues"""
+    conn = db.connection()
+    if conn.dialect.name == "postgresql":
+        # Tiny tables make sequential scans cheapest; force the planner to show index choices
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", capture)
+    try:
+        run_query()
+    finally:
+        event.remove(conn, "before_cursor_execute", capture)
+    return [
+        (statement, explain_statement(conn, statement, parameters, analyze=False) or "")
+        for statement, parameters in captured
+    ]
+
+
+def _endpoint(handler, **kwargs):
+    return lambda db, seed: asyncio.run(handler(
+        account_id=seed.account_id, current_user=SimpleNamespace(id=seed.user_id), db=db, **kwargs
+    ))
+
+
+HOT_QUERIES = {
+    # app/assistant/analytics/queries.py
+    "spending_by_category": lambda db, seed: spending_by_category_query(
+        db, seed.user_id, seed.account_id, START, END, TransactionType.EXPENSE
+    ),
+    "spending_by_category_all_accounts": lambda db, seed: spending_by_category_query(db, seed.user_id, None, START, END),
+    **{
+        f"spending_over_time_by_{period}": (
+            lambda period: lambda db, seed: spending_over_time_query(db, seed.user_id, seed.account_id, START, END, period)
+        )(period)
+        for period in ("day", "week", "month", "year")
+    },
+    "budget_utilization": lambda db, seed: budget_utilization_query(db, seed.user_id, seed.account_id),
+    "budget_utilization_all_accounts": lambda db, seed: budget_utilization_query(db, seed.user_id),
+    "top_expenses": lambda db, seed: top_expenses_query(db, seed.user_id, seed.account_id, START, END),
+    "income_vs_expense": lambda db, seed: income_vs_expense_summary(db, seed.user_id, seed.account_id, START, END),
+    "spending_by_tag": lambda db, seed: spending_by_tag_query(db, seed.user_id, seed.account_id, START, END),
+    # app/routers/analytics.py
+    "dashboard_summary": _endpoint(analytics.get_dashboard_summary),
+    "spending_breakdown": _endpoint(analytics.get_spending_breakdown, start_date=START, end_date=END),
+    "spending_timeline": _endpoint(analytics.get_spending_timeline, start_date=START, end_date=END),
+    # app/crud/budget_crud.py
+    "all_budgets": lambda db, seed: BudgetCrud.get_all_budgets(db, seed.user_id),
+    "budget_by_category": lambda db, seed: BudgetCrud.get_budget_by_category(db, seed.category_id, seed.user_id),
+    "budget_spending": lambda db, seed: BudgetCrud.get_budget_spending(db, seed.budget_id, seed.user_id),
+    "budgets_with_spending": lambda db, seed: BudgetCrud.get_all_budgets_with_spending(db, seed.user_id),
+    # app/crud/account_crud.py
+    "accounts_of_user": lambda db, seed: AccountCrud.get_all_by_user_id(db, seed.user_id),
+    "current_balance": lambda db, seed: AccountCrud.get_current_balance(db, seed.account),
+    "monthly_stats": lambda db, seed: AccountCrud.get_monthly_stats(db, seed.user_id, seed.account_id),
+    "monthly_stats_all_accounts": lambda db, seed: AccountCrud.get_monthly_stats(db, seed.user_id),
+}
+
+
+# spending_over_time_query groups weeks and months with date_trunc, which SQLite does not have
+POSTGRES_ONLY = {"spending_over_time_by_week", "spending_over_time_by_month"}
+
+
+@pytest.fixture
+def seed(db, account):
+    """A user with categories, a budget, a tag and tagged transactions over the last two months"""
+    groceries = Category(user_id=account.user_id, name="Groceries")
+    salary = Category(user_id=account.user_id, name="Salary")
+    tag = Tag(user_id=account.user_id, name="weekly")
+    db.add_all([groceries, salary, tag])
+    db.flush()
+    budget = Budget(user_id=account.user_id, category_id=groceries.id, amount=Decimal("300"))
+    db.add(budget)
+    for day in range(60):
+        db.add(Transaction(
+            user_id=account.user_id,
+            account_id=account.id,
+            category_id=groceries.id,
+            type=TransactionType.EXPENSE,
+            amount=Decimal("12.50"),
+            description="groceries",
+            date=END - timedelta(days=day),
+            tags=[tag] if day % 3 == 0 else [],
+        ))
+    db.add(Transaction(
+        user_id=account.user_id,
+        account_id=account.id,
+        category_id=salary.id,
+        type=TransactionType.INCOME,
+        amount=Decimal("2500"),
+        description="salary",
+        date=END,
+    ))
+    db.commit()
+    return SimpleNamespace(
+        user_id=account.user_id,
+        account_id=account.id,
+        account=account,
+        category_id=groceries.id,
+        budget_id=budget.id,
+    )
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_indexes(db, seed, name):
+    if name in POSTGRES_ONLY and db.bind.dialect.name != "postgresql":
+        pytest.skip("date_trunc is PostgreSQL-only")
+    plans = capture_plans(db, lambda: HOT_QUERIES[name](db, seed))
+
+    assert plans, f"{name} issued no statements"
+    for statement, plan in plans:
+        assert plan and not plan.startswith("Plan unavailable"), plan
+        assert find_table_scans(plan, statement) == [], f"{name} scans a large table:\n{statement}\n{plan}"
+
+
+@pytest.mark.parametrize("plan, statement, scanned", [
+    ("SCAN transactions", "SELECT * FROM transactions", ["transactions"]),
+    ("SCAN transactions_1", "SELECT * FROM transactions AS transactions_1", ["transactions"]),
+    ("SCAN t USING COVERING INDEX ix_transaction_user_date", 'SELECT t.id FROM "transactions" AS "t"', ["transactions"]),
+    ("SEARCH transactions_1 USING INDEX ix_transaction_user_date (user_id=?)",
+     "SELECT * FROM transactions AS transactions_1 WHERE user_id = ?", []),
+    ("SCAN categories", "SELECT * FROM categories", []),
+    ("Seq Scan on transactions t  (cost=0.00..1.01 rows=1 width=4)", "SELECT * FROM transactions t", ["transactions"]),
+])
+def test_find_table_scans_resolves_aliases(plan, statement, scanned):
+    assert find_table_scans(plan, statement) == scanned
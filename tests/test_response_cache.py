@@ -0,0 +1,122 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.assistant import response_cache as response_cache_module
+from app.assistant.history import load_conversation_history
+from app.assistant.response_cache import normalize_question, response_cache_key
+from app.assistant.service import chat_stream
+from app.config import settings
+from app.database.models import Category
+from app.database.models.conversation import Message
+from app.llm.usage import llm_usage
+
+
+@pytest.fixture(autouse=True)
+def response_cache_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Can I spend more on food?", "I spend more on food"),
+        ("How much did I spend?", "How much did you spend?"),
+        ("What can I cut?", "What would I cut?"),
+        ("Show me the budget", "Show me a budget"),
+        ("What did I spend so far?", "What did I spend?"),
+    ],
+)
+def test_distinct_questions_get_distinct_keys(first, second):
+    assert response_cache_key(first, 1, 1) != response_cache_key(second, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("What did I spend on food?", "what did i spend on food"),
+        ("Hey, what did I spend on food?", "  What did I spend   on food"),
+        ("Please, what is my balance?", "Thank you! What is my balance?"),
+        ("Hi hello... what is my balance", "what is my balance"),
+    ],
+)
+def test_trivially_different_phrasings_share_a_key(first, second):
+    assert response_cache_key(first, 1, 1) == response_cache_key(second, 1, 1)
+
+
+def test_greeting_only_is_not_cached():
+    assert normalize_question("Hi! Thanks") == ""
+    assert response_cache_key("Hi! Thanks", 1, 1) is None
+
+
+def test_keys_are_per_user_and_account():
+    key = response_cache_key("What is my balance?", 1, 1)
+    assert key != response_cache_key("What is my balance?", 2, 1)
+    assert key != response_cache_key("What is my balance?", 1, 2)
+
+
+QUESTION = "How much did I spend this month?"
+
+
+def assistant_calls() -> int:
+    return llm_usage.snapshot().get("assistant", {}).get("calls", 0)
+
+
+def first_turn(db, account) -> tuple[list[dict], int]:
+    """A new conversation asking QUESTION; returns its events and the assistant LLM calls it made"""
+    async def turn():
+        return [event async for event in chat_stream(QUESTION, account.user_id, account.id, db)]
+
+    calls = assistant_calls()
+    events = asyncio.run(turn())
+    return events, assistant_calls() - calls
+
+
+def answer_of(db, events) -> Message:
+    conversation_id = next(event["conversation_id"] for event in events if event["type"] == "conversation_id")
+    return db.query(Message).filter_by(conversation_id=conversation_id, role="assistant").one()
+
+
+def test_repeated_first_turn_is_answered_from_the_cache(db, account):
+    first, first_calls = first_turn(db, account)
+    second, second_calls = first_turn(db, account)
+
+    assert first_calls == 2  # Tool call, then the answer
+    assert second_calls == 0
+
+    def answer_text(events):
+        return "".join(event["content"] for event in events if event["type"] == "message_chunk")
+
+    assert answer_text(second) == answer_text(first)
+    assert [event["tool_name"] for event in second if event["type"] == "tool_end"] == ["get_spending_by_category"]
+
+    # The cached answer keeps its tool calls for follow-up questions
+    cached_answer = answer_of(db, second)
+    assert cached_answer.tool_calls_summary == answer_of(db, first).tool_calls_summary
+    history = load_conversation_history(db, cached_answer.conversation_id, account.user_id)
+    assert [m["role"] for m in history.messages] == ["user", "assistant", "tool", "assistant"]
+
+
+def test_data_change_misses_the_cache(db, account):
+    first_turn(db, account)
+
+    category = Category(user_id=account.user_id, name="Dining")
+    db.add(category)
+    db.commit()
+
+    _, calls = first_turn(db, account)
+    assert calls == 2
+
+
+def test_new_day_misses_the_cache(db, account, monkeypatch):
+    first_turn(db, account)
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(response_cache_module, "date", Tomorrow)
+    _, calls = first_turn(db, account)
+    assert calls == 2
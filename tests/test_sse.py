@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from app.assistant.sse import coalesce_message_chunks, format_sse, until_disconnected
+
+
+def chunk(text: str) -> dict:
+    return {"type": "message_chunk", "content": text, "is_final": False}
+
+
+async def source(*items):
+    """Yield events; a number among them sleeps that long instead"""
+    for item in items:
+        if isinstance(item, (int, float)):
+            await asyncio.sleep(item)
+        else:
+            yield item
+
+
+def coalesced(events, **kwargs) -> list[dict]:
+    async def run():
+        return [event async for event in coalesce_message_chunks(events, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_chunks_within_the_window_are_merged():
+    events = coalesced(source(chunk("Hel"), chunk("lo "), chunk("there")), window_seconds=10, max_chars=100)
+    assert events == [chunk("Hello there")]
+
+
+def test_window_closing_flushes_without_a_further_event():
+    events = coalesced(source(chunk("Hello"), 0.2, chunk(" there")), window_seconds=0.02, max_chars=100)
+    assert events == [chunk("Hello"), chunk(" there")]
+
+
+def test_max_chars_flushes_early():
+    events = coalesced(source(chunk("abc"), chunk("def"), chunk("gh")), window_seconds=10, max_chars=5)
+    assert events == [chunk("abcdef"), chunk("gh")]
+
+
+def test_other_events_flush_pending_text_first():
+    tool_start = {"type": "tool_start", "tool_name": "get_balance", "tool_input": {}}
+    final = {"type": "message_chunk", "content": "", "is_final": True}
+    events = coalesced(
+        source(chunk("Let me "), chunk("check."), tool_start, chunk("You have "), chunk("120 EUR."), final),
+        window_seconds=10,
+        max_chars=100,
+    )
+    assert events == [chunk("Let me check."), tool_start, chunk("You have 120 EUR."), final]
+
+
+def test_pending_text_is_flushed_at_the_end():
+    events = coalesced(source(chunk("The "), chunk("end")), window_seconds=10, max_chars=100)
+    assert events == [chunk("The end")]
+
+
+def test_source_error_is_raised_after_the_pending_text():
+    async def failing():
+        yield chunk("partial")
+        raise RuntimeError("model failed")
+
+    async def run(received):
+        async for event in coalesce_message_chunks(failing(), window_seconds=10, max_chars=100):
+            received.append(event)
+
+    received = []
+    with pytest.raises(RuntimeError):
+        asyncio.run(run(received))
+    assert received == [chunk("partial")]
+
+
+class FakeRequest:
+    """Reports a disconnect once `disconnected` is set"""
+
+    def __init__(self):
+        self.disconnected = asyncio.Event()
+
+    async def is_disconnected(self) -> bool:
+        await self.disconnected.wait()
+        return True
+
+
+def test_iteration_stops_when_the_client_disconnects():
+    async def scenario():
+        request = FakeRequest()
+        source_closed = asyncio.Event()
+
+        async def endless():
+            n = 0
+            try:
+                while True:
+                    n += 1
+                    yield n
+                    await asyncio.sleep(0.01)
+            finally:
+                source_closed.set()
+
+        received = []
+        async for event in until_disconnected(endless(), request):
+            received.append(event)
+            if event == 3:
+                request.disconnected.set()
+        return received, source_closed.is_set()
+
+    received, source_closed = asyncio.run(scenario())
+    assert received[:3] == [1, 2, 3]
+    assert len(received) <= 4
+    assert source_closed
+
+
+def test_all_events_pass_while_connected():
+    async def scenario():
+        return [event async for event in until_disconnected(source(0.05, "a", "b"), FakeRequest())]
+
+    # The number in the source is a pause, not an event
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_format_sse_adds_the_event_id():
+    event = {"type": "done"}
+    assert format_sse(event) == f"data: {json.dumps(event)}\n\n"
+    assert format_sse(event, "turn:3") == f"id: turn:3\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.assistant import stream_replay
+from app.assistant.router import resume_assistant_chat_stream
+from app.assistant.stream_replay import ResumeUnavailable, TurnStream, open_turn, parse_event_id
+
+
+def turn_with_events(count: int, user_id: int = 1, max_events: int = 100, done: bool = True) -> TurnStream:
+    turn = TurnStream("turn-1", user_id, max_events=max_events)
+    for n in range(1, count + 1):
+        turn.append({"type": "message_chunk", "content": f"part {n}"})
+    if done:
+        turn.finish()
+    return turn
+
+
+async def collect(events) -> list[int]:
+    return [event_id async for event_id, _ in events]
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    """Put a turn in this process's registry"""
+    def register(turn: TurnStream) -> TurnStream:
+        monkeypatch.setitem(stream_replay._turns, turn.turn_id, turn)
+        return turn
+    return register
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("abc123:7", ("abc123", 7)),
+        ("abc:123:0", ("abc:123", 0)),
+        ("abc123", None),
+        (":7", None),
+        ("abc123:", None),
+        ("abc123:-1", None),
+        ("abc123:x", None),
+        (None, None),
+    ],
+)
+def test_parse_event_id(value, expected):
+    assert parse_event_id(value) == expected
+
+
+@pytest.mark.parametrize("after", [0, 3, 5])
+def test_resume_yields_exactly_the_events_after_n(after):
+    turn = turn_with_events(5)
+    assert asyncio.run(collect(turn.follow(after))) == list(range(after + 1, 6))
+
+
+def test_follow_picks_up_live_events_until_the_turn_is_done():
+    async def scenario():
+        turn = turn_with_events(2, done=False)
+        follower = asyncio.create_task(collect(turn.follow(1)))
+        await asyncio.sleep(0)
+        turn.append({"type": "message_chunk", "content": "part 3"})
+        await asyncio.sleep(0)
+        turn.append({"type": "done"})
+        turn.finish()
+        return await asyncio.wait_for(follower, 1)
+
+    assert asyncio.run(scenario()) == [2, 3, 4]
+
+
+def test_overflowed_buffer_cannot_resume_from_dropped_events():
+    turn = turn_with_events(5, max_events=3)  # Events 3 to 5 are left
+
+    assert not turn.can_resume(1)
+    assert turn.can_resume(2)
+    with pytest.raises(ResumeUnavailable):
+        asyncio.run(collect(turn.follow(1)))
+    assert asyncio.run(collect(turn.follow(2))) == [3, 4, 5]
+
+
+def test_open_turn_of_another_user_returns_none(registered):
+    registered(turn_with_events(3, user_id=1))
+    assert asyncio.run(open_turn("turn-1", user_id=2, after=0)) is None
+
+
+def test_open_unknown_turn_returns_none():
+    assert asyncio.run(open_turn("no-such-turn", user_id=1, after=0)) is None
+
+
+def test_open_turn_follows_the_owners_turn(registered):
+    registered(turn_with_events(3, user_id=1))
+
+    async def scenario():
+        return await collect(await open_turn("turn-1", user_id=1, after=1))
+
+    assert asyncio.run(scenario()) == [2, 3]
+
+
+def test_open_turn_raises_when_events_were_dropped(registered):
+    registered(turn_with_events(5, user_id=1, max_events=3))
+    with pytest.raises(ResumeUnavailable):
+        asyncio.run(open_turn("turn-1", user_id=1, after=0))
+
+
+@pytest.mark.parametrize(
+    "last_event_id, user_id, status_code",
+    [
+        ("not-an-id", 1, 400),
+        ("no-such-turn:0", 1, 404),
+        ("turn-1:0", 2, 404),
+        ("turn-1:0", 1, 410),
+    ],
+)
+def test_resume_endpoint_errors(registered, last_event_id, user_id, status_code):
+    registered(turn_with_events(5, user_id=1, max_events=3))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(resume_assistant_chat_stream(
+            http_request=None,
+            last_event_id=last_event_id,
+            current_user=SimpleNamespace(id=user_id),
+        ))
+    assert error.value.status_code == status_code
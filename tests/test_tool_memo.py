@@ -0,0 +1,120 @@
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.assistant.service import chat_stream
+from app.assistant.tools import memo as memo_module
+from app.assistant.tools.analytics import get_spending_by_category
+from app.assistant.tools.context import ToolContext, build_tool_config
+from app.database.models import Account, Category, Transaction, User
+from app.database.models.enums import TransactionType
+
+
+def call_tool(account, conversation_id: int, **args):
+    """Run the tool as the ToolNode does; returns (content, cached)"""
+    config = build_tool_config(ToolContext(
+        user_id=account.user_id,
+        account_id=account.id,
+        conversation_id=conversation_id,
+    ))
+    message = get_spending_by_category.invoke(
+        {"type": "tool_call", "id": "call_1", "name": "get_spending_by_category", "args": args},
+        config=config,
+    )
+    return message.content, message.artifact["cached"]
+
+
+def add_expense(db, account, amount: str) -> None:
+    category = db.query(Category).filter_by(user_id=account.user_id, name="Dining").one_or_none()
+    if category is None:
+        category = Category(user_id=account.user_id, name="Dining")
+        db.add(category)
+        db.flush()
+    db.add(Transaction(
+        user_id=account.user_id,
+        account_id=account.id,
+        category_id=category.id,
+        type=TransactionType.EXPENSE,
+        amount=Decimal(amount),
+        description="Coffee",
+        date=date.today(),
+    ))
+    db.commit()
+
+
+def test_identical_arguments_hit_within_a_conversation(account):
+    first, cached = call_tool(account, 1, period="month")
+    assert not cached
+
+    # Defaults are applied before keying: the explicit default is the same call
+    again, cached = call_tool(account, 1, period="month", transaction_type="expense")
+    assert cached and again == first
+
+    _, cached = call_tool(account, 1, period="week")
+    assert not cached
+
+
+def test_committed_write_misses_with_the_new_figures(db, account):
+    before, _ = call_tool(account, 1, period="month")
+    add_expense(db, account, "4.50")
+
+    after, cached = call_tool(account, 1, period="month")
+    assert not cached
+    assert after != before and "4.5" in after
+
+
+def test_a_new_day_misses(account, monkeypatch):
+    call_tool(account, 1, period="month")
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(memo_module, "date", Tomorrow)
+    _, cached = call_tool(account, 1, period="month")
+    assert not cached
+
+
+def test_results_are_not_shared_across_conversations(account):
+    call_tool(account, 1, period="month")
+    _, cached = call_tool(account, 2, period="month")
+    assert not cached
+
+
+def test_results_are_not_shared_across_users(db, account):
+    user = User(name="Other", email=f"other-{account.user_id}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    other = Account(user_id=user.id, name="Main Account", initial_balance=0, currency="EUR")
+    db.add(other)
+    db.commit()
+    add_expense(db, other, "99.00")
+
+    mine, _ = call_tool(account, 1, period="month")
+    theirs, cached = call_tool(other, 1, period="month")
+    assert not cached
+    assert "99" in theirs and "99" not in mine
+
+
+@pytest.mark.parametrize("write_between_turns, cached", [(False, True), (True, False)])
+def test_tool_end_event_reports_the_cache_hit(db, account, write_between_turns, cached):
+    async def turn(conversation_id=None) -> list[dict]:
+        return [
+            event
+            async for event in chat_stream("How much did I spend this month?", account.user_id, account.id, db, conversation_id)
+        ]
+
+    first = asyncio.run(turn())
+    conversation_id = next(event["conversation_id"] for event in first if event["type"] == "conversation_id")
+    if write_between_turns:
+        add_expense(db, account, "4.50")
+    second = asyncio.run(turn(conversation_id))
+
+    def tool_ends(events):
+        return [event["cached"] for event in events if event["type"] == "tool_end"]
+
+    assert tool_ends(first) == [False]
+    assert tool_ends(second) == [cached]
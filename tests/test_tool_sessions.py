@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.graph import END, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from app.assistant.tools import assistant_tools
+from app.assistant.tools.context import ToolContext, build_tool_config
+from app.database.database import SessionLocal
+
+
+def _tool_graph():
+    """Just the assistant's tool node, as the graph runs it after a model turn"""
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("tools", ToolNode(assistant_tools))
+    workflow.set_entry_point("tools")
+    workflow.add_edge("tools", END)
+    return workflow.compile()
+
+
+def test_parallel_read_tools_run_concurrently_on_separate_sessions(account):
+    # Each session is only handed out once both tool calls are waiting for one, so the
+    # calls finish only if the ToolNode runs them at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    sessions = []
+
+    def session_factory():
+        barrier.wait()
+        db = SessionLocal()
+        sessions.append(db)
+        return db
+
+    config = build_tool_config(ToolContext(
+        user_id=account.user_id,
+        account_id=account.id,
+        session_factory=session_factory,
+    ))
+    request = AIMessage(content="", tool_calls=[
+        {"id": "call_category", "name": "get_spending_by_category", "args": {"period": "month"}},
+        {"id": "call_top", "name": "get_top_expenses", "args": {"period": "month"}},
+    ])
+
+    result = asyncio.run(_tool_graph().ainvoke({"messages": [request]}, config=config))
+
+    messages = [message for message in result["messages"] if isinstance(message, ToolMessage)]
+    assert {message.tool_call_id for message in messages} == {"call_category", "call_top"}
+    assert all(message.status == "success" for message in messages), [message.content for message in messages]
+    assert len(sessions) == 2 and sessions[0] is not sessions[1]
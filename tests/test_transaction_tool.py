@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agent import service as agent_service
+from app.agent.graph import create_agent_graph
+from app.assistant import service as assistant_service
+from app.assistant.graph import create_assistant_graph
+from app.config import settings
+from app.llm.fake import DEFAULT_SCRIPTS
+
+SCRIPT = {
+    "assistant": {
+        "preamble": "Let me add that for you. ",
+        "tool_calls": [{"name": "create_transactions", "args": {"text": "Coffee and sandwich 12.50"}}],
+        "reply": "Please review the transaction below.",
+    },
+    # The nested agent talks before its tool calls too; none of that is meant for the chat
+    "agent": {"preamble": "Nested agent thinking out loud. "},
+}
+
+
+@pytest.fixture
+def scripted_graphs(tmp_path, monkeypatch):
+    """Assistant and transaction agent graphs built from SCRIPT, with the agent always running"""
+    script_file = tmp_path / "script.json"
+    script_file.write_text(json.dumps(SCRIPT))
+    monkeypatch.setattr(settings, "FAKE_LLM_SCRIPT_FILE", str(script_file))
+    monkeypatch.setattr(settings, "FAST_PARSER_ENABLED", False)
+    monkeypatch.setattr(agent_service, "agent_graph", create_agent_graph())
+    monkeypatch.setattr(assistant_service, "assistant_graph", create_assistant_graph())
+
+
+def test_nested_agent_progress_reaches_the_chat_stream_without_its_tokens(db, account, scripted_graphs):
+    async def turn() -> list[dict]:
+        return [event async for event in assistant_service.chat_stream("Add coffee and sandwich 12.50", account.user_id, account.id, db)]
+
+    events = asyncio.run(turn())
+    types = [event["type"] for event in events]
+
+    # The agent's progress arrives live while the tool runs, before the previews it returns
+    start, end = types.index("tool_start"), types.index("tool_end")
+    assert types[start + 1:end] == ["planning", "transaction_start", "transaction", "transaction_previews"]
+    assert events[start + 1] == {"type": "planning", "count": 1}
+    expected = DEFAULT_SCRIPTS["agent"]["tool_calls"][0]["args"]
+    transaction = events[start + 3]["data"]
+    assert (transaction["amount"], transaction["description"]) == (expected["amount"], expected["description"])
+    assert events[start + 4]["count"] == 1
+
+    # Only the assistant's own words are streamed as the answer
+    text = "".join(event["content"] for event in events if event["type"] == "message_chunk")
+    assert text == SCRIPT["assistant"]["preamble"] + SCRIPT["assistant"]["reply"]
+    assert "Nested agent" not in text